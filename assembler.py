@@ -1,13 +1,77 @@
 """Simple assembler for the Pure UOR VM."""
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import hashlib
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
 
 import chunks
+from decoder import DecodedInstruction, link
 
 
-def assemble(text: str) -> List[int]:
-    """Assemble the given text into a list of encoded chunks."""
+# Operand description used in "requires ..." errors for opcodes with operand.
+_OPERANDS = {
+    "PUSH": "value",
+    "LOAD": "address",
+    "STORE": "address",
+    "JMP": "offset",
+    "JZ": "offset",
+    "JNZ": "offset",
+    "CALL": "offset",
+    "ALLOC": "size",
+    "FREE": "address",
+    "BLOCK": "length",
+    "NTT": "length",
+    "UN_CREATE": "value",
+    "UN_GRADE": "value",
+    "PRINTN": "count",
+}
+_BRANCHES = {"JMP": chunks.raw_jmp, "JZ": chunks.raw_jz, "JNZ": chunks.raw_jnz, "CALL": chunks.raw_call}
+
+
+def _assemble_decoded(instructions: List[Tuple[str, str | None]]) -> List[DecodedInstruction]:
+    """Build pre-decoded instructions, mirroring ``decode(assemble(...))``."""
+    flat: List[Tuple[DecodedInstruction | None, str, int]] = []
+    for op, arg in instructions:
+        if op in _OPERANDS:
+            if arg is None:
+                raise ValueError(f"{op} requires {_OPERANDS[op]}")
+            val = int(arg)
+            if op in _BRANCHES:
+                flat.append((_BRANCHES[op](val), op, val))
+            elif op in ("BLOCK", "NTT"):
+                flat.append((None, op, val))
+            else:
+                flat.append((chunks.raw_arg(getattr(chunks, f"OP_{op}"), val), op, val))
+        else:
+            opcode = getattr(chunks, f"OP_{op}", None)
+            if opcode is None:
+                raise ValueError(f"Unknown instruction: {op}")
+            flat.append((chunks.raw_op(opcode), op, 0))
+
+    def group(items: List[Tuple[DecodedInstruction | None, str, int]]) -> List[DecodedInstruction]:
+        program: List[DecodedInstruction] = []
+        idx = 0
+        while idx < len(items):
+            instr, op, val = items[idx]
+            idx += 1
+            if instr is None:
+                body = group(items[idx : idx + val])
+                instr = chunks.raw_block(body) if op == "BLOCK" else chunks.raw_ntt(body)
+                idx += val
+            program.append(instr)
+        return program
+
+    return link(group(flat))
+
+
+def assemble(text: str, *, decoded: bool = False) -> List[int] | List[DecodedInstruction]:
+    """Assemble the given text into a list of encoded chunks.
+
+    With ``decoded=True`` return the ``DecodedInstruction`` list that
+    ``decode`` would produce, without encoding to primes and factoring back.
+    """
     lines = [line.split("#", 1)[0].strip() for line in text.splitlines()]
     instructions: List[Tuple[str, str | None]] = []
     labels: Dict[str, int] = {}
@@ -32,6 +96,9 @@ def assemble(text: str) -> List[int]:
         offset = labels[label] - idx - 1
         instructions[idx] = (instructions[idx][0], str(offset))
 
+    if decoded:
+        return _assemble_decoded(instructions)
+
     result: List[int] = []
     for op, arg in instructions:
         if op == "PUSH":
@@ -120,6 +187,10 @@ def assemble(text: str) -> List[int]:
             result.append(chunks.chunk_pick())
         elif op == "PRINT":
             result.append(chunks.chunk_print())
+        elif op == "PRINTN":
+            if arg is None:
+                raise ValueError("PRINTN requires count")
+            result.append(chunks.chunk_printn(int(arg)))
         elif op == "LOAD":
             if arg is None:
                 raise ValueError("LOAD requires address")
@@ -198,7 +269,112 @@ def assemble(text: str) -> List[int]:
     return result
 
 
+def parse_uor_bytes(buf: bytes | str) -> List[int]:
+    """Parse whitespace separated decimal chunks (the ``.uor`` format).
+
+    ``int`` accepts ``bytes`` directly, so mapping it over ``split()`` keeps
+    the whole loop in C without decoding or a per-token comprehension.
+    """
+    return list(map(int, buf.split()))
+
+
+# Binary chunk stream: magic, format version byte, u32 LE count, then per
+# chunk a u16 LE byte length followed by the big-endian magnitude.
+PACK_MAGIC = b"UORB"
+PACK_VERSION = 1
+_HEADER = PACK_MAGIC + bytes([PACK_VERSION])
+_COUNT = struct.Struct("<I")
+_LEN = struct.Struct("<H")
+
+
+def pack_chunks(chunks_list: List[int]) -> bytes:
+    """Serialize ``chunks_list`` in the compact binary chunk format."""
+    parts = [_HEADER, _COUNT.pack(len(chunks_list))]
+    pack_len = _LEN.pack
+    for value in chunks_list:
+        raw = value.to_bytes((value.bit_length() + 7) // 8, "big")
+        parts.append(pack_len(len(raw)))
+        parts.append(raw)
+    return b"".join(parts)
+
+
+def unpack_chunks(buf: bytes) -> List[int]:
+    """Inverse of :func:`pack_chunks`.
+
+    Data without the binary header is parsed as ``.uor`` decimal text so
+    content stored by older releases keeps loading.
+    """
+    if not buf.startswith(PACK_MAGIC):
+        return parse_uor_bytes(buf)
+    view = memoryview(buf)
+    version = view[len(PACK_MAGIC)] if len(view) > len(PACK_MAGIC) else None
+    if version != PACK_VERSION:
+        raise ValueError(f"Unsupported chunk stream version: {version}")
+    (count,) = _COUNT.unpack_from(view, len(_HEADER))
+    pos = len(_HEADER) + _COUNT.size
+    unpack_len = _LEN.unpack_from
+    from_bytes = int.from_bytes
+    result: List[int] = []
+    append = result.append
+    for _ in range(count):
+        (size,) = unpack_len(view, pos)
+        pos += _LEN.size
+        if pos + size > len(view):
+            raise ValueError("Truncated chunk stream")
+        append(from_bytes(view[pos : pos + size], "big"))
+        pos += size
+    return result
+
+
 def assemble_file(path: str) -> List[int]:
     with open(path, "r", encoding="utf-8") as fh:
         return assemble(fh.read())
 
+
+_ENCODER_DIGEST: Optional[bytes] = None
+
+
+def _encoder_digest() -> bytes:
+    """Digest of the assembler and chunk encoders used to key cached output."""
+    global _ENCODER_DIGEST
+    if _ENCODER_DIGEST is None:
+        h = hashlib.sha256(usedforsecurity=False)
+        for mod_path in (__file__, chunks.__file__):
+            with open(mod_path, "rb") as fh:
+                h.update(fh.read())
+        _ENCODER_DIGEST = h.digest()
+    return _ENCODER_DIGEST
+
+
+def cache_dir() -> str:
+    """Return the directory holding cached assembler output."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "uor", "asm")
+
+
+def assemble_file_cached(path: str) -> List[int]:
+    """Like :func:`assemble_file` but reuse previously assembled output.
+
+    Results are stored as ``.uor`` text keyed by the SHA-256 of the source
+    and of the encoder modules, so editing either invalidates the entry.
+    Cache I/O failures are ignored and simply fall back to assembling.
+    """
+    with open(path, "rb") as fh:
+        source = fh.read()
+    key = hashlib.sha256(_encoder_digest() + source, usedforsecurity=False).hexdigest()
+    cache_path = os.path.join(cache_dir(), f"{key}.uor")
+    try:
+        with open(cache_path, "rb") as fh:
+            return parse_uor_bytes(fh.read())
+    except (OSError, ValueError):
+        pass
+    result = assemble(source.decode("utf-8"))
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(str(x) for x in result))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return result
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Optional, List
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
 
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
@@ -13,6 +14,81 @@ from uor import async_llm_client, ipfs_storage
 app = FastAPI()
 
 
+class GenerateBatcher:
+    """Collect ``/generate`` calls into micro-batches.
+
+    Requests arriving within ``max_wait`` seconds of the first one, up to
+    ``max_batch`` of them, are dispatched together with ``asyncio.gather``
+    while the next batch is being collected. At most ``max_inflight``
+    calls per provider run at once to stay under provider rate limits.
+    The queue and worker belong to the event loop that first uses them and
+    are recreated if a different loop calls :meth:`submit`.
+    """
+
+    def __init__(self, max_batch: int = 8, max_wait: float = 0.025, max_inflight: int = 8) -> None:
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_inflight = max_inflight
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        # Dispatch tasks in flight; the loop only keeps weak references.
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, provider: str, prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._limits = {}
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((provider, prompt, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        results = await asyncio.gather(
+            *(self._call(provider, prompt) for provider, prompt, _ in batch),
+            return_exceptions=True,
+        )
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _call(self, provider: str, prompt: str) -> str:
+        limit = self._limits.get(provider)
+        if limit is None:
+            limit = self._limits[provider] = asyncio.Semaphore(self.max_inflight)
+        async with limit:
+            return await async_llm_client.async_call_model(provider, prompt)
+
+
+_batcher = GenerateBatcher()
+
+
 class AssembleRequest(BaseModel):
     text: str
 
@@ -45,15 +121,15 @@ async def run_route(req: RunRequest):
     else:
         raise HTTPException(status_code=400, detail="text or chunks required")
     vm = VM()
-    output = "".join(vm.execute(decoder.decode(program)))
+    output = vm.run(decoder.decode(program))
     return {"output": output}
 
 
 @app.post("/generate")
 async def generate_route(req: GenerateRequest):
-    asm = await async_llm_client.async_call_model(req.provider, req.prompt)
+    asm = await _batcher.submit(req.provider, req.prompt)
     chunks_list = assembler.assemble(asm)
-    data_bytes = "\n".join(str(x) for x in chunks_list).encode("utf-8")
+    data_bytes = assembler.pack_chunks(chunks_list)
     cid = await ipfs_storage.async_add_data(data_bytes)
     return {"cid": cid}
 
@@ -1,6 +1,6 @@
 import time
 import assembler
-from decoder import decode, _CACHE
+from decoder import decode, _CACHE, _decode_program
 from primes import factor, optimized_factorize
 from uor.memory import SegmentedMemory
 from vm import VM
@@ -35,6 +35,7 @@ def bench_decode_speed(runs: int = 200) -> tuple[float, float]:
     total = 0.0
     for _ in range(runs):
         _CACHE.clear()
+        _decode_program.cache_clear()
         start = time.perf_counter()
         decode(prog)
         total += time.perf_counter() - start
@@ -9,7 +9,7 @@ from primes import get_prime, _PRIME_IDX
 from primes import _PRIMES
 from primes import _extend_primes_to
 
-_extend_primes_to(67)
+_extend_primes_to(68)
 OP_PUSH, OP_ADD, OP_PRINT = _PRIMES[0], _PRIMES[1], _PRIMES[2]
 OP_SUB, OP_MUL = _PRIMES[6], _PRIMES[7]
 OP_LOAD, OP_STORE = _PRIMES[8], _PRIMES[9]
@@ -36,10 +36,27 @@ OP_NOT, OP_GT, OP_LT = _PRIMES[55], _PRIMES[56], _PRIMES[57]
 OP_EQ, OP_NEQ, OP_GTE = _PRIMES[58], _PRIMES[59], _PRIMES[60]
 OP_LTE, OP_DUP, OP_SWAP = _PRIMES[61], _PRIMES[62], _PRIMES[63]
 OP_ROT, OP_DROP, OP_OVER = _PRIMES[64], _PRIMES[65], _PRIMES[66]
-OP_PICK = _PRIMES[67]
+OP_PICK, OP_PRINTN = _PRIMES[67], _PRIMES[68]
 BLOCK_TAG, NTT_TAG, T_MOD = _PRIMES[3], _PRIMES[4], _PRIMES[5]
 NTT_ROOT = 2
 
+# Adjacent opcode pairs the VM may run in a single dispatch. The first opcode
+# of each pair never changes ``ip`` so the second always follows it.
+SUPERINSTRUCTIONS = frozenset({
+    (OP_PUSH, OP_STORE),
+    (OP_PUSH, OP_PUSH),
+    (OP_PUSH, OP_ADD),
+    (OP_PUSH, OP_SUB),
+    (OP_PUSH, OP_MUL),
+    (OP_PUSH, OP_GT),
+    (OP_PUSH, OP_LT),
+    (OP_PUSH, OP_EQ),
+    (OP_LOAD, OP_PRINT),
+    (OP_LOAD, OP_PUSH),
+    (OP_LOAD, OP_JZ),
+    (OP_LOAD, OP_JNZ),
+})
+
 
 def _attach_checksum(raw: int, fac: List[Tuple[int, int]]) -> int:
     xor = 0
@@ -81,6 +98,11 @@ def chunk_print() -> int:
     return _attach_checksum(OP_PRINT ** 4, [(OP_PRINT, 4)])
 
 
+def chunk_printn(n: int) -> int:
+    p = get_prime(n)
+    return _attach_checksum(OP_PRINTN ** 4 * p ** 5, [(OP_PRINTN, 4), (p, 5)])
+
+
 def chunk_load(addr: int) -> int:
     p = get_prime(addr)
     return _attach_checksum(OP_LOAD ** 4 * p ** 5, [(OP_LOAD, 4), (p, 5)])
@@ -372,3 +394,81 @@ def chunk_over() -> int:
 
 def chunk_pick() -> int:
     return _attach_checksum(OP_PICK ** 4, [(OP_PICK, 4)])
+
+
+# ---------------------------------------------------------------------------
+# Pre-decoded constructors
+# ---------------------------------------------------------------------------
+# ``raw_*`` helpers build the ``DecodedInstruction`` that decoding the matching
+# ``chunk_*`` value would produce, skipping the prime encoding and the
+# factorisation needed to undo it. Use them for programs that never leave the
+# process; ``decoder.link`` resolves branch targets for a finished program.
+
+def _raw(fac: List[Tuple[int, int]]):
+    from decoder import DecodedInstruction  # decoder imports this module
+
+    return DecodedInstruction(data=sorted(fac))
+
+
+def raw_op(op: int):
+    """Pre-decoded form of an opcode without operand, e.g. ``raw_op(OP_ADD)``."""
+    return _raw([(op, 4)])
+
+
+def raw_arg(op: int, val: int):
+    """Pre-decoded form of an opcode taking a non-negative operand."""
+    return _raw([(op, 4), (get_prime(val), 5)])
+
+
+def raw_data(pos: int, cp: int):
+    p1, p2 = get_prime(pos), get_prime(cp)
+    if p1 == p2:
+        return _raw([(p1, 3)])
+    return _raw([(p1, 1), (p2, 2)])
+
+
+def raw_push(v: int):
+    return raw_arg(OP_PUSH, v)
+
+
+def raw_load(addr: int):
+    return raw_arg(OP_LOAD, addr)
+
+
+def raw_store(addr: int):
+    return raw_arg(OP_STORE, addr)
+
+
+def _raw_branch(op: int, offset: int):
+    fac = [(op, 4), (get_prime(abs(offset)), 5)]
+    if offset < 0:
+        fac.append((NEG_FLAG, 5))
+    return _raw(fac)
+
+
+def raw_jmp(offset: int):
+    return _raw_branch(OP_JMP, offset)
+
+
+def raw_jz(offset: int):
+    return _raw_branch(OP_JZ, offset)
+
+
+def raw_jnz(offset: int):
+    return _raw_branch(OP_JNZ, offset)
+
+
+def raw_call(offset: int):
+    return _raw_branch(OP_CALL, offset)
+
+
+def raw_block(body: List):
+    instr = _raw([(BLOCK_TAG, 7), (get_prime(len(body)), 5)])
+    instr.inner = list(body)
+    return instr
+
+
+def raw_ntt(body: List):
+    instr = _raw([(NTT_TAG, 4), (get_prime(len(body)), 5)])
+    instr.inner = list(body)
+    return instr
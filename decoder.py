@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Tuple
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
 
 from uor.cache import InstructionCache
 from primes import get_prime, _PRIME_IDX, factor
 from chunks import (
     BLOCK_TAG,
     NTT_TAG,
+    OP_PUSH,
     OP_CALL,
     OP_RET,
     OP_ALLOC,
@@ -18,23 +20,70 @@ from chunks import (
     OP_NET_RECV,
     OP_THREAD_START,
     OP_THREAD_JOIN,
+    SUPERINSTRUCTIONS,
+    OP_JMP,
+    OP_JZ,
+    OP_JNZ,
+    OP_LOAD,
+    OP_STORE,
+    NEG_FLAG,
 )
 
-
-_CACHE = InstructionCache()
+_BRANCH_OPS = frozenset({OP_JMP, OP_JZ, OP_JNZ, OP_CALL})
+_MEMORY_OPS = frozenset({OP_LOAD, OP_STORE})
 
 
 @dataclass
 class DecodedInstruction:
     data: List[Tuple[int, int]]
     inner: List["DecodedInstruction"] | None = None
+    # Signed distance from the instruction after a JMP/JZ/JNZ/CALL to its
+    # target, decoded once from the operand primes. It is relative so the
+    # instruction stays valid wherever the program places it.
+    offset: int | None = None
+    # Immediate address of a LOAD/STORE, so handlers skip the operand scan.
+    addr: int | None = None
+    # ``(opcode, instruction)`` of the next instruction when the pair forms a
+    # superinstruction the VM can run in one dispatch.
+    fused: Tuple[int, "DecodedInstruction"] | None = field(default=None, repr=False, compare=False)
+    # Tags derived from ``data`` once at construction so the interpreter loop
+    # does not rescan the factors on every step: the opcode prime (exponent
+    # 4), the BLOCK and NTT markers and the prime of a character chunk.
+    op: int | None = field(init=False, repr=False, compare=False)
+    # Value a PUSH places on the stack, from its exponent-5 operand prime.
+    push_val: int | None = field(init=False, repr=False, compare=False)
+    is_block: bool = field(init=False, repr=False, compare=False)
+    is_ntt: bool = field(init=False, repr=False, compare=False)
+    print_prime: int | None = field(init=False, repr=False, compare=False)
+    # ``repr`` of ``data`` as bytes, computed on first use by the JIT when it
+    # keys a block holding the instruction.
+    data_key: bytes | None = field(default=None, init=False, repr=False, compare=False)
 
+    def __post_init__(self) -> None:
+        op = print_prime = operand = None
+        is_block = is_ntt = False
+        for p, e in self.data:
+            if e == 4:
+                if op is None:
+                    op = p
+                if p == NTT_TAG:
+                    is_ntt = True
+            elif e == 5:
+                if operand is None:
+                    operand = p
+            elif e == 7 and p == BLOCK_TAG:
+                is_block = True
+            elif print_prime is None and e in (2, 3):
+                print_prime = p
+        self.op = op
+        self.push_val = _PRIME_IDX.get(operand) if op == OP_PUSH else None
+        self.is_block = is_block
+        self.is_ntt = is_ntt
+        self.print_prime = print_prime
 
-def _decode_single(chunk: int) -> DecodedInstruction:
-    """Decode a single chunk into a ``DecodedInstruction`` object."""
-    cached = _CACHE.get(chunk)
-    if cached is not None:
-        return DecodedInstruction(data=cached.data)
+
+def _decode_data(chunk: int) -> List[Tuple[int, int]]:
+    """Validate ``chunk`` and return its factors without the checksum."""
     fac = factor(chunk)
     chk = None
     data: List[Tuple[int, int]] = []
@@ -58,30 +107,152 @@ def _decode_single(chunk: int) -> DecodedInstruction:
         xor ^= _PRIME_IDX[p] * e
     if chk != get_prime(xor):
         raise ValueError("Checksum mismatch")
+    return data
 
-    instr = DecodedInstruction(data=data)
-    _CACHE.put(chunk, instr)
-    return DecodedInstruction(data=instr.data)
 
+_CACHE = InstructionCache(loader=_decode_data)
 
-def decode(chunks: List[int]) -> List[DecodedInstruction]:
-    """Decode a list of numeric chunks into ``DecodedInstruction`` objects."""
+
+def _decode_single(chunk: int) -> DecodedInstruction:
+    """Decode a single chunk into a ``DecodedInstruction`` object."""
+    return DecodedInstruction(data=_CACHE.load(chunk))
+
+
+def _decode_at(chunks: List[int], ip: int) -> Tuple[DecodedInstruction, int]:
+    """Decode the instruction starting at chunk ``ip``.
+
+    Returns the instruction and the index of the chunk following it, which
+    skips the body chunks consumed by ``BLOCK`` and ``NTT``.
+    """
+    instr = _decode_single(chunks[ip])
+    ip += 1
+    if instr.is_block or instr.is_ntt:
+        tag = BLOCK_TAG if instr.is_block else NTT_TAG
+        lp = next(p for p, e in instr.data if p != tag and e == 5)
+        cnt = _PRIME_IDX[lp]
+        # Built in one step so an instruction is complete before
+        # ``_decode_program`` caches it.
+        instr = replace(instr, inner=decode(chunks[ip : ip + cnt]))
+        ip += cnt
+    return instr, ip
+
+
+def _opcode(instr: DecodedInstruction) -> Optional[int]:
+    if instr.inner is not None:
+        return None
+    return instr.op
+
+
+def _resolve_operands(instr: DecodedInstruction) -> None:
+    """Store the branch offset or memory address of ``instr``."""
+    op = _opcode(instr)
+    if op in _BRANCH_OPS:
+        data = instr.data
+        sign = -1 if any(p == NEG_FLAG and e == 5 for p, e in data) else 1
+        off = next(p for p, e in data if e == 5 and p != NEG_FLAG)
+        instr.offset = sign * _PRIME_IDX[off]
+    elif op in _MEMORY_OPS:
+        instr.addr = _PRIME_IDX[next(p for p, e in instr.data if e == 5)]
+
+
+def _fuse(prev: DecodedInstruction, instr: DecodedInstruction) -> None:
+    """Link ``instr`` to ``prev`` if the pair is a superinstruction."""
+    op = _opcode(instr)
+    if op is not None and (_opcode(prev), op) in SUPERINSTRUCTIONS:
+        prev.fused = (op, instr)
+
+
+@lru_cache(maxsize=128)
+def _decode_program(chunks: Tuple[int, ...]) -> Tuple[DecodedInstruction, ...]:
     result: List[DecodedInstruction] = []
     ip = 0
     while ip < len(chunks):
-        ck = chunks[ip]
-        ip += 1
-        instr = _decode_single(ck)
-        data = instr.data
-        if any(p == BLOCK_TAG and e == 7 for p, e in data):
-            lp = next(p for p, e in data if p != BLOCK_TAG and e == 5)
-            cnt = _PRIME_IDX[lp]
-            instr.inner = decode(chunks[ip : ip + cnt])
-            ip += cnt
-        elif any(p == NTT_TAG and e == 4 for p, e in data):
-            lp = next(p for p, e in data if p != NTT_TAG and e == 5)
-            cnt = _PRIME_IDX[lp]
-            instr.inner = decode(chunks[ip : ip + cnt])
-            ip += cnt
+        instr, ip = _decode_at(chunks, ip)
+        _resolve_operands(instr)
+        if result:
+            _fuse(result[-1], instr)
+        result.append(instr)
+    return tuple(result)
+
+
+def decode(chunks: List[int]) -> List[DecodedInstruction]:
+    """Decode a list of numeric chunks into ``DecodedInstruction`` objects.
+
+    Results are memoized by program content, so decoding the same program
+    again only copies the instruction list. The instructions themselves are
+    shared between calls: everything stored on them is derived from their
+    own chunks, and neither ``link`` nor the VM modifies them afterwards.
+    Callers must treat them as read-only and build new instructions (e.g.
+    with ``dataclasses.replace``) instead of editing them.
+    """
+    return list(_decode_program(tuple(chunks)))
+
+
+def link(program: List[DecodedInstruction]) -> List[DecodedInstruction]:
+    """Return a copy of a built program with branch offsets and
+    superinstructions resolved.
+
+    ``decode`` does this itself; use it for programs assembled from
+    pre-decoded instructions (see ``chunks.raw_push`` and friends). The
+    instructions may come from the ``decode`` cache, so they are copied
+    rather than updated in place.
+    """
+    result: List[DecodedInstruction] = []
+    for instr in program:
+        instr = replace(instr, inner=link(instr.inner) if instr.inner else instr.inner, fused=None)
+        _resolve_operands(instr)
+        if result:
+            _fuse(result[-1], instr)
         result.append(instr)
     return result
+
+
+class LazyProgram:
+    """Read-only instruction sequence decoded from ``chunks`` on demand.
+
+    Instructions are decoded in order the first time an index past the
+    already decoded prefix is requested and are kept for later jumps, so a
+    program that stops early never pays for decoding its tail.
+    """
+
+    def __init__(self, chunks: List[int]) -> None:
+        self._chunks = chunks
+        self._pos = 0
+        self._decoded: List[DecodedInstruction] = []
+
+    def _decode_until(self, count: int | None) -> None:
+        chunks = self._chunks
+        decoded = self._decoded
+        while self._pos < len(chunks) and (count is None or len(decoded) < count):
+            instr, self._pos = _decode_at(chunks, self._pos)
+            _resolve_operands(instr)
+            if decoded:
+                _fuse(decoded[-1], instr)
+            decoded.append(instr)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            stop = idx.stop
+            if stop is None or stop < 0 or (idx.start or 0) < 0:
+                self._decode_until(None)
+            else:
+                self._decode_until(stop)
+            return self._decoded[idx]
+        if idx < 0:
+            self._decode_until(None)
+        elif idx >= len(self._decoded):
+            self._decode_until(idx + 1)
+        return self._decoded[idx]
+
+    def __len__(self) -> int:
+        self._decode_until(None)
+        return len(self._decoded)
+
+    def __iter__(self) -> Iterator[DecodedInstruction]:
+        idx = 0
+        while True:
+            try:
+                yield self[idx]
+            except IndexError:
+                return
+            idx += 1
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 from flask import Flask, jsonify, request
+import asyncio
 import os
 
 import assembler
 import decoder
 from vm import VM
 from uor import async_llm_client, ipfs_storage
+from uor.cache import InstructionCache
 
 WEB_DIR = os.path.join(os.path.dirname(__file__), 'web')
 
+# Decoded programs by CID. Content addressing makes entries immutable, so
+# they never need invalidating and responses may be cached forever.
+PROG_CACHE = InstructionCache(max_size=512)
+IMMUTABLE = {'Cache-Control': 'public, max-age=31536000, immutable'}
+
 
 def _load_page(name: str):
     path = os.path.join(WEB_DIR, name)
@@ -19,6 +26,11 @@ def _load_page(name: str):
     except OSError:
         return 'Not Found', 404
 
+
+def _run_program(program: list[int]) -> str:
+    return VM().run(decoder.decode(program))
+
+
 app = Flask(__name__)
 
 
@@ -43,7 +55,7 @@ def assemble_route():
 
 
 @app.post('/run')
-def run_route():
+async def run_route():
     data = request.get_json(force=True)
     if isinstance(data.get('text'), str):
         program = assembler.assemble(data['text'])
@@ -54,11 +66,24 @@ def run_route():
             return jsonify({'error': 'invalid chunks'}), 400
     else:
         return jsonify({'error': 'text or chunks required'}), 400
-    vm = VM()
-    output = ''.join(vm.execute(decoder.decode(program)))
+    output = await asyncio.to_thread(_run_program, program)
     return jsonify({'output': output})
 
 
+@app.get('/run/<cid>')
+async def run_cid_route(cid: str):
+    program = PROG_CACHE.get(cid)
+    if program is None:
+        try:
+            data = await ipfs_storage.async_get_data(cid)
+        except RuntimeError as exc:
+            return jsonify({'error': str(exc)}), 502
+        program = decoder.decode(assembler.unpack_chunks(data))
+        PROG_CACHE.put(cid, program)
+    output = await asyncio.to_thread(VM().run, program)
+    return jsonify({'output': output}), 200, IMMUTABLE
+
+
 @app.post('/generate')
 async def generate_route():
     data = request.get_json(force=True)
@@ -68,7 +93,7 @@ async def generate_route():
     provider = data.get('provider', 'openai')
     asm = await async_llm_client.async_call_model(provider, prompt)
     chunks_list = assembler.assemble(asm)
-    data_bytes = '\n'.join(str(x) for x in chunks_list).encode('utf-8')
+    data_bytes = assembler.pack_chunks(chunks_list)
     cid = await ipfs_storage.async_add_data(data_bytes)
     return jsonify({'cid': cid})
 
@@ -24,6 +24,42 @@ class CodeAnalyzerTest(unittest.TestCase):
         # check loop edge exists
         self.assertIn(3, analyzer.cfg.edges.get(4, set()))
 
+    def test_cfg_statement_order(self):
+        code = textwrap.dedent(
+            """
+            if a:
+                b = 1
+                if c:
+                    d = 2
+                else:
+                    e = 3
+            else:
+                f = 4
+            g = 5
+            """
+        )
+        edges = CodeAnalyzer(code).cfg.edges
+        # body before orelse, depth first
+        order = [2, 3, 4, 5, 7, 9, 10]
+        for line, nxt in zip(order, order[1:]):
+            self.assertEqual(edges[line], {nxt})
+
+    def test_cfg_csr_matches_edges(self):
+        code = textwrap.dedent(
+            """
+            x = 0
+            while x < 3:
+                x += 1
+                y = x
+            print(x)
+            """
+        )
+        cfg = CodeAnalyzer(code).cfg
+        self.assertEqual(list(cfg.lines), sorted(cfg.nodes))
+        for i, line in enumerate(cfg.lines):
+            succ = {int(cfg.lines[j]) for j in cfg.successors(i)}
+            self.assertEqual(succ, cfg.edges.get(int(line), set()))
+
     def test_llm_helpers(self):
         code = "a = 1"
         analyzer = CodeAnalyzer(code)
@@ -53,6 +89,21 @@ class CodeAnalyzerTest(unittest.TestCase):
         out = asyncio.run(gather())
         self.assertEqual(out, 'ok')
 
+    def test_stream_qa_batches_chunks(self):
+        analyzer = CodeAnalyzer('a = 1')
+        provider = mock.Mock()
+
+        async def stream(prompt):
+            for token in ['a', 'b', 'c', 'd', 'e']:
+                yield token
+        provider.stream = stream
+
+        async def gather():
+            return [chunk async for chunk in analyzer.stream_qa('q?', provider)]
+        self.assertEqual(asyncio.run(gather()), ['abcde'])
+        analyzer.STREAM_BATCH_SIZE = 2
+        self.assertEqual(asyncio.run(gather()), ['ab', 'cd', 'e'])
+
 
 if __name__ == '__main__':
     unittest.main()
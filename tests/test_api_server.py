@@ -112,6 +112,16 @@ class APIServerTest(unittest.TestCase):
             call.assert_called_with('openai', 'hi')
             add.assert_called()
 
+    def test_run_cid(self):
+        data = assembler.pack_chunks(assembler.assemble("PUSH 4\nPRINT"))
+        with mock.patch('uor.ipfs_storage.async_get_data', new=mock.AsyncMock(return_value=data)) as get:
+            server.PROG_CACHE.clear()
+            for _ in range(2):
+                body, status, headers = asyncio.run(server.run_cid_route('CID'))
+                self.assertEqual((body, status), ({'output': '4'}, 200))
+            get.assert_called_once_with('CID')
+            self.assertIn('immutable', headers['Cache-Control'])
+
 
 if __name__ == '__main__':
     unittest.main()
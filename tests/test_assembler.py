@@ -108,6 +108,83 @@ class AssemblerTest(unittest.TestCase):
         ]
         self.assertEqual(prog, expected)
 
+    def test_assemble_decoded_matches_decode(self):
+        src = """
+        PUSH 3
+        STORE 0
+        start:
+        LOAD 0
+        JZ end
+        LOAD 0
+        PRINT
+        LOAD 0
+        PUSH 1
+        SUB
+        STORE 0
+        JMP start
+        end:
+        BLOCK 4
+        PUSH 1
+        PUSH 2
+        ADD
+        PRINT
+        """
+        raw = assembler.assemble(src, decoded=True)
+        expected = decode(assembler.assemble(src))
+        self.assertEqual(raw, expected)
+        self.assertEqual([i.offset for i in raw], [i.offset for i in expected])
+        self.assertEqual(''.join(VM().execute(raw)), '3213')
+        with self.assertRaises(ValueError):
+            assembler.assemble("PUSH", decoded=True)
+        with self.assertRaises(ValueError):
+            assembler.assemble("BOGUS", decoded=True)
+
+    def test_assemble_decoded_printn(self):
+        src = "PUSH 1\nPUSH 2\nPRINTN 2"
+        raw = assembler.assemble(src, decoded=True)
+        self.assertEqual(raw, decode(assembler.assemble(src)))
+        self.assertEqual(''.join(VM().execute(raw)), '12')
+        with self.assertRaises(ValueError):
+            assembler.assemble("PRINTN", decoded=True)
+
+    def test_parse_uor_bytes(self):
+        prog = assembler.assemble("PUSH 2\nPRINT")
+        data = ('\n'.join(str(x) for x in prog) + '\n').encode('utf-8')
+        self.assertEqual(assembler.parse_uor_bytes(data), prog)
+        self.assertEqual(assembler.parse_uor_bytes(data.decode('utf-8')), prog)
+        self.assertEqual(assembler.parse_uor_bytes(b''), [])
+
+    def test_pack_chunks_roundtrip(self):
+        prog = assembler.assemble("PUSH 2\nPUSH 3\nADD\nPRINT")
+        packed = assembler.pack_chunks(prog)
+        self.assertTrue(packed.startswith(assembler.PACK_MAGIC))
+        self.assertEqual(assembler.unpack_chunks(packed), prog)
+        self.assertEqual(assembler.unpack_chunks(assembler.pack_chunks([])), [])
+        # decimal text from older uploads still loads
+        text = '\n'.join(str(x) for x in prog).encode('utf-8')
+        self.assertEqual(assembler.unpack_chunks(text), prog)
+        with self.assertRaises(ValueError):
+            assembler.unpack_chunks(packed[:-1])
+        with self.assertRaises(ValueError):
+            assembler.unpack_chunks(assembler.PACK_MAGIC + b"\x7f" + packed[5:])
+
+    def test_assemble_file_cached(self):
+        import os
+        import tempfile
+        from unittest import mock
+
+        with tempfile.TemporaryDirectory() as td:
+            src = os.path.join(td, 'prog.asm')
+            with open(src, 'w', encoding='utf-8') as fh:
+                fh.write("PUSH 2\nPUSH 3\nADD\nPRINT\n")
+            with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': td}):
+                first = assembler.assemble_file_cached(src)
+                self.assertEqual(first, assembler.assemble_file(src))
+                self.assertEqual(len(os.listdir(assembler.cache_dir())), 1)
+                with mock.patch.object(assembler, 'assemble') as asm:
+                    self.assertEqual(assembler.assemble_file_cached(src), first)
+                    asm.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,7 @@
 import importlib
 import sys
 import asyncio
+import time
 import unittest
 from unittest import mock
 
@@ -32,6 +33,25 @@ class AsyncIPFSStorageTest(unittest.TestCase):
         data = asyncio.run(self.mod.async_get_data('CID'))
         fake_client.cat.assert_called_with('CID')
         self.assertEqual(data, b'data')
+    def test_async_get_many_bounded(self):
+        active = []
+        peak = []
+        fake_client = mock.MagicMock()
+        fake_client.__enter__.return_value = fake_client
+
+        def cat(cid):
+            active.append(cid)
+            peak.append(len(active))
+            time.sleep(0.01)
+            active.remove(cid)
+            return cid.encode()
+
+        fake_client.cat.side_effect = cat
+        self.fake_module.connect.return_value = fake_client
+        cids = [f'CID{i}' for i in range(6)]
+        data = asyncio.run(self.mod.async_get_many(cids, concurrency=2))
+        self.assertEqual(data, [c.encode() for c in cids])
+        self.assertLessEqual(max(peak), 2)
 
 if __name__ == '__main__':
     unittest.main()
@@ -32,7 +32,7 @@ class AsyncLLMClientTest(unittest.TestCase):
             'google': types.ModuleType('google'),
             'google.generativeai': mock.MagicMock(),
         }
-        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'k'}):
+        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'k'}), mock.patch.dict(sys.modules, modules):
             mod = _load_module(modules)
             result = asyncio.run(mod.async_call_model('openai', 'hi'))
         self.assertEqual(result, 'ok')
@@ -50,11 +50,17 @@ class AsyncLLMClientTest(unittest.TestCase):
             'google': types.ModuleType('google'),
             'google.generativeai': mock.MagicMock(),
         }
-        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'k'}):
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'k'}), mock.patch.dict(sys.modules, modules):
             mod = _load_module(modules)
-            result = asyncio.run(mod.async_call_model('anthropic', 'hi'))
-        self.assertEqual(result, 'anthro')
-        client_inst.messages.create.assert_called()
+
+            async def twice():
+                return [await mod.async_call_model('anthropic', 'hi') for _ in range(2)]
+
+            results = asyncio.run(twice())
+        self.assertEqual(results, ['anthro', 'anthro'])
+        self.assertEqual(client_inst.messages.create.call_count, 2)
+        # one client, and so one connection pool, serves both calls
+        fake_anthropic.AsyncAnthropic.assert_called_once_with(api_key='k')
 
     def test_gemini(self):
         fake_google = types.ModuleType('google')
@@ -70,7 +76,7 @@ class AsyncLLMClientTest(unittest.TestCase):
             'google': fake_google,
             'google.generativeai': genai,
         }
-        with mock.patch.dict(os.environ, {'GOOGLE_API_KEY': 'k'}):
+        with mock.patch.dict(os.environ, {'GOOGLE_API_KEY': 'k'}), mock.patch.dict(sys.modules, modules):
             mod = _load_module(modules)
             result = asyncio.run(mod.async_call_model('gemini', 'hi'))
         self.assertEqual(result, 'gem')
@@ -43,6 +43,29 @@ class AsyncServerTest(unittest.TestCase):
             call.assert_called_with("openai", "hi")
             add.assert_called()
 
+    def test_generate_batches_concurrent_requests(self):
+        calls = []
+
+        async def fake_call(provider, prompt):
+            calls.append((provider, prompt))
+            return "PUSH 1\nPRINT" if prompt == "ok" else "BOGUS"
+
+        async def main():
+            reqs = [async_server.GenerateRequest(prompt=p) for p in ("ok", "ok", "bad")]
+            return await asyncio.gather(
+                *(async_server.generate_route(r) for r in reqs), return_exceptions=True
+            )
+
+        with (
+            mock.patch("uor.async_llm_client.async_call_model", new=fake_call),
+            mock.patch("uor.ipfs_storage.async_add_data", new=mock.AsyncMock(return_value="CID")),
+        ):
+            first, second, third = asyncio.run(main())
+        self.assertEqual(first, {"cid": "CID"})
+        self.assertEqual(second, {"cid": "CID"})
+        self.assertIsInstance(third, Exception)
+        self.assertEqual(sorted(calls), [("openai", "bad"), ("openai", "ok"), ("openai", "ok")])
+
 
 if __name__ == "__main__":
     unittest.main()
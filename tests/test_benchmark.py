@@ -2,6 +2,7 @@ import time
 import unittest
 
 import assembler
+import decoder
 from vm import VM
 from decoder import decode
 
@@ -19,6 +20,7 @@ class DecodeBenchTest(unittest.TestCase):
 
         start = time.time()
         for _ in range(runs):
+            decoder._decode_program.cache_clear()
             VM().execute(decode(prog))
         fresh_time = time.time() - start
 
@@ -30,6 +32,13 @@ class DecodeBenchTest(unittest.TestCase):
 
         self.assertLess(reused_time, fresh_time)
 
+    def test_decode_memoized_by_content(self):
+        prog = assembler.assemble("PUSH 1\nPRINT\n")
+        first = decode(prog)
+        second = decode(list(prog))
+        self.assertIsNot(first, second)
+        self.assertIs(first[0], second[0])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -16,5 +16,34 @@ class BlockOpcodeTest(unittest.TestCase):
         out = ''.join(VM().execute(decode(prog)))
         self.assertEqual(out, '3')
 
+    def test_block_reuses_pooled_vm(self):
+        src = """
+        BLOCK 4
+        PUSH 9
+        STORE 2
+        PUSH 4
+        PUSH 6
+        LOAD 2
+        PRINT
+        """
+        prog = decode(assembler.assemble(src))
+        VM._pool.clear()
+        self.assertEqual(''.join(VM().execute(prog)), '0')
+        self.assertEqual(len(VM._pool), 1)
+        child = VM._pool[0]
+        self.assertEqual(''.join(VM().execute(prog)), '0')
+        self.assertIs(VM._pool[0], child)
+        self.assertEqual(child.stack, [4, 6])
+
+    def test_subclass_gets_own_pool(self):
+        class TracingVM(VM):
+            pass
+
+        prog = decode(assembler.assemble("BLOCK 4\nPUSH 1\nPUSH 2\nADD\nPRINT"))
+        VM._pool.clear()
+        self.assertEqual(''.join(TracingVM().execute(prog)), '3')
+        self.assertEqual(VM._pool, [])
+        self.assertEqual([type(vm) for vm in TracingVM._pool], [TracingVM])
+
 if __name__ == '__main__':
     unittest.main()
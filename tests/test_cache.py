@@ -44,7 +44,9 @@ class InstructionCacheTest(unittest.TestCase):
 
     def test_time_saved_metric(self):
         cache = InstructionCache(max_size=2)
+        self.assertFalse(cache.track_timing)
         cache.put(1, 'a', decode_time=1.0)
+        self.assertTrue(cache.track_timing)
         cache.put(2, 'b', decode_time=0.5)
         self.assertEqual(cache.get(1), 'a')
         self.assertEqual(cache.get(2), 'b')
@@ -55,6 +57,61 @@ class InstructionCacheTest(unittest.TestCase):
         self.assertEqual(stats['size'], 2)
         self.assertEqual(stats['hit_rate'], 1.0)
         self.assertAlmostEqual(stats['avg_decode_time_saved'], 0.75)
+        # reading the counters must not change them
+        self.assertEqual(cache.get_stats(), stats)
+        cache.clear()
+        self.assertEqual(cache.get_stats()['hits'], 0)
+
+    def test_eviction_drops_decode_time(self):
+        cache = InstructionCache(max_size=1)
+        cache.put(1, 'a', decode_time=1.0)
+        cache.put(2, 'b')
+        self.assertIsNone(cache.get(1))
+        self.assertNotIn(1, cache._shards[0].decode_times)
+
+    def test_sharded_large_cache(self):
+        cache = InstructionCache(max_size=1000)
+        self.assertEqual(len(cache._shards), 16)
+        self.assertEqual(sum(s.max_size for s in cache._shards), 1000)
+        for i in range(5000):
+            cache.put(i, i)
+        self.assertEqual(cache.get_stats()['size'], 1000)
+        self.assertEqual(cache.get(4999), 4999)
+        self.assertIsNone(cache.get(0))
+        self.assertEqual(len(InstructionCache(max_size=256)._shards), 1)
+
+    def test_loader(self):
+        calls = []
+
+        def loader(key):
+            calls.append(key)
+            return key * 2
+
+        cache = InstructionCache(max_size=2, loader=loader)
+        self.assertEqual(cache.load(3), 6)
+        self.assertEqual(cache.load(3), 6)
+        self.assertEqual(calls, [3])
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+        cache.clear()
+        self.assertEqual(cache.get_stats()['size'], 0)
+        with self.assertRaises(TypeError):
+            InstructionCache().load(1)
+
+    def test_two_q_resists_scans(self):
+        def run(policy):
+            cache = InstructionCache(max_size=8, policy=policy)
+            for key in range(4):
+                cache.put(key, key)
+                cache.get(key)
+            for key in range(100, 200):
+                cache.put(key, key)
+            return [cache.get(key) for key in range(4)]
+
+        self.assertEqual(run('2q'), [0, 1, 2, 3])
+        self.assertEqual(run('lru'), [None] * 4)
+        with self.assertRaises(ValueError):
+            InstructionCache(policy='fifo')
 
 
 if __name__ == '__main__':
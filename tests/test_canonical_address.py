@@ -3,7 +3,7 @@ import sys
 import unittest
 from unittest import mock
 
-from uor.addressing import canonical_address, DHT
+from uor.addressing import canonical_address, DHT, _nearest_prime
 import primes
 
 class CanonicalAddressTest(unittest.TestCase):
@@ -24,6 +24,31 @@ class CanonicalAddressTest(unittest.TestCase):
         addr = canonical_address(data)
         self.assertTrue(primes.miller_rabin(addr))
 
+    def test_digest_selection(self):
+        from uor import addressing
+        with self.assertRaises(ValueError):
+            canonical_address(b'x', digest='md5')
+        with mock.patch.object(addressing, 'blake3', None):
+            with self.assertRaises(RuntimeError):
+                canonical_address(b'x', digest='blake3')
+        fake = mock.MagicMock()
+        fake.blake3.return_value.digest.return_value = b'\x01' * 64
+        with mock.patch.object(addressing, 'blake3', fake):
+            addr = canonical_address(b'x', digest='blake3')
+        fake.blake3.return_value.digest.assert_called_with(length=64)
+        self.assertTrue(primes.miller_rabin(addr))
+        self.assertGreaterEqual(addr, int.from_bytes(b'\x01' * 64, 'big'))
+
+    def test_nearest_prime_wheel(self):
+        expected = [next(p for p in range(n, n + 100) if primes.miller_rabin(p)) for n in range(0, 400)]
+        self.assertEqual([_nearest_prime(n) for n in range(0, 400)], expected)
+        self.assertEqual(_nearest_prime(30030), 30047)
+        big = 1 << 511
+        n = big + 1
+        while not primes.miller_rabin(n):
+            n += 2
+        self.assertEqual(_nearest_prime(big), n)
+
     def test_store_and_retrieve(self):
         dht = DHT(nodes=2, cache_size=2)
         # mock ipfs add/get
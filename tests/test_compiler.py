@@ -1,9 +1,27 @@
 import unittest
 
+from uor.compiler import lexer as lx
 from uor.compiler.lexer import Lexer
-from uor.compiler.parser import Parser, ProgramNode, VarDeclNode
+from uor.compiler.parser import (
+    BinaryOpChainNode,
+    BlockNode,
+    CallNode,
+    ExpressionStatement,
+    FunctionNode,
+    LiteralNode,
+    Parser,
+    ProgramNode,
+    ReturnNode,
+    VarDeclNode,
+    VariableNode,
+    walk,
+)
 from uor.compiler.codegen import CodeGenerator
 
+import assembler
+import decoder
+from vm import VM
+
 
 class LexerParserCodegenTest(unittest.TestCase):
     def test_lexer_basic(self):
@@ -16,18 +34,113 @@ class LexerParserCodegenTest(unittest.TestCase):
             ("NUMBER", "1"),
             (";", ";"),
         ])
+        self.assertEqual(tokens[3].numeric, 1)
+
+    def test_token_kinds(self):
+        kinds = [t.kind for t in Lexer("let x = 1 <= y;").tokenize()]
+        self.assertEqual(kinds, [lx.K_LET, lx.K_IDENTIFIER, lx.K_ASSIGN, lx.K_NUMBER, lx.K_LE, lx.K_IDENTIFIER, lx.K_SEMI])
+        self.assertEqual(lx.token_kind("OPERATOR", "<="), lx.K_LE)
+        with self.assertRaisesRegex(SyntaxError, "Expected IDENTIFIER"):
+            Parser.from_text("let = 1;").parse()
 
     def test_parser(self):
         ast = Parser.from_text("let x = 1;").parse()
         self.assertIsInstance(ast, ProgramNode)
         self.assertIsInstance(ast.body[0], VarDeclNode)
 
+    def test_walk_preorder(self):
+        ast = Parser.from_text("let x = 1 + y; x = -x;").parse()
+        names = [type(node).__name__ for node in walk(ast)]
+        self.assertEqual(names, [
+            "ProgramNode", "VarDeclNode", "BinaryOpNode", "LiteralNode", "VariableNode",
+            "ExpressionStatement", "AssignmentNode", "VariableNode", "UnaryOpNode", "VariableNode",
+        ])
+
+    def test_from_text_memoizes_parse(self):
+        Parser.clear_cache()
+        src = "let x = 1; x = x * 2;"
+        first = Parser.from_text(src).parse()
+        self.assertIs(Parser.from_text(src).parse(), first)
+        self.assertEqual(Parser(list(Lexer(src).tokenize())).parse(), first)
+        Parser.clear_cache()
+        self.assertIsNot(Parser.from_text(src).parse(), first)
+
     def test_codegen_nonempty(self):
         src = "let x = 1; x = x + 2;"
         ast = Parser.from_text(src).parse()
         program = CodeGenerator().generate(ast)
         self.assertTrue(program.instructions)
 
+    def test_expr_key_structural(self):
+        ast = Parser.from_text("let a = 1; let b = 2; let c = a * b; let d = a * b; let e = b * a;").parse()
+        gen = CodeGenerator()
+        first, second, swapped = (stmt.initializer for stmt in ast.body[2:])
+        self.assertEqual(gen._expr_key(first), gen._expr_key(second))
+        self.assertNotEqual(gen._expr_key(first), gen._expr_key(swapped))
+        text = gen.generate(ast).as_text()
+        # the repeated product is computed once and reloaded
+        self.assertEqual(text.count("MUL"), 2)
+
+    def test_constant_folding(self):
+        src = "let x = (2 + 3) * 4 - 10 / 3; let y = !(1 < 2) || 3 >= 3; let z = (2 + 3) * y;"
+        text = CodeGenerator().generate(Parser.from_text(src).parse()).as_text()
+        lines = text.splitlines()
+        self.assertEqual(lines[:4], ["PUSH 17", "STORE 1", "PUSH 1", "STORE 2"])
+        self.assertNotIn("JNZ", text)
+        self.assertIn("PUSH 5", lines)
+        self.assertEqual(text.count("MUL"), 1)
+
+    def test_peephole(self):
+        src = "let a = 1; let b = a * a; let c = -b;"
+        lines = CodeGenerator().generate(Parser.from_text(src).parse()).instructions
+        self.assertEqual(lines, [
+            "PUSH 1", "STORE 1",
+            # b is read once, so its STORE/LOAD pair and the temporary vanish
+            "LOAD 1", "LOAD 1", "MUL", "NEG", "STORE 4",
+        ])
+
+    def test_block_addresses_reused(self):
+        src = "let x = 0; { let a = 1; x = a + x; } { let b = 2; x = b + x; }"
+        gen = CodeGenerator()
+        lines = gen.generate(Parser.from_text(src).parse()).instructions
+        self.assertEqual(lines.count("STORE 2"), 2)
+        self.assertNotIn("STORE 3", lines)
+
+    def test_print_batches_arguments(self):
+        src = "let x = 4; print(x); print(7, x, 9);"
+        lines = CodeGenerator().generate(Parser.from_text(src).parse()).instructions
+        self.assertEqual(lines.count("PRINT"), 1)
+        self.assertEqual(lines[-1], "PRINTN 3")
+        program = decoder.decode(assembler.assemble("\n".join(lines)))
+        self.assertEqual(list(VM().execute(program)), ["4", "7", "4", "9"])
+
+    def test_print_keeps_order_of_nested_output(self):
+        # print(1, f()) where f prints 7 and returns 2
+        f = FunctionNode("f", [], BlockNode([
+            ExpressionStatement(CallNode(VariableNode("print"), [LiteralNode(7)])),
+            ReturnNode(LiteralNode(2)),
+        ]))
+        call = CallNode(VariableNode("print"), [LiteralNode(1), CallNode(VariableNode("f"), [])])
+        program = ProgramNode([f, ExpressionStatement(call)])
+        lines = CodeGenerator().generate(program).instructions
+        self.assertFalse(any(line.startswith("PRINTN") for line in lines))
+        program = decoder.decode(assembler.assemble("\n".join(lines)))
+        self.assertEqual(list(VM().execute(program)), ["1", "7", "2"])
+
+    def test_operator_chain_is_flat(self):
+        terms = " + ".join(f"x{i % 3}" for i in range(2000))
+        src = f"let x0 = 1; let x1 = 2; let x2 = 3; let y = {terms} * 2; print(y);"
+        decl = Parser.from_text(src).parse().body[-2]
+        self.assertIsInstance(decl.initializer, BinaryOpChainNode)
+        self.assertEqual(len(decl.initializer.operands), 2000)
+        self.assertEqual(decl.initializer.operands[-1].operator, "*")
+        lines = CodeGenerator().generate(Parser.from_text(src).parse()).instructions
+        self.assertEqual(lines.count("ADD"), 1999)
+        self.assertEqual(lines.count("MUL"), 1)
+        total = sum(i % 3 + 1 for i in range(1999)) + (1999 % 3 + 1) * 2
+        program = decoder.decode(assembler.assemble("\n".join(lines)))
+        self.assertEqual(list(VM().execute(program)), [str(total)])
+
 
 if __name__ == "__main__":
     unittest.main()
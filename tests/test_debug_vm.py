@@ -1,8 +1,10 @@
 import unittest
 
+import assembler
 import chunks
 from decoder import decode
 from uor.debug import DebugVM
+from vm import VM
 
 
 class DebugVMTest(unittest.TestCase):
@@ -37,6 +39,61 @@ class DebugVMTest(unittest.TestCase):
         self.assertGreater(len(out), 0)
         self.assertEqual(out[-1], '2')
 
+    def test_native_core_matches_python_loop(self):
+        prog = decode([
+            chunks.chunk_push(10),
+            chunks.chunk_store(0),
+            chunks.chunk_load(1),
+            chunks.chunk_load(0),
+            chunks.chunk_add(),
+            chunks.chunk_store(1),
+            chunks.chunk_load(0),
+            chunks.chunk_push(1),
+            chunks.chunk_sub(),
+            chunks.chunk_dup(),
+            chunks.chunk_store(0),
+            chunks.chunk_jnz(-10),
+            chunks.chunk_load(1),
+            chunks.chunk_print(),
+            chunks.chunk_push(0),
+            chunks.chunk_div(),
+        ])
+        results = []
+        for observed in (False, True):
+            vm = DebugVM()
+            if observed:
+                # any watchpoint keeps execution in the Python loop
+                vm.add_watchpoint(3)
+            out = []
+            with self.assertRaises(Exception) as ctx:
+                for item in vm.execute(prog):
+                    out.append(item)
+            results.append((out, type(ctx.exception), vm.stack, vm.mem.dump(), vm.executed_instructions))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][0], ['55'])
+
+    def test_tracing_enabled_mid_run(self):
+        prog = [chunks.chunk_push(1), chunks.chunk_print(), chunks.chunk_push(2), chunks.chunk_print()]
+        vm = DebugVM()
+        gen = vm.execute(decode(prog))
+        self.assertEqual(next(gen), '1')
+        vm.enable_tracing()
+        self.assertEqual(list(gen), ['TRACE:2', 'TRACE:3', '2'])
+
+    def test_block_reuses_pooled_debug_vm(self):
+        prog = decode(assembler.assemble("BLOCK 4\nPUSH 5\nPUSH 5\nPUSH 5\nPRINT"))
+        DebugVM._pool.clear()
+        self.assertEqual(''.join(DebugVM().execute(prog)), '5')
+        self.assertEqual(len(DebugVM._pool), 1)
+        child = DebugVM._pool[0]
+        self.assertIsInstance(child, DebugVM)
+        self.assertNotIn(child, VM._pool)
+        vm = DebugVM()
+        vm.enable_tracing()
+        out = list(vm.execute(prog))
+        self.assertEqual(out, ['TRACE:0', '5'])
+        self.assertIs(DebugVM._pool[0], child)
+
 
 if __name__ == '__main__':
     unittest.main()
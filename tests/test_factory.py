@@ -30,6 +30,27 @@ class AppFactoryTest(unittest.TestCase):
         tester.run.assert_called_with('code')
         add.assert_called()
 
+    def test_build_apps_runs_concurrently(self):
+        started = []
+
+        async def plan(goal):
+            started.append(goal)
+            await asyncio.sleep(0)
+            # both pipelines must be in flight before either finishes planning
+            self.assertEqual(len(started), 2)
+            return goal
+
+        factory = AppFactory()
+        factory.planner = mock.Mock(run=plan)
+        factory.coder = mock.Mock(run=mock.AsyncMock(side_effect=lambda p: p))
+        factory.tester = mock.Mock(run=mock.AsyncMock(side_effect=lambda c: c))
+
+        with mock.patch('assembler.assemble', return_value=[1]), \
+             mock.patch('uor.ipfs_storage.async_add_data', new=mock.AsyncMock(side_effect=['A', 'B'])):
+            cids = asyncio.run(factory.build_apps(['g1', 'g2']))
+
+        self.assertEqual(sorted(cids), ['A', 'B'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -33,6 +33,30 @@ class IPFSStorageTest(unittest.TestCase):
         fake_client.cat.assert_called_with('CID')
         self.assertEqual(data, b'data')
 
+    def test_add_many_reuses_connection(self):
+        fake_client = mock.MagicMock()
+        fake_client.__enter__.return_value = fake_client
+        fake_client.add_bytes.side_effect = ['CID1', 'CID2']
+        self.fake_module.connect.return_value = fake_client
+        self.assertEqual(self.mod.add_many([b'a', b'b']), ['CID1', 'CID2'])
+        fake_client.cat.return_value = b'a'
+        self.assertEqual(self.mod.get_data('CID1'), b'a')
+        self.fake_module.connect.assert_called_once_with()
+        fake_client.__exit__.assert_not_called()
+
+    def test_error_drops_connection(self):
+        fake_client = mock.MagicMock()
+        fake_client.__enter__.return_value = fake_client
+        fake_client.__exit__.return_value = False
+        fake_client.cat.side_effect = Exception('boom')
+        self.fake_module.connect.return_value = fake_client
+        with self.assertRaises(RuntimeError):
+            self.mod.get_data('CID')
+        fake_client.__exit__.assert_called_once()
+        with self.assertRaises(RuntimeError):
+            self.mod.get_data('CID')
+        self.assertEqual(self.fake_module.connect.call_count, 2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -14,3 +14,258 @@ def test_instruction_counter():
     assert vm._counter.get(1) == 1
     if not vm._jit.available:
         assert vm._compiled == {}
+
+
+def test_straight_line_block_matches_interpreter():
+    prog = decode([
+        chunks.chunk_push(7),
+        chunks.chunk_push(3),
+        chunks.chunk_sub(),
+        chunks.chunk_push(5),
+        chunks.chunk_mul(),
+        chunks.chunk_neg(),
+        chunks.chunk_print(),
+    ])
+    vm = VM()
+    vm._jit.available = True
+    vm.jit_threshold = 1
+    first = ''.join(vm.execute(prog))
+    assert 0 in vm._compiled
+    assert vm._compiled[0][0].size == 6
+    assert ''.join(vm.execute(prog)) == first == '-20'
+
+
+def test_numba_block_falls_back_on_big_ints():
+    from uor.jit.compiler import NUMBA_AVAILABLE
+    import pytest
+
+    if not NUMBA_AVAILABLE:
+        pytest.skip("numba not installed")
+    vm = VM()
+    block = vm._jit._compile_numba(decode([chunks.chunk_push(3), chunks.chunk_mul()]))
+    assert block is not None
+    vm.stack = [2 ** 70]
+    list(block(vm))
+    assert vm.stack == [3 * 2 ** 70]
+    assert vm.ip == 2
+    # INT64_MIN // -1 does not fit int64 either
+    vm = VM()
+    block = vm._jit._compile_numba(decode([chunks.chunk_div()]))
+    vm.stack = [-(1 << 63), -1]
+    list(block(vm))
+    assert vm.stack == [1 << 63]
+
+
+def test_llvm_block_matches_python_semantics():
+    from uor.jit.compiler import llvm
+    import pytest
+
+    if llvm is None:
+        pytest.skip("llvmlite not installed")
+    vm = VM()
+    block = vm._jit._compile_llvm(decode([
+        chunks.chunk_push(3),
+        chunks.chunk_div(),
+        chunks.chunk_push(3),
+        chunks.chunk_mod(),
+    ]))
+    assert block is not None
+    vm.stack = [-7]
+    list(block(vm))
+    assert vm.stack == [(-7 // 3) % 3]
+    assert vm.ip == 4
+    vm.stack = [2 ** 70]
+    vm.ip = 0
+    list(block(vm))
+    assert vm.stack == [(2 ** 70 // 3) % 3]
+
+
+def test_native_blocks_built_in_one_gcc_run(tmp_path):
+    import shutil
+    import subprocess
+    from unittest import mock
+    import pytest
+    from uor.jit.compiler import JITCompiler
+
+    vm = VM()
+    jit = vm._jit
+    if jit._backend != "gcc" or shutil.which("gcc") is None:
+        pytest.skip("gcc not available")
+    jit.cache_dir = str(tmp_path)
+    jit.flush_threshold = 3
+    jit.flush_delay = 60.0
+    with mock.patch("uor.jit.compiler.subprocess.run", wraps=subprocess.run) as run:
+        blocks = [
+            jit._compile_native(decode([chunks.chunk_push(k), chunks.chunk_push(2), chunks.chunk_mul()]))
+            for k in (3, 4, 5)
+        ]
+        jit.flush()
+        assert run.call_count == 1
+    results = []
+    for block in blocks:
+        vm.stack = []
+        vm.ip = 0
+        list(block(vm))
+        results.append(vm.stack)
+    assert results == [[6], [8], [10]]
+    # a fresh compiler loads the built blocks from the disk cache
+    fresh = JITCompiler(cache_dir=str(tmp_path))
+    with mock.patch("uor.jit.compiler.subprocess.run") as run:
+        block = fresh._compile_native(decode([chunks.chunk_push(4), chunks.chunk_push(2), chunks.chunk_mul()]))
+        assert not fresh._pending
+        run.assert_not_called()
+    vm.stack = []
+    list(block(vm))
+    assert vm.stack == [8]
+
+
+def test_native_block_touches_only_stack_top(tmp_path):
+    import shutil
+    import pytest
+    from uor.jit.compiler import JITCompiler
+
+    jit = JITCompiler(cache_dir=str(tmp_path))
+    if jit._backend != "gcc" or shutil.which("gcc") is None:
+        pytest.skip("gcc not available")
+    block = jit._compile_native(decode([chunks.chunk_push(3), chunks.chunk_add()]))
+    jit.flush()
+    vm = VM()
+    vm.stack = [2 ** 70, 'x', 4]
+    list(block(vm))
+    assert vm.stack == [2 ** 70, 'x', 7]
+    buf = vm._jit_buf
+    # values beyond int64 run through the handlers instead
+    vm.stack = [2 ** 70]
+    vm.ip = 0
+    list(block(vm))
+    assert vm.stack == [2 ** 70 + 3]
+    vm.stack = [1]
+    vm.ip = 0
+    list(block(vm))
+    assert vm.stack == [4]
+    assert vm._jit_buf is buf
+
+
+def test_native_block_folds_constants(tmp_path):
+    import shutil
+    import pytest
+    from chunks import OP_ADD, OP_DIV, OP_MUL, OP_PUSH
+    from uor.jit.compiler import JITCompiler, _fold_constants
+
+    ops = [(OP_PUSH, 3), (OP_PUSH, 4), (OP_MUL, 0), (OP_ADD, 0), (OP_PUSH, -7), (OP_PUSH, 2), (OP_DIV, 0)]
+    # folded DIV/MOD floor like the interpreter
+    assert _fold_constants(ops) == [(OP_ADD, 12), (OP_PUSH, -4)]
+    # a zero divisor is left for the block to bail out on
+    assert _fold_constants([(OP_PUSH, 0), (OP_DIV, 0)]) == [(OP_PUSH, 0), (OP_DIV, None)]
+    jit = JITCompiler(cache_dir=str(tmp_path))
+    if jit._backend != "gcc" or shutil.which("gcc") is None:
+        pytest.skip("gcc not available")
+    block = jit._compile_native(decode([
+        chunks.chunk_push(3),
+        chunks.chunk_push(4),
+        chunks.chunk_mul(),
+        chunks.chunk_add(),
+    ]))
+    jit.flush()
+    vm = VM()
+    vm.stack = [5]
+    list(block(vm))
+    assert vm.stack == [17]
+
+
+def test_native_division_floors_and_bails(tmp_path):
+    import shutil
+    import pytest
+    from uor.exceptions import DivisionByZeroError
+    from uor.jit.compiler import JITCompiler
+
+    jit = JITCompiler(cache_dir=str(tmp_path))
+    if jit._backend != "gcc" or shutil.which("gcc") is None:
+        pytest.skip("gcc not available")
+    by_stack = jit._compile_native(decode([chunks.chunk_div()]))
+    by_const = jit._compile_native(decode([chunks.chunk_push(2), chunks.chunk_mod()]))
+    jit.flush()
+    for block, stack, expected in [
+        (by_stack, [-7, 2], [-4]),
+        (by_stack, [7, -2], [-4]),
+        (by_stack, [-(1 << 63), -1], [1 << 63]),
+        (by_const, [-7], [1]),
+    ]:
+        vm = VM()
+        vm.stack = list(stack)
+        list(block(vm))
+        assert vm.stack == expected
+    # a zero divisor replays the block through the handlers
+    vm = VM()
+    vm.stack = [5, 0]
+    with pytest.raises(DivisionByZeroError):
+        list(by_stack(vm))
+
+
+def test_native_arithmetic_bails_on_overflow(tmp_path):
+    import shutil
+    import pytest
+    from uor.jit.compiler import JITCompiler
+
+    jit = JITCompiler(cache_dir=str(tmp_path))
+    if jit._backend != "gcc" or shutil.which("gcc") is None:
+        pytest.skip("gcc not available")
+    blocks = {
+        op: jit._compile_native(decode([chunk()]))
+        for op, chunk in [("add", chunks.chunk_add), ("sub", chunks.chunk_sub), ("mul", chunks.chunk_mul), ("neg", chunks.chunk_neg)]
+    }
+    by_const = jit._compile_native(decode([chunks.chunk_push(300), chunks.chunk_mul()]))
+    jit.flush()
+    big = (1 << 63) - 1
+    for block, stack, expected in [
+        (blocks["add"], [big, 1], [1 << 63]),
+        (blocks["sub"], [-big, 2], [-big - 2]),
+        (blocks["mul"], [1 << 40, 1 << 40], [1 << 80]),
+        (blocks["mul"], [6, -7], [-42]),
+        (blocks["neg"], [-(1 << 63)], [1 << 63]),
+        (by_const, [300 ** 8], [300 ** 9]),
+    ]:
+        vm = VM()
+        vm.stack = list(stack)
+        list(block(vm))
+        assert vm.stack == expected
+
+
+def test_short_blocks_skip_native_tiers():
+    from unittest import mock
+    from uor.jit.compiler import JITCompiler
+
+    jit = JITCompiler(cache_dir=None)
+    jit.ttl = -1.0
+    short = decode([chunks.chunk_push(3), chunks.chunk_push(4), chunks.chunk_add()])
+    with mock.patch.object(jit, "_compile_llvm", return_value=None) as llvm:
+        block = jit.compile_block(short)
+        llvm.assert_not_called()
+        jit.min_native_len = 3
+        jit.compile_block(short)
+        llvm.assert_called_once()
+    vm = VM()
+    list(block(vm))
+    assert vm.stack == [7]
+
+
+def test_native_build_runs_in_background(tmp_path):
+    import shutil
+    import pytest
+    from uor.jit.compiler import JITCompiler
+
+    jit = JITCompiler(cache_dir=str(tmp_path))
+    if jit._backend != "gcc" or shutil.which("gcc") is None:
+        pytest.skip("gcc not available")
+    jit.flush_delay = 0.0
+    block = jit._compile_native(decode([chunks.chunk_push(3), chunks.chunk_add()]))
+    vm = VM()
+    vm.stack = [1]
+    # the first call starts the build and runs through the handlers
+    list(block(vm))
+    assert vm.stack == [4]
+    assert vm._jit_buf is None
+    jit.flush()
+    list(block(vm))
+    assert vm.stack == [7]
+    assert vm._jit_buf is not None
@@ -18,3 +18,29 @@ def test_jit_cache_ttl():
     assert second is not first
     assert vm._jit.blocks_compiled >= 2
 
+
+
+def test_jit_cache_shared_across_vms():
+    code = [chunks.chunk_push(3), chunks.chunk_push(4), chunks.chunk_add(), chunks.chunk_print()]
+    vms = []
+    for _ in range(2):
+        vm = VM()
+        vm.jit_threshold = 1
+        # each VM decodes its own copy of the program
+        assert ''.join(vm.execute(decode(code))) == '7'
+        vms.append(vm)
+    assert vms[1]._jit.cache_hits >= 1
+    assert vms[1]._compiled[0][0] is vms[0]._compiled[0][0]
+
+
+def test_block_key_tracks_branch_offsets():
+    from dataclasses import replace
+
+    from uor.jit.compiler import _block_key
+
+    prog = decode([chunks.chunk_push(1), chunks.chunk_jmp(0)])
+    key = _block_key(prog)
+    assert prog[1].data_key is not None
+    assert _block_key(decode([chunks.chunk_push(1), chunks.chunk_jmp(0)])) == key
+    jmp = replace(prog[1], offset=prog[1].offset + 1)
+    assert _block_key([prog[0], jmp]) != key
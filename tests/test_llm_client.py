@@ -7,6 +7,9 @@ from unittest import mock
 
 
 def _load_module(modules: dict[str, object]):
+    from uor.llm import providers
+
+    providers._cache.clear()
     with mock.patch.dict(sys.modules, modules):
         sys.modules.pop('uor.llm_client', None)
         import uor.llm_client as lc
@@ -20,7 +23,7 @@ class LLMClientTest(unittest.TestCase):
         fake_openai.ChatCompletion = chat
         resp = mock.MagicMock()
         resp.choices = [mock.MagicMock(message=mock.MagicMock(content='ok'))]
-        chat.create.return_value = resp
+        chat.acreate = mock.AsyncMock(return_value=resp)
 
         modules = {
             'openai': fake_openai,
@@ -28,18 +31,20 @@ class LLMClientTest(unittest.TestCase):
             'google': types.ModuleType('google'),
             'google.generativeai': mock.MagicMock(),
         }
-        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'k'}):
+        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'k'}), mock.patch.dict(sys.modules, modules):
             mod = _load_module(modules)
             result = mod.call_model('openai', 'hi')
+            # repeated prompts are answered from the provider cache
+            self.assertEqual(mod.call_model('openai', 'hi'), 'ok')
         self.assertEqual(result, 'ok')
-        chat.create.assert_called()
+        chat.acreate.assert_called_once()
 
     def test_anthropic(self):
         fake_anthropic = types.ModuleType('anthropic')
         client_inst = mock.MagicMock()
-        fake_anthropic.Anthropic = mock.MagicMock(return_value=client_inst)
+        fake_anthropic.AsyncAnthropic = mock.MagicMock(return_value=client_inst)
         resp = mock.MagicMock(content='anthro')
-        client_inst.messages.create.return_value = resp
+        client_inst.messages.create = mock.AsyncMock(return_value=resp)
 
         modules = {
             'openai': types.ModuleType('openai'),
@@ -47,7 +52,7 @@ class LLMClientTest(unittest.TestCase):
             'google': types.ModuleType('google'),
             'google.generativeai': mock.MagicMock(),
         }
-        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'k'}):
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'k'}), mock.patch.dict(sys.modules, modules):
             mod = _load_module(modules)
             result = mod.call_model('anthropic', 'hi')
         self.assertEqual(result, 'anthro')
@@ -67,7 +72,7 @@ class LLMClientTest(unittest.TestCase):
             'google': fake_google,
             'google.generativeai': genai,
         }
-        with mock.patch.dict(os.environ, {'GOOGLE_API_KEY': 'k'}):
+        with mock.patch.dict(os.environ, {'GOOGLE_API_KEY': 'k'}), mock.patch.dict(sys.modules, modules):
             mod = _load_module(modules)
             result = mod.call_model('gemini', 'hi')
         self.assertEqual(result, 'gem')
@@ -84,6 +89,13 @@ class LLMClientTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             mod.call_model('foo', 'hi')
 
+    def test_missing_sdk(self):
+        mod = _load_module({})
+        # ``None`` in sys.modules makes the import fail as if uninstalled
+        with mock.patch.dict(sys.modules, {'anthropic': None}):
+            with self.assertRaises(mod.MissingDependencyError):
+                mod.call_model('anthropic', 'hi')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,7 @@ import unittest
 from unittest import mock
 
 from uor.llm import templates
+from uor.llm import providers
 from uor.llm.providers import LLMProvider
 
 
@@ -24,6 +25,66 @@ class LLMIntegrationTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             templates._validate_template({"prompt": "x", "examples": ["bad"]})
 
+    def test_response_cache_bounded(self):
+        cache = providers._ResponseCache(2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        self.assertEqual(cache.get("a"), "1")
+        cache.put("c", "3")
+        # "b" was least recently used
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+        expiring = providers._ResponseCache(2, ttl=60)
+        expiring.put("a", "1")
+        with mock.patch("uor.llm.providers.time.monotonic", return_value=10 ** 9):
+            self.assertIsNone(expiring.get("a"))
+
+    def test_provider_uses_response_cache(self):
+        prov = DummyProvider()
+        with mock.patch.object(providers, "_cache", providers._ResponseCache(8)):
+            with mock.patch.object(DummyProvider, "_send_request", wraps=prov._send_request) as send:
+                asyncio.run(prov.generate_code("x"))
+                asyncio.run(prov.generate_code("x"))
+            self.assertEqual(send.call_count, 1)
+
+    def test_cache_key_digest(self):
+        prov = DummyProvider()
+        with mock.patch.object(providers, "blake3", None):
+            key = prov._cache_key("x", "generate")
+            # fields are separated, so shifting text between them changes the key
+            self.assertNotEqual(key, prov._cache_key("", "generatex"))
+        fake = mock.MagicMock()
+        fake.blake3.return_value.hexdigest.return_value = "ab"
+        with mock.patch.object(providers, "blake3", fake):
+            self.assertEqual(prov._cache_key("x", "generate"), "ab")
+
+    def test_concurrent_duplicates_share_one_request(self):
+        calls = []
+
+        class SlowProvider(LLMProvider):
+            async def _send_request(self, prompt: str) -> str:
+                calls.append(prompt)
+                await asyncio.sleep(0.01)
+                return prompt.upper()
+
+        async def run():
+            prov = SlowProvider()
+            texts = await asyncio.gather(*[prov.generate_code("dup") for _ in range(4)])
+
+            async def collect():
+                return [chunk async for chunk in prov.stream("dup")]
+
+            chunks = await asyncio.gather(collect(), collect())
+            return texts, chunks, prov.total_cost
+
+        with mock.patch.object(providers, "_cache", providers._ResponseCache(8)):
+            texts, chunks, _ = asyncio.run(run())
+        self.assertEqual(texts, ["DUP"] * 4)
+        self.assertEqual(chunks, [["DUP"], ["DUP"]])
+        self.assertEqual(calls, ["dup", "dup"])
+        self.assertEqual(providers._inflight, {})
+        self.assertEqual(providers._inflight_streams, {})
+
 
 if __name__ == "__main__":
     unittest.main()
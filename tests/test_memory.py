@@ -1,6 +1,6 @@
 import unittest
 
-from uor.memory import SegmentedMemory
+from uor.memory import MemorySegment, SegmentedMemory
 from vm import VM
 
 
@@ -12,6 +12,17 @@ class SegmentedMemoryTest(unittest.TestCase):
         with self.assertRaises(MemoryError):
             mem.load(SegmentedMemory.STACK_START + SegmentedMemory.STACK_SIZE + 10)
 
+    def test_segment_edges(self):
+        mem = SegmentedMemory()
+        mem.store(mem.HEAP_START - 1, 1)
+        mem.store(mem.HEAP_START, 2)
+        mem.store(mem.MMIO_IN - 1, 3)
+        self.assertEqual(mem.segments[MemorySegment.DATA], {mem.HEAP_START - 1: 1})
+        self.assertEqual(mem.segments[MemorySegment.HEAP], {mem.HEAP_START: 2})
+        self.assertEqual(mem.segments[MemorySegment.STACK], {mem.MMIO_IN - 1: 3})
+        with self.assertRaises(MemoryError):
+            mem.load(mem.CODE_START - 1)
+
     def test_permission_enforcement(self):
         mem = SegmentedMemory()
         mem.load_code([1])
@@ -22,6 +33,37 @@ class SegmentedMemoryTest(unittest.TestCase):
         with self.assertRaises(MemoryError):
             mem.store(mem.MMIO_IN, 1)
 
+    def test_values_beyond_int64(self):
+        mem = SegmentedMemory()
+        mem.store(1, 2 ** 70)
+        mem.store(2, "x")
+        mem.store(mem.HEAP_START, -1)
+        self.assertEqual(mem.load(1), 2 ** 70)
+        self.assertEqual(mem.load(2), "x")
+        dump = mem.dump()
+        self.assertEqual(dump, {1: 2 ** 70, 2: "x", mem.HEAP_START: -1})
+        mem.store(1, 5)
+        self.assertEqual(mem.load(1), 5)
+        other = SegmentedMemory()
+        other.load_dump(dump)
+        self.assertEqual(other.dump(), dump)
+        self.assertEqual(len(other), 3)
+
+    def test_allocation_is_zeroed(self):
+        mem = SegmentedMemory()
+        addr = mem.allocate(4)
+        mem.store(addr + 1, 2 ** 70)
+        mem.store(addr + 2, 7)
+        mem.free(addr)
+        addr = mem.allocate(4)
+        self.assertEqual([mem.load(addr + i) for i in range(4)], [0, 0, 0, 0])
+
+    def test_stray_store_into_free_page_is_cleared(self):
+        mem = SegmentedMemory()
+        mem.store(mem.HEAP_START + mem.PAGE_SIZE + 3, 9)
+        addr = mem.allocate(2 * mem.PAGE_SIZE)
+        self.assertEqual(mem.load(addr + mem.PAGE_SIZE + 3), 0)
+
     def test_allocate_helpers(self):
         mem = SegmentedMemory()
         sp = mem.stack_pointer
@@ -51,7 +93,26 @@ class SegmentedMemoryTest(unittest.TestCase):
         vm.call_stack = []
         mem.collect(vm)
         self.assertIn(a1, mem._allocations)
-        self.assertNotIn(a2, mem._allocations)
+        self.assertTrue(mem._dead[mem._page_for(a2)])
+        # the next allocation sweeps the dead block and reuses its pages
+        self.assertEqual(mem.allocate(10), a2)
+        self.assertFalse(mem._dead[mem._page_for(a2)])
+
+    def test_gc_interior_pointers(self):
+        mem = SegmentedMemory()
+        blocks = [mem.allocate(10) for _ in range(4)]
+        # pointers into the middle of an allocation's pages keep it alive
+        mem.store(blocks[0] + 1, blocks[2] + mem.PAGE_SIZE - 1)
+        class Dummy:
+            pass
+        vm = Dummy()
+        vm.stack = [blocks[0] + 5]
+        vm.call_stack = []
+        mem.collect(vm)
+        mem.sweep()
+        self.assertEqual(sorted(mem._allocations), [blocks[0], blocks[2]])
+        self.assertIsNone(mem._alloc_for_addr(blocks[1]))
+        self.assertEqual(mem._alloc_for_addr(blocks[2] + 20), blocks[2])
 
     def test_memory_mapped_io(self):
         vm = VM()
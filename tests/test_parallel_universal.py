@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from uor.parallel_universal import (
+    _haar_cpu,
+    _haar_np,
+    discrete_wavelet_transform,
+    fast_prime_factorization,
+    fast_prime_factorization_batch,
+)
+
+
+class ParallelUniversalTest(unittest.TestCase):
+    def test_fast_prime_factorization(self):
+        self.assertEqual(fast_prime_factorization(360), {2: 3, 3: 2, 5: 1})
+        self.assertEqual(fast_prime_factorization(49 * 121 * 997), {7: 2, 11: 2, 997: 1})
+        self.assertEqual(fast_prime_factorization(1), {})
+        self.assertEqual(fast_prime_factorization(0), {})
+
+    def test_fast_prime_factorization_is_cached(self):
+        first = fast_prime_factorization(2 * 3 * 1009)
+        self.assertIs(fast_prime_factorization(2 * 3 * 1009), first)
+        with self.assertRaises(TypeError):
+            first[2] = 5
+
+    def test_batch_matches_single(self):
+        values = np.array([0, 1, 97, 360, 2 * 3 * 5 * 7 * 11 * 13 * 17 * 19 * 23 * 29 * 31 * 37 * 41 * 43 * 47])
+        self.assertEqual(
+            fast_prime_factorization_batch(values),
+            [dict(fast_prime_factorization(int(v))) for v in values],
+        )
+
+    def test_haar_numpy_matches_loop(self):
+        signal = np.arange(1.0, 17.0) ** 1.5
+        self.assertTrue(np.array_equal(_haar_np(signal), _haar_cpu(signal)))
+
+    def test_discrete_wavelet_transform(self):
+        self.assertEqual(discrete_wavelet_transform([1.0, 3.0, 4.0, 8.0]), [2.0, 6.0, -1.0, -2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,18 @@ class PromptTemplateTest(unittest.TestCase):
         self.assertIn("Input: Alice", text)
         self.assertIn("Output: Hi Alice", text)
 
+    def test_render_matches_str_format(self):
+        for text in ("{a} and {{b}} {c}", "{a:>4}|{c!r}", "plain"):
+            tmpl = PromptTemplate(text)
+            self.assertEqual(tmpl.render(a=1, c="x"), text.format(a=1, c="x"))
+        tmpl = PromptTemplate("{a}")
+        self.assertEqual(tmpl.render(a=1), "1")
+        # the cached examples block is rebuilt after add_example
+        tmpl.add_example("in", "out")
+        self.assertEqual(tmpl.render(a=2), "2\n\nExamples:\nInput: in\nOutput: out")
+        with self.assertRaises(KeyError):
+            tmpl.render()
+
 
 class LoaderTest(unittest.TestCase):
     def test_load_yaml_template(self):
@@ -25,6 +37,12 @@ class LoaderTest(unittest.TestCase):
         self.assertIn("read", result)
         self.assertIn("Python", result)
 
+    def test_missing_template(self):
+        with self.assertRaises(FileNotFoundError):
+            load_template("no_such_template")
+        with self.assertRaises(FileNotFoundError):
+            load_template("no_such_template.json")
+
 
 if __name__ == "__main__":
     unittest.main()
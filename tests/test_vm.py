@@ -1,8 +1,9 @@
 import unittest
+from unittest import mock
 
 import chunks
-from vm import VM
-from decoder import decode, DecodedInstruction
+from vm import VM, _TWIDDLE_CACHE, ntt_roundtrip, specialize
+from decoder import decode, link, DecodedInstruction
 from uor.memory import SegmentedMemory
 from uor.exceptions import (
     DivisionByZeroError,
@@ -86,6 +87,106 @@ class VMTest(unittest.TestCase):
             list(VM().execute(decode(prog)))
         self.assertEqual(cm.exception.ip, -1)
 
+    def test_execute_raw_matches_execute(self):
+        prog = [chunks.chunk_push(2), chunks.chunk_push(3), chunks.chunk_add(), chunks.chunk_print()]
+        self.assertEqual(''.join(VM().execute_raw(prog)), ''.join(VM().execute(decode(prog))))
+
+    def test_execute_raw_decodes_lazily(self):
+        prog = [chunks.chunk_add(), 7]
+        with self.assertRaises(StackUnderflowError) as cm:
+            list(VM().execute_raw(prog))
+        self.assertEqual(cm.exception.ip, 0)
+        with self.assertRaises(ValueError):
+            decode(prog)
+
+    def test_superinstruction_pair(self):
+        prog = decode([chunks.chunk_push(2), chunks.chunk_add()])
+        self.assertIsNotNone(prog[0].fused)
+        self.assertIsNone(prog[1].fused)
+        vm = VM()
+        with self.assertRaises(StackUnderflowError) as cm:
+            list(vm.execute(prog))
+        self.assertEqual(cm.exception.ip, 1)
+        vm = VM()
+        vm.stack.append(5)
+        list(vm.execute(prog))
+        self.assertEqual(vm.stack, [7])
+        self.assertEqual(vm.executed_instructions, 2)
+
+    def test_link_copies_decoded_instructions(self):
+        head = [chunks.chunk_push(1)]
+        tail = [chunks.chunk_push(5), chunks.chunk_jmp(1), chunks.chunk_push(9), chunks.chunk_print()]
+        before = decode(tail)
+        linked = link(decode(head) + decode(tail))
+        self.assertIsNotNone(linked[0].fused)
+        self.assertIsNone(decode(head)[0].fused)
+        self.assertEqual(decode(tail), before)
+        self.assertEqual([i.offset for i in decode(tail)], [None, 1, None, None])
+        self.assertEqual(''.join(VM().execute(decode(tail))), '5')
+        self.assertEqual(''.join(VM().execute(linked)), '5')
+
+    def test_superinstruction_pair_split_by_slicing(self):
+        head = decode([chunks.chunk_push(2), chunks.chunk_push(9)])[:1]
+        self.assertIsNotNone(head[0].fused)
+        self.assertEqual(''.join(VM().execute(head + decode([chunks.chunk_print()]))), '2')
+
+    def test_branch_offsets_resolved_at_decode(self):
+        prog = decode([chunks.chunk_jmp(1), chunks.chunk_push(1), chunks.chunk_push(2), chunks.chunk_print()])
+        self.assertEqual(prog[0].offset, 1)
+        self.assertIsNone(prog[1].offset)
+        self.assertEqual(''.join(VM().execute(prog)), '2')
+        # instructions built by hand fall back to the relative offset
+        prog[0] = DecodedInstruction(data=prog[0].data)
+        self.assertEqual(''.join(VM().execute(prog)), '2')
+
+    def test_branches_survive_concatenation(self):
+        head = decode([chunks.chunk_push(1), chunks.chunk_print()])
+        tail = decode([chunks.chunk_jmp(1), chunks.chunk_push(9), chunks.chunk_push(5), chunks.chunk_print()])
+        self.assertEqual(''.join(VM().execute(head + tail)), '15')
+
+    def test_run_collects_handler_output(self):
+        prog = decode([chunks.chunk_push(3), chunks.chunk_print(), chunks.chunk_push(4), chunks.chunk_print()])
+        vm = VM()
+        self.assertEqual(vm.run(prog), '34')
+        self.assertEqual(vm._out, [])
+
+    def test_specialize_matches_interpreter(self):
+        prog = decode([chunks.chunk_push(3), chunks.chunk_push(4), chunks.chunk_mul(),
+                       chunks.chunk_print(), chunks.chunk_push(2), chunks.chunk_store(1),
+                       chunks.chunk_load(1), chunks.chunk_print()])
+        run = specialize(prog)
+        self.assertIs(specialize(list(prog)).func, run.func)
+        vm = VM()
+        self.assertEqual(run(vm), VM().run(prog))
+        self.assertEqual((vm.ip, vm.executed_instructions), (8, 8))
+        failing = decode([chunks.chunk_push(1), chunks.chunk_push(2), chunks.chunk_print(), chunks.chunk_add()])
+        vm, interp = VM(), VM()
+        with self.assertRaises(StackUnderflowError) as cm:
+            specialize(failing)(vm)
+        self.assertEqual(cm.exception.ip, 3)
+        with self.assertRaises(StackUnderflowError):
+            interp.run(failing)
+        self.assertEqual(vm.executed_instructions, interp.executed_instructions)
+        self.assertEqual(vm.executed_instructions, 3)
+        # branches are not unrolled but still run
+        loop = decode([chunks.chunk_jmp(1), chunks.chunk_push(1), chunks.chunk_push(2), chunks.chunk_print()])
+        self.assertEqual(specialize(loop)(VM()), '2')
+
+    def test_ntt_roundtrip(self):
+        # lengths dividing T_MOD - 1 admit a true transform and invert exactly
+        for n in (1, 2, 3, 4, 6, 12):
+            vec = [(5 * k + 1) % chunks.T_MOD for k in range(n)]
+            self.assertEqual(ntt_roundtrip(vec), vec)
+        # the NumPy path agrees with the pure Python loop
+        vec = list(range(-5, 35))
+        with mock.patch('vm.np', None):
+            expected = ntt_roundtrip(vec)
+        self.assertEqual(ntt_roundtrip(vec), expected)
+        # power-of-two tables are built at import and reused
+        tables = _TWIDDLE_CACHE[16]
+        ntt_roundtrip(list(range(16)))
+        self.assertIs(_TWIDDLE_CACHE[16], tables)
+
 
 if __name__ == '__main__':
     unittest.main()
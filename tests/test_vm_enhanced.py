@@ -1,5 +1,4 @@
 import unittest
-from unittest import mock
 
 import chunks
 from decoder import decode
@@ -36,12 +35,11 @@ class VMEnhancedTest(unittest.TestCase):
         vm = VM()
         vm.jit_threshold = 1
         vm._jit.available = True
-        with mock.patch.object(vm._jit, 'compile_block', wraps=vm._jit._compile_py) as comp:
-            prog = decode([chunks.chunk_push(1), chunks.chunk_print()])
-            ''.join(vm.execute(prog))
-            self.assertTrue(comp.called)
-            out = ''.join(vm.execute(prog))
-            self.assertEqual(out, '1')
+        prog = decode([chunks.chunk_push(1), chunks.chunk_print()])
+        ''.join(vm.execute(prog))
+        self.assertGreaterEqual(vm._jit.compile_calls, 1)
+        out = ''.join(vm.execute(prog))
+        self.assertEqual(out, '1')
 
     def test_comparison_and_not_ops(self):
         prog = [
@@ -8,7 +8,7 @@ from typing import List, Tuple
 import primes
 import chunks
 from vm import VM
-from decoder import decode
+from decoder import decode, link
 
 # Opcode aliases for backwards compatibility
 OP_PUSH = chunks.OP_PUSH
@@ -41,7 +41,7 @@ chunk_ntt = chunks.chunk_ntt
 
 def vm_execute(prog: List[int]):
     """Execute program using the built-in VM."""
-    return VM().execute(decode(prog))
+    return VM().execute_raw(prog)
 
 
 # ──────────────────────────────────────────────────────────────────────
@@ -66,28 +66,29 @@ def _self_tests() -> Tuple[int, int]:
     prog = [chunk_ntt(3)] + seq
     ok("".join(VM().execute(decode(prog))) == "XYZ", "ntt roundtrip")
 
-    prog_mem = [
-        chunk_push(10),
-        chunk_store(0),
-        chunk_load(0),
-        chunk_print(),
-    ]
-    ok("".join(VM().execute(decode(prog_mem))) == "10", "memory")
-
-    prog_loop = [
-        chunk_push(3),
-        chunk_store(0),
-        chunk_load(0),
-        chunk_jz(7),
-        chunk_load(0),
-        chunk_print(),
-        chunk_load(0),
-        chunk_push(1),
-        chunk_sub(),
-        chunk_store(0),
-        chunk_jmp(-9),
-    ]
-    ok("".join(VM().execute(decode(prog_loop))) == "321", "loop")
+    # programs that never leave the process skip the prime round trip
+    prog_mem = link([
+        chunks.raw_push(10),
+        chunks.raw_store(0),
+        chunks.raw_load(0),
+        chunks.raw_op(OP_PRINT),
+    ])
+    ok("".join(VM().execute(prog_mem)) == "10", "memory")
+
+    prog_loop = link([
+        chunks.raw_push(3),
+        chunks.raw_store(0),
+        chunks.raw_load(0),
+        chunks.raw_jz(7),
+        chunks.raw_load(0),
+        chunks.raw_op(OP_PRINT),
+        chunks.raw_load(0),
+        chunks.raw_push(1),
+        chunks.raw_op(OP_SUB),
+        chunks.raw_store(0),
+        chunks.raw_jmp(-9),
+    ])
+    ok("".join(VM().execute(prog_loop)) == "321", "loop")
 
     # Stress-test prime factorization with large numbers
     large = primes.get_prime(1000) * primes.get_prime(1100)
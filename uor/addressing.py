@@ -3,35 +3,86 @@ from __future__ import annotations
 """Canonical addressing utilities based on 512-bit prime digests."""
 
 import hashlib
+from itertools import compress
+from math import isqrt
 from typing import Dict, Optional
 
+try:
+    import gmpy2  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional
+    gmpy2 = None  # type: ignore
+
+try:
+    import blake3  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional
+    blake3 = None  # type: ignore
+
 from . import ipfs_storage
 from .cache import InstructionCache
 import primes
 
 
+# Odd primes used to sieve candidate windows before any primality test.
+_SIEVE_PRIMES = tuple(p for p in range(3, 1 << 14, 2) if all(p % q for q in range(3, isqrt(p) + 1, 2)))
+# Number of odd candidates sieved at once.
+_WINDOW = 1 << 10
+
+# BPSW from GMP when available; otherwise the pure Python Miller-Rabin.
+_is_prime = gmpy2.is_prime if gmpy2 is not None else primes.miller_rabin
+
+
 def _nearest_prime(n: int) -> int:
-    """Return the smallest prime >= ``n`` using Miller-Rabin."""
-    if n % 2 == 0:
-        n += 1
+    """Return the smallest prime >= ``n``.
+
+    Odd candidates are examined a window at a time: multiples of the
+    primes below 16384 are struck out with slice assignments, so only the
+    survivors (about 12% of the odd numbers) reach the costly primality
+    test.
+    """
+    if n <= _SIEVE_PRIMES[-1]:
+        if n <= 2:
+            return 2
+        return next(p for p in _SIEVE_PRIMES if p >= n)
+    n |= 1
     while True:
-        if primes.miller_rabin(n):
-            return n
-        n += 2
+        window = bytearray(b"\x01") * _WINDOW
+        for p in _SIEVE_PRIMES:
+            # first i with n + 2*i divisible by p
+            start = (-n % p) * ((p + 1) >> 1) % p
+            window[start::p] = bytes(len(range(start, _WINDOW, p)))
+        for i in compress(range(_WINDOW), window):
+            if _is_prime(n + 2 * i):
+                return n + 2 * i
+        n += 2 * _WINDOW
+
+
+def _digest(data: bytes, algorithm: str) -> bytes:
+    if algorithm == "sha512":
+        return hashlib.sha512(data).digest()
+    if algorithm == "blake3":
+        if blake3 is None:
+            raise RuntimeError("blake3 is not installed")
+        return blake3.blake3(data).digest(length=64)
+    raise ValueError(f"Unknown digest algorithm: {algorithm}")
+
 
+def canonical_address(data: bytes, digest: str = "sha512") -> int:
+    """Return a 512-bit prime digest for ``data``.
 
-def canonical_address(data: bytes) -> int:
-    """Return a 512-bit prime digest for ``data``."""
-    digest = hashlib.sha512(data).digest()
-    num = int.from_bytes(digest, "big")
+    ``digest`` selects the hash: ``"sha512"`` (the canonical default) or
+    ``"blake3"``, which is much faster on large blobs but yields different
+    addresses, so every party sharing a namespace must agree on it.
+    """
+    num = int.from_bytes(_digest(data, digest), "big")
     return _nearest_prime(num)
 
 
 class DHT:
     """Simple distributed hash table mapping addresses to IPFS CIDs."""
 
-    def __init__(self, nodes: int = 3, cache_size: int = 64) -> None:
+    def __init__(self, nodes: int = 3, cache_size: int = 64, digest: str = "sha512") -> None:
         self.tables = [{} for _ in range(max(1, nodes))]
+        self.digest = digest
         self.cache = InstructionCache(max_size=cache_size)
         self.namespaces: Dict[str, int] = {}
 
@@ -45,7 +96,7 @@ class DHT:
     # Store and retrieve
     # ------------------------------------------------------------------
     def store(self, namespace: str, data: bytes) -> int:
-        addr = canonical_address(data)
+        addr = canonical_address(data, self.digest)
         cid = ipfs_storage.add_data(data)
         table = self._select_table(addr)
         existing = table.get(addr)
@@ -1,6 +1,9 @@
 """Orchestrator that coordinates specialized agents to produce an app."""
 from __future__ import annotations
 
+import asyncio
+from typing import Iterable, List
+
 from .planner import PlannerAgent
 from .coder import CoderAgent
 from .tester import TesterAgent
@@ -21,6 +24,15 @@ class AppFactory:
         plan = await self.planner.run(goal)
         code = await self.coder.run(plan)
         checked = await self.tester.run(code)
-        chunks_list = assembler.assemble(checked)
-        data = "\n".join(str(x) for x in chunks_list).encode("utf-8")
+        # assembling is CPU bound; keep the event loop free for other builds
+        chunks_list = await asyncio.to_thread(assembler.assemble, checked)
+        data = assembler.pack_chunks(chunks_list)
         return await ipfs_storage.async_add_data(data)
+
+    async def build_apps(self, goals: Iterable[str]) -> List[str]:
+        """Build several independent apps concurrently and return their CIDs.
+
+        Each pipeline is strictly sequential, so the network round trips of
+        different goals are what overlap.
+        """
+        return list(await asyncio.gather(*(self.build_app(goal) for goal in goals)))
@@ -38,4 +38,4 @@ def run_program(text: str) -> str:
     program = assembler.assemble(text)
     decoded = decoder.decode(program)
     vm = VM()
-    return "".join(vm.execute(decoded))
+    return vm.run(decoded)
@@ -2,37 +2,62 @@
 from __future__ import annotations
 
 import asyncio
+import weakref
+from typing import Any, Callable, Dict, Tuple
 
 from .llm_client import (
-    openai,
-    anthropic,
-    generativeai,
-    _require,
     _get_env,
+    _import_sdk,
     MissingDependencyError,
 )
 
+# SDK clients own an HTTP connection pool bound to the event loop that
+# created them, so one client is kept per loop, provider and API key and
+# is dropped together with its loop.
+_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _client(provider: str, factory: Callable[..., Any], api_key: str) -> Any:
+    loop = asyncio.get_running_loop()
+    clients = _CLIENTS.get(loop)
+    if clients is None:
+        clients = _CLIENTS[loop] = {}
+    client = clients.get((provider, api_key))
+    if client is None:
+        client = clients[(provider, api_key)] = factory(api_key=api_key)
+    return client
+
 
 async def async_call_model(provider: str, prompt: str) -> str:
     """Asynchronously send ``prompt`` to ``provider`` and return the response."""
     provider = provider.lower()
 
     if provider == "openai":
-        _require(openai, "openai")
-        openai.api_key = _get_env("OPENAI_API_KEY")
+        openai = _import_sdk("openai", "openai")
+        api_key = _get_env("OPENAI_API_KEY")
         try:  # pragma: no cover - network errors
-            resp = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-            )
+            if hasattr(openai, "AsyncOpenAI"):
+                client = _client("openai", openai.AsyncOpenAI, api_key)
+                resp = await client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[{"role": "user", "content": prompt}],
+                )
+            else:
+                openai.api_key = api_key
+                resp = await openai.ChatCompletion.acreate(
+                    model="gpt-3.5-turbo",
+                    messages=[{"role": "user", "content": prompt}],
+                )
             return resp.choices[0].message.content
         except Exception as exc:  # pragma: no cover
             raise RuntimeError("Failed to call OpenAI") from exc
 
     if provider == "anthropic":
-        _require(anthropic, "anthropic")
+        anthropic = _import_sdk("anthropic", "anthropic")
         try:  # pragma: no cover - network errors
-            client = anthropic.AsyncAnthropic(api_key=_get_env("ANTHROPIC_API_KEY"))
+            client = _client("anthropic", anthropic.AsyncAnthropic, _get_env("ANTHROPIC_API_KEY"))
             resp = await client.messages.create(
                 model="claude-3-opus-20240229",
                 messages=[{"role": "user", "content": prompt}],
@@ -42,7 +67,7 @@ async def async_call_model(provider: str, prompt: str) -> str:
             raise RuntimeError("Failed to call Anthropic") from exc
 
     if provider in {"gemini", "google"}:
-        _require(generativeai, "google-generativeai")
+        generativeai = _import_sdk("google.generativeai", "google-generativeai")
         try:  # pragma: no cover - network errors
             generativeai.configure(api_key=_get_env("GOOGLE_API_KEY"))
             model = generativeai.GenerativeModel("gemini-pro")
@@ -1,77 +1,276 @@
 from __future__ import annotations
 
 from collections import OrderedDict
+from functools import lru_cache
+from itertools import count
 from threading import Lock
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from lru import LRU  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional
+    LRU = None  # type: ignore
+
+
+# Caches larger than this are split into ``_SHARDS`` independent LRUs.
+_SHARD_THRESHOLD = 256
+_SHARDS = 16
+# Pending decode-time samples folded into a shard's total at once.
+_FOLD_AT = 1024
+_MISS = object()
+
+
+class _Shard:
+    """One independently locked LRU partition of an ``InstructionCache``."""
+
+    __slots__ = (
+        "max_size",
+        "data",
+        "probation",
+        "probation_size",
+        "native",
+        "lock",
+        "hits",
+        "misses",
+        "hit_reads",
+        "miss_reads",
+        "decode_times",
+        "saved",
+        "total_time_saved",
+        "time_saved_hits",
+    )
+
+    def __init__(self, max_size: int, two_q: bool = False) -> None:
+        self.max_size = max_size
+        self.native = LRU is not None and not two_q
+        if self.native:
+            self.data = LRU(max_size, callback=self.evicted)
+        else:
+            self.data = OrderedDict()
+        # 2Q: new keys wait in a FIFO probation queue (a quarter of the
+        # capacity) and only move to ``data`` when hit again there.
+        self.probation: Optional[OrderedDict] = OrderedDict() if two_q else None
+        self.probation_size = max(1, max_size // 4)
+        self.lock = Lock()
+        self.decode_times: Dict[Any, float] = {}
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        # ``next()`` on an ``itertools.count`` is a single atomic step under
+        # the GIL, so hits and misses are counted without taking the lock.
+        # Reading a counter advances it too; ``*_reads`` corrects for that.
+        self.hits = count()
+        self.misses = count()
+        self.hit_reads = 0
+        self.miss_reads = 0
+        # Decode times of hits, appended lock-free and summed in ``fold``.
+        self.saved: List[float] = []
+        self.total_time_saved = 0.0
+        self.time_saved_hits = 0
+
+    def evicted(self, key: Any, value: Any) -> None:
+        self.decode_times.pop(key, None)
+
+    def fold(self) -> None:
+        """Move pending decode-time samples into the running totals."""
+        with self.lock:
+            saved = self.saved
+            n = len(saved)
+            self.total_time_saved += sum(saved[:n])
+            self.time_saved_hits += n
+            del saved[:n]
+
+    def get_2q(self, key: Any) -> Any:
+        with self.lock:
+            data = self.data
+            if key in data:
+                data.move_to_end(key)
+                return data[key]
+            probation = self.probation
+            value = probation.pop(key, _MISS)
+            if value is not _MISS:
+                data[key] = value
+                if len(data) > self.max_size - self.probation_size:
+                    old_key, old_value = data.popitem(last=False)
+                    probation[old_key] = old_value
+                    self.trim_probation()
+            return value
+
+    def put_2q(self, key: Any, value: Any) -> None:
+        with self.lock:
+            if key in self.data:
+                self.data[key] = value
+                self.data.move_to_end(key)
+                return
+            self.probation[key] = value
+            self.trim_probation()
+
+    def trim_probation(self) -> None:
+        probation = self.probation
+        while len(probation) > self.probation_size:
+            old_key, _ = probation.popitem(last=False)
+            self.evicted(old_key, None)
+
+    def read_counts(self) -> tuple[int, int]:
+        """Return ``(hits, misses)``; the caller must hold ``lock``."""
+        hits = next(self.hits) - self.hit_reads
+        misses = next(self.misses) - self.miss_reads
+        self.hit_reads += 1
+        self.miss_reads += 1
+        return hits, misses
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+            if self.probation is not None:
+                self.probation.clear()
+            self.decode_times.clear()
+            self._reset_stats()
 
 
 class InstructionCache:
-    """Thread-safe LRU cache for decoded instructions."""
+    """Thread-safe LRU cache for decoded instructions.
+
+    Entries live in the C ``lru.LRU`` map from ``lru-dict`` when it is
+    installed, otherwise in an ``OrderedDict``. Single lookups and inserts
+    are atomic under the GIL either way, so locks only guard the
+    statistics of decode time saved; hit and miss counters are lock-free.
+
+    Caches above 256 entries are split into 16 shards selected by key hash,
+    each with its own lock and LRU order, so concurrent decoders rarely
+    contend. Recency is then tracked per shard; smaller caches use a single
+    shard and keep exact LRU eviction.
+
+    When ``loader`` is given, :meth:`load` memoizes it with
+    ``functools.lru_cache``, whose C implementation replaces the separate
+    ``get``/``put`` round trip for callers that can compute missing values.
 
-    def __init__(self, max_size: int = 128) -> None:
+    ``policy="2q"`` replaces plain LRU with 2Q admission: keys enter a small
+    FIFO probation queue and are only promoted to the main LRU on a second
+    hit, so one-shot keys from a scan cannot flush the hot set. Moving keys
+    between the two queues takes the shard lock on every access.
+
+    Hits only look up recorded decode times when ``track_timing`` is set;
+    passing ``decode_time`` to :meth:`put` turns it on.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 128,
+        *,
+        loader: Optional[Callable[[Any], Any]] = None,
+        policy: str = "lru",
+        track_timing: bool = False,
+    ) -> None:
+        if policy not in ("lru", "2q"):
+            raise ValueError(f"Unknown cache policy: {policy}")
         self.max_size = max_size
-        self._data: "OrderedDict[int, Any]" = OrderedDict()
-        self._lock = Lock()
-        self._hits = 0
-        self._misses = 0
-        self._decode_times: Dict[int, float] = {}
-        self._total_time_saved = 0.0
-        self._time_saved_hits = 0
-
-    def get(self, key: int) -> Optional[Any]:
+        self.policy = policy
+        self._two_q = policy == "2q"
+        self.track_timing = track_timing
+        self._loader = lru_cache(maxsize=max_size)(loader) if loader is not None else None
+        if self._loader is not None:
+            # Shadow the ``load`` method with the C wrapper itself so a hit
+            # costs one C call instead of a Python frame plus a C call.
+            self.load = self._loader
+        shards = _SHARDS if max_size > _SHARD_THRESHOLD else 1
+        base, extra = divmod(max_size, shards)
+        self._shards: List[_Shard] = [
+            _Shard(base + (i < extra), self._two_q) for i in range(shards)
+        ]
+        self._mask = shards - 1
+
+    def _shard(self, key: Any) -> _Shard:
+        return self._shards[hash(key) & self._mask]
+
+    def load(self, key: Any) -> Any:
+        """Return the cached ``loader(key)``, calling the loader on a miss."""
+        if self._loader is None:
+            raise TypeError("InstructionCache has no loader")
+        return self._loader(key)
+
+    def get(self, key: Any) -> Optional[Any]:
         """Retrieve ``key`` from the cache."""
-        with self._lock:
-            if key in self._data:
-                value = self._data.pop(key)
-                self._data[key] = value  # mark as recently used
-                self._hits += 1
-                if key in self._decode_times:
-                    self._total_time_saved += self._decode_times[key]
-                    self._time_saved_hits += 1
-                return value
-            self._misses += 1
-            return None
-
-    def put(self, key: int, value: Any, *, decode_time: Optional[float] = None) -> None:
+        shard = self._shard(key)
+        if self._two_q:
+            value = shard.get_2q(key)
+            if value is _MISS:
+                next(shard.misses)
+                return None
+        else:
+            data = shard.data
+            try:
+                value = data[key]  # ``LRU`` marks the key as recently used
+                if not shard.native:
+                    data.move_to_end(key)
+            except KeyError:
+                next(shard.misses)
+                return None
+        next(shard.hits)
+        if self.track_timing:
+            saved = shard.decode_times.get(key)
+            if saved is not None:
+                shard.saved.append(saved)
+                if len(shard.saved) >= _FOLD_AT:
+                    shard.fold()
+        return value
+
+    def put(self, key: Any, value: Any, *, decode_time: Optional[float] = None) -> None:
         """Insert ``value`` for ``key`` into the cache.
 
         If ``decode_time`` is provided it is used when calculating the average
         decode time saved for cache hits.
         """
-        with self._lock:
-            if key in self._data:
-                self._data.pop(key)
-            elif len(self._data) >= self.max_size:
-                old_key, _ = self._data.popitem(last=False)
-                self._decode_times.pop(old_key, None)
-            self._data[key] = value
-            if decode_time is not None:
-                self._decode_times[key] = decode_time
+        shard = self._shard(key)
+        if decode_time is not None:
+            self.track_timing = True
+            shard.decode_times[key] = decode_time
+        if self._two_q:
+            shard.put_2q(key, value)
+            return
+        data = shard.data
+        data[key] = value
+        if not shard.native:
+            data.move_to_end(key)
+            while len(data) > shard.max_size:
+                try:
+                    old_key, _ = data.popitem(last=False)
+                except KeyError:
+                    break
+                shard.evicted(old_key, None)
 
     def clear(self) -> None:
         """Clear the cache and statistics."""
-        with self._lock:
-            self._data.clear()
-            self._decode_times.clear()
-            self._hits = 0
-            self._misses = 0
-            self._total_time_saved = 0.0
-            self._time_saved_hits = 0
+        for shard in self._shards:
+            shard.clear()
+        if self._loader is not None:
+            self._loader.cache_clear()
 
     def get_stats(self) -> Dict[str, float]:
         """Return cache statistics as a dictionary."""
-        with self._lock:
-            ops = self._hits + self._misses
-            hit_rate = self._hits / ops if ops else 0.0
-            avg_time = (
-                self._total_time_saved / self._time_saved_hits
-                if self._time_saved_hits
-                else 0.0
-            )
-            return {
-                "hits": self._hits,
-                "misses": self._misses,
-                "size": len(self._data),
-                "hit_rate": hit_rate,
-                "avg_decode_time_saved": avg_time,
-            }
+        hits = misses = size = saved_hits = 0
+        time_saved = 0.0
+        for shard in self._shards:
+            shard.fold()
+            with shard.lock:
+                shard_hits, shard_misses = shard.read_counts()
+                hits += shard_hits
+                misses += shard_misses
+                size += len(shard.data)
+                if shard.probation is not None:
+                    size += len(shard.probation)
+                time_saved += shard.total_time_saved
+                saved_hits += shard.time_saved_hits
+        if self._loader is not None:
+            info = self._loader.cache_info()
+            hits += info.hits
+            misses += info.misses
+            size += info.currsize
+        ops = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "size": size,
+            "hit_rate": hits / ops if ops else 0.0,
+            "avg_decode_time_saved": time_saved / saved_hits if saved_hits else 0.0,
+        }
@@ -7,6 +7,7 @@ from .parser import (
     FunctionNode,
     VariableNode,
     BinaryOpNode,
+    BinaryOpChainNode,
     UnaryOpNode,
     IfNode,
     WhileNode,
@@ -18,6 +19,7 @@ from .parser import (
     ExpressionStatement,
     BlockNode,
     LiteralNode,
+    walk,
 )
 
 __all__ = [
@@ -28,6 +30,7 @@ __all__ = [
     "FunctionNode",
     "VariableNode",
     "BinaryOpNode",
+    "BinaryOpChainNode",
     "UnaryOpNode",
     "IfNode",
     "WhileNode",
@@ -39,4 +42,5 @@ __all__ = [
     "ExpressionStatement",
     "BlockNode",
     "LiteralNode",
+    "walk",
 ]
@@ -5,7 +5,6 @@ from __future__ import annotations
 import argparse
 import sys
 
-from .lexer import Lexer
 from .parser import Parser
 from .codegen import CodeGenerator
 
@@ -18,13 +17,11 @@ def _compile_source(text: str, *, print_tokens: bool = False, print_ast: bool =
                     opt_level: int = 0, debug: bool = False) -> str:
     """Compile ``text`` to assembly and return it as a string."""
 
-    lexer = Lexer(text)
-    tokens = list(lexer.tokenize())
+    parser = Parser.from_text(text)
     if print_tokens:
-        for tok in tokens:
+        for tok in parser.tokens:
             print(tok)
 
-    parser = Parser(tokens)
     ast = parser.parse()
     if print_ast:
         print(ast)
@@ -77,7 +74,7 @@ def main(argv: list[str] | None = None) -> int:
     if args.run:
         program = assembler.assemble(asm)
         vm = VM()
-        output = "".join(vm.execute(decoder.decode(program)))
+        output = vm.run(decoder.decode(program))
         print(output)
 
     return 0
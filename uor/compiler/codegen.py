@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import operator
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from itertools import count
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from .parser import (
     NodeVisitor,
@@ -13,6 +16,7 @@ from .parser import (
     VariableNode,
     AssignmentNode,
     BinaryOpNode,
+    BinaryOpChainNode,
     UnaryOpNode,
     IfNode,
     WhileNode,
@@ -39,39 +43,128 @@ class GeneratedProgram:
 class CodeGenerator(NodeVisitor):
     """Generate assembly instructions from an AST."""
 
+    # Folding follows the VM: ``DIV`` floors, comparisons and logical
+    # operators push 1 or 0. Division by zero is left to run time.
+    _FOLD_OPS = MappingProxyType({
+        "+": operator.add,
+        "-": operator.sub,
+        "*": operator.mul,
+        "/": operator.floordiv,
+        "%": operator.mod,
+        "==": lambda a, b: int(a == b),
+        "!=": lambda a, b: int(a != b),
+        "<": lambda a, b: int(a < b),
+        ">": lambda a, b: int(a > b),
+        "<=": lambda a, b: int(a <= b),
+        ">=": lambda a, b: int(a >= b),
+        "&&": lambda a, b: int(bool(a and b)),
+        "||": lambda a, b: int(bool(a or b)),
+    })
+    _FOLD_UNARY = MappingProxyType({
+        "-": operator.neg,
+        "!": lambda a: int(not a),
+    })
+    _BINOP_ASM = MappingProxyType({
+        "+": "ADD",
+        "-": "SUB",
+        "*": "MUL",
+    })
+
     def __init__(self) -> None:
         self.instructions: List[str] = []
-        self._label_counter = 0
+        self._label_ids = count()
         self._var_stack: List[Dict[str, int]] = []
         self._addr_counter = 0
+        # Addresses released by closed scopes, reused before new ones, and
+        # the addresses owned by each open scope (parallel to _var_stack).
+        self._free_addrs: List[int] = []
+        self._scope_addrs: List[List[int]] = []
         self._functions: Dict[str, FunctionNode] = {}
-        self._expr_cache: Dict[str, int] = {}
+        # Return slot and end label of the function being inlined.
+        self._return_addr: Optional[int] = None
+        self._current_end: Optional[str] = None
+        self._expr_cache: Dict[int, int] = {}
+        # Hash-consing tables behind ``_expr_key``: structure -> id, and
+        # id(node) -> (node, id) so each node is keyed once.
+        self._structures: Dict[Tuple[Any, ...], int] = {}
+        self._node_keys: Dict[int, Tuple[Node, int]] = {}
+        # Operand instruction text by value, so repeated LOAD/STORE/PUSH of
+        # the same operand reuse one string instead of formatting a new one.
+        self._loads: Dict[int, str] = {}
+        self._stores: Dict[int, str] = {}
+        self._pushes: Dict[int, str] = {}
+        # id(node) -> (node, folded value or None), see ``_const_fold``.
+        self._consts: Dict[int, Tuple[Node, Optional[int]]] = {}
+        # id(chain) -> (chain, prefix keys, prefix folds), see ``_chain_prefixes``.
+        self._chains: Dict[int, Tuple[Node, List[int], List[Optional[int]]]] = {}
         self._discard_addr = self._new_address()
+        # Node type -> bound visitor, so dispatch is one dict lookup instead
+        # of building ``"visit_" + name`` and resolving it on every node.
+        self._dispatch: Dict[type, Callable[[Any], Any]] = self.dispatch_table()
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
+    def _visit(self, node: Node) -> Any:
+        method = self._dispatch.get(type(node))
+        if method is None:
+            return self.generic_visit(node)
+        return method(node)
+
     def _new_label(self, prefix: str = "L") -> str:
-        label = f"{prefix}{self._label_counter}"
-        self._label_counter += 1
-        return label
+        return f"{prefix}{next(self._label_ids)}"
 
     def _emit(self, text: str) -> None:
         self.instructions.append(text)
 
+    def _emit_load(self, addr: int) -> None:
+        text = self._loads.get(addr)
+        if text is None:
+            text = self._loads[addr] = f"LOAD {addr}"
+        self.instructions.append(text)
+
+    def _emit_store(self, addr: int) -> None:
+        text = self._stores.get(addr)
+        if text is None:
+            text = self._stores[addr] = f"STORE {addr}"
+        self.instructions.append(text)
+
+    def _emit_push(self, value: object) -> None:
+        if type(value) is not int:
+            self.instructions.append(f"PUSH {value}")
+            return
+        text = self._pushes.get(value)
+        if text is None:
+            text = self._pushes[value] = f"PUSH {value}"
+        self.instructions.append(text)
+
     def _push_env(self) -> None:
         self._var_stack.append({})
+        self._scope_addrs.append([])
 
     def _pop_env(self) -> None:
         self._var_stack.pop()
+        self._free_addrs.extend(reversed(self._scope_addrs.pop()))
 
     def _new_address(self) -> int:
+        if self._free_addrs:
+            return self._free_addrs.pop()
         addr = self._addr_counter
         self._addr_counter += 1
         return addr
 
-    def _alloc_var(self, name: str) -> int:
+    def _scoped_address(self) -> int:
+        """Return an address that is released when the current scope closes.
+
+        Expression cache slots must outlive their scope and therefore use
+        :meth:`_new_address` directly.
+        """
         addr = self._new_address()
+        self._scope_addrs[-1].append(addr)
+        return addr
+
+    def _alloc_var(self, name: str) -> int:
+        addr = self._scoped_address()
         self._var_stack[-1][name] = addr
         return addr
 
@@ -81,8 +174,88 @@ class CodeGenerator(NodeVisitor):
                 return scope[name]
         raise NameError(f"Undefined variable {name}")
 
-    def _expr_key(self, node: Node) -> str:
-        return repr(node)
+    def _expr_key(self, node: Node) -> int:
+        """Return an integer equal for exactly the structurally equal nodes.
+
+        Children are keyed first, so each node costs one small tuple lookup
+        instead of the recursive ``repr`` of its whole subtree.
+        """
+        memo = self._node_keys.get(id(node))
+        if memo is not None and memo[0] is node:
+            return memo[1]
+        if type(node) is BinaryOpChainNode:
+            return self._chain_prefixes(node)[0][-1]
+        structure = (type(node),) + tuple(
+            self._field_key(getattr(node, name)) for name in node.__dataclass_fields__
+        )
+        key = self._structures.setdefault(structure, len(self._structures))
+        # keep ``node`` referenced so its id cannot be reused by another node
+        self._node_keys[id(node)] = (node, key)
+        return key
+
+    def _field_key(self, value: Any) -> Any:
+        if isinstance(value, Node):
+            return (Node, self._expr_key(value))
+        if isinstance(value, list):
+            return tuple(self._field_key(item) for item in value)
+        return (type(value), value)
+
+    def _const_fold(self, node: Node) -> Optional[int]:
+        """Return the integer value of ``node`` if it is a constant expression.
+
+        Results are memoized per node, so folding while visiting nested
+        operators stays linear in the size of the tree.
+        """
+        if isinstance(node, LiteralNode):
+            return node.value if type(node.value) is int else None
+        memo = self._consts.get(id(node))
+        if memo is not None and memo[0] is node:
+            return memo[1]
+        value: Optional[int] = None
+        if isinstance(node, BinaryOpNode):
+            func = self._FOLD_OPS.get(node.operator)
+            left = self._const_fold(node.left)
+            right = self._const_fold(node.right)
+            if func is not None and left is not None and right is not None:
+                if not (right == 0 and node.operator in ("/", "%")):
+                    value = func(left, right)
+        elif isinstance(node, BinaryOpChainNode):
+            value = self._chain_prefixes(node)[1][-1]
+        elif isinstance(node, UnaryOpNode):
+            func = self._FOLD_UNARY.get(node.operator)
+            operand = self._const_fold(node.operand)
+            if func is not None and operand is not None:
+                value = func(operand)
+        self._consts[id(node)] = (node, value)
+        return value
+
+    def _chain_prefixes(self, node: BinaryOpChainNode) -> Tuple[List[int], List[Optional[int]]]:
+        """Return the expression keys and folded values of the prefixes of ``node``.
+
+        Entry ``j`` describes ``operands[0]`` through ``operands[j]`` and is
+        computed exactly as for the equivalent left-deep ``BinaryOpNode``
+        tree, so chains and nested trees share folding and cache slots.
+        """
+        memo = self._chains.get(id(node))
+        if memo is not None and memo[0] is node:
+            return memo[1], memo[2]
+        first = node.operands[0]
+        keys = [self._expr_key(first)]
+        folds = [self._const_fold(first)]
+        structures = self._structures
+        for op, operand in zip(node.operators, node.operands[1:]):
+            structure = (BinaryOpNode, (Node, keys[-1]), (str, op), (Node, self._expr_key(operand)))
+            keys.append(structures.setdefault(structure, len(structures)))
+            func = self._FOLD_OPS.get(op)
+            left = folds[-1]
+            right = self._const_fold(operand)
+            value = None
+            if func is not None and left is not None and right is not None:
+                if not (right == 0 and op in ("/", "%")):
+                    value = func(left, right)
+            folds.append(value)
+        self._chains[id(node)] = (node, keys, folds)
+        return keys, folds
 
     # ------------------------------------------------------------------
     # Entry point
@@ -101,96 +274,150 @@ class CodeGenerator(NodeVisitor):
                 body.append(stmt)
 
         for stmt in body:
-            for _ in stmt.accept(self):
-                pass
+            self._visit(stmt)
 
         self._pop_env()
+        self._peephole()
 
         return GeneratedProgram(self.instructions)
 
+    def _peephole(self) -> None:
+        """Rewrite redundant instruction pairs until nothing changes.
+
+        * ``STORE a; LOAD a`` is dropped when that is the only ``LOAD a``,
+          since the value is already on the stack and never read again.
+        * ``PUSH -1; MUL`` becomes ``NEG``.
+        * ``JMP L`` directly before ``L:`` is dropped.
+        """
+        code = self.instructions
+        changed = True
+        while changed:
+            changed = False
+            loads: Dict[str, int] = {}
+            for text in code:
+                if text.startswith("LOAD "):
+                    loads[text] = loads.get(text, 0) + 1
+            out: List[str] = []
+            i, n = 0, len(code)
+            while i < n:
+                text = code[i]
+                nxt = code[i + 1] if i + 1 < n else None
+                if nxt is not None:
+                    if text.startswith("STORE ") and nxt == "LOAD " + text[6:] and loads[nxt] == 1:
+                        i += 2
+                        changed = True
+                        continue
+                    if text == "PUSH -1" and nxt == "MUL":
+                        out.append("NEG")
+                        i += 2
+                        changed = True
+                        continue
+                    if text.startswith("JMP ") and nxt == text[4:] + ":":
+                        i += 1
+                        changed = True
+                        continue
+                out.append(text)
+                i += 1
+            code[:] = out
+
     # ------------------------------------------------------------------
     # Visitors
     # ------------------------------------------------------------------
-    def visit_BlockNode(self, node: BlockNode):
+    def visit_BlockNode(self, node: BlockNode) -> None:
         self._push_env()
         for stmt in node.statements:
-            yield from stmt.accept(self)
+            self._visit(stmt)
         self._pop_env()
 
-    def visit_VarDeclNode(self, node: VarDeclNode):
+    def visit_VarDeclNode(self, node: VarDeclNode) -> None:
         addr = self._alloc_var(node.name)
         if node.initializer is not None:
-            yield from self._eval_expr(node.initializer)
-            self._emit(f"STORE {addr}")
-        return iter(())
+            self._eval_expr(node.initializer)
+            self._emit_store(addr)
 
-    def visit_AssignmentNode(self, node: AssignmentNode):
-        yield from self._eval_expr(node.value)
+    def visit_AssignmentNode(self, node: AssignmentNode) -> None:
+        self._eval_expr(node.value)
         addr = self._lookup_var(node.target.name)
-        self._emit(f"STORE {addr}")
-        self._emit(f"LOAD {addr}")
-        return iter(())
+        self._emit_store(addr)
+        self._emit_load(addr)
 
-    def visit_VariableNode(self, node: VariableNode):
+    def visit_VariableNode(self, node: VariableNode) -> None:
         addr = self._lookup_var(node.name)
-        self._emit(f"LOAD {addr}")
-        return iter(())
-
-    def visit_LiteralNode(self, node: LiteralNode):
-        self._emit(f"PUSH {node.value}")
-        return iter(())
-
-    def visit_BinaryOpNode(self, node: BinaryOpNode):
-        # Constant folding
-        if isinstance(node.left, LiteralNode) and isinstance(node.right, LiteralNode):
-            op_map = {
-                "+": lambda a, b: a + b,
-                "-": lambda a, b: a - b,
-                "*": lambda a, b: a * b,
-            }
-            func = op_map.get(node.operator)
-            if func is None:
-                raise NotImplementedError(f"Operator {node.operator} not supported")
-            value = func(int(node.left.value), int(node.right.value))
-            self._emit(f"PUSH {value}")
-            return iter(())
+        self._emit_load(addr)
+
+    def visit_LiteralNode(self, node: LiteralNode) -> None:
+        self._emit_push(node.value)
+
+    def visit_BinaryOpNode(self, node: BinaryOpNode) -> None:
+        value = self._const_fold(node)
+        if value is not None:
+            self._emit_push(value)
+            return
 
         key = self._expr_key(node)
         if key in self._expr_cache:
             addr = self._expr_cache[key]
-            self._emit(f"LOAD {addr}")
-            return iter(())
-
-        yield from self._eval_expr(node.left)
-        yield from self._eval_expr(node.right)
-
-        op_map = {
-            "+": "ADD",
-            "-": "SUB",
-            "*": "MUL",
-        }
-        op = op_map.get(node.operator)
+            self._emit_load(addr)
+            return
+
+        self._eval_expr(node.left)
+        self._eval_expr(node.right)
+
+        op = self._BINOP_ASM.get(node.operator)
         if op is None:
             raise NotImplementedError(f"Operator {node.operator} not supported")
         self._emit(op)
 
         addr = self._new_address()
         self._expr_cache[key] = addr
-        self._emit(f"STORE {addr}")
-        self._emit(f"LOAD {addr}")
-        return iter(())
-
-    def visit_UnaryOpNode(self, node: UnaryOpNode):
-        if node.operator == "-" and isinstance(node.operand, LiteralNode):
-            self._emit(f"PUSH {-int(node.operand.value)}")
-            return iter(())
-        elif node.operator == "-":
-            yield from self._eval_expr(node.operand)
+        self._emit_store(addr)
+        self._emit_load(addr)
+
+    def visit_BinaryOpChainNode(self, node: BinaryOpChainNode) -> None:
+        """Emit a chain as its left-deep tree would be, without recursing.
+
+        The longest prefix that folds to a constant or is already cached is
+        pushed or loaded first; each remaining operator then evaluates its
+        right operand, applies the operation and caches the new prefix.
+        """
+        keys, folds = self._chain_prefixes(node)
+        operands = node.operands
+        start = len(operands) - 1
+        while start > 0:
+            if folds[start] is not None:
+                self._emit_push(folds[start])
+                break
+            addr = self._expr_cache.get(keys[start])
+            if addr is not None:
+                self._emit_load(addr)
+                break
+            start -= 1
+        else:
+            self._eval_expr(operands[0])
+        for j in range(start + 1, len(operands)):
+            self._eval_expr(operands[j])
+            operator = node.operators[j - 1]
+            op = self._BINOP_ASM.get(operator)
+            if op is None:
+                raise NotImplementedError(f"Operator {operator} not supported")
+            self._emit(op)
+            addr = self._new_address()
+            self._expr_cache[keys[j]] = addr
+            self._emit_store(addr)
+            self._emit_load(addr)
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode) -> None:
+        value = self._const_fold(node)
+        if value is not None:
+            self._emit_push(value)
+            return
+        if node.operator == "-":
+            self._eval_expr(node.operand)
             self._emit("PUSH -1")
             self._emit("MUL")
-            return iter(())
+            return
         elif node.operator == "!":
-            yield from self._eval_expr(node.operand)
+            self._eval_expr(node.operand)
             false_label = self._new_label("false")
             end_label = self._new_label("end")
             self._emit(f"JNZ {false_label}")
@@ -199,136 +426,155 @@ class CodeGenerator(NodeVisitor):
             self._emit(f"{false_label}:")
             self._emit("PUSH 0")
             self._emit(f"{end_label}:")
-            return iter(())
+            return
         else:
             raise NotImplementedError(f"Unary op {node.operator} not supported")
 
-    def visit_ExpressionStatement(self, node: ExpressionStatement):
-        yield from self._eval_expr(node.expression, discard=True)
-        return iter(())
+    def visit_ExpressionStatement(self, node: ExpressionStatement) -> None:
+        self._eval_expr(node.expression, discard=True)
 
-    def visit_IfNode(self, node: IfNode):
-        if isinstance(node.condition, LiteralNode):
-            cond = int(node.condition.value)
+    def visit_IfNode(self, node: IfNode) -> None:
+        cond = self._const_fold(node.condition)
+        if cond is not None:
             branch = node.then_branch if cond else node.else_branch
             if branch:
-                yield from branch.accept(self)
-            return iter(())
+                self._visit(branch)
+            return
 
-        yield from self._eval_expr(node.condition)
+        self._eval_expr(node.condition)
         else_label = self._new_label("else")
         end_label = self._new_label("ifend")
         self._emit(f"JZ {else_label}")
-        yield from node.then_branch.accept(self)
+        self._visit(node.then_branch)
         self._emit(f"JMP {end_label}")
         self._emit(f"{else_label}:")
         if node.else_branch:
-            yield from node.else_branch.accept(self)
+            self._visit(node.else_branch)
         self._emit(f"{end_label}:")
-        return iter(())
 
-    def visit_WhileNode(self, node: WhileNode):
-        if isinstance(node.condition, LiteralNode) and not int(node.condition.value):
-            return iter(())
+    def visit_WhileNode(self, node: WhileNode) -> None:
+        if self._const_fold(node.condition) == 0:
+            return
 
         start = self._new_label("while_start")
         end = self._new_label("while_end")
         self._emit(f"{start}:")
-        yield from self._eval_expr(node.condition)
+        self._eval_expr(node.condition)
         self._emit(f"JZ {end}")
-        yield from node.body.accept(self)
+        self._visit(node.body)
         self._emit(f"JMP {start}")
         self._emit(f"{end}:")
-        return iter(())
 
-    def visit_ForNode(self, node: ForNode):
+    def visit_ForNode(self, node: ForNode) -> None:
         if node.init:
-            yield from node.init.accept(self)
-        if node.condition and isinstance(node.condition, LiteralNode) and not int(node.condition.value):
-            return iter(())
+            self._visit(node.init)
+        if node.condition and self._const_fold(node.condition) == 0:
+            return
         start = self._new_label("for_start")
         end = self._new_label("for_end")
         self._emit(f"{start}:")
         if node.condition:
-            yield from self._eval_expr(node.condition)
+            self._eval_expr(node.condition)
             self._emit(f"JZ {end}")
-        yield from node.body.accept(self)
+        self._visit(node.body)
         if node.increment:
-            yield from self._eval_expr(node.increment, discard=True)
+            self._eval_expr(node.increment, discard=True)
         self._emit(f"JMP {start}")
         self._emit(f"{end}:")
-        return iter(())
 
-    def visit_CallNode(self, node: CallNode):
-        if isinstance(node.callee, VariableNode) and node.callee.name == "print":
+    def visit_CallNode(self, node: CallNode) -> None:
+        if self._is_print(node):
+            # PRINTN prints only after every argument is evaluated, which
+            # would reorder output printed by a call inside an argument.
+            if len(node.args) == 1 or any(self._has_call(arg) for arg in node.args):
+                for arg in node.args:
+                    self._eval_expr(arg)
+                    self._emit("PRINT")
+                return
             for arg in node.args:
-                yield from self._eval_expr(arg)
-                self._emit("PRINT")
-            return iter(())
+                self._eval_expr(arg)
+            if node.args:
+                self._emit(f"PRINTN {len(node.args)}")
+            return
         if isinstance(node.callee, VariableNode) and node.callee.name in self._functions:
             func = self._functions[node.callee.name]
-            yield from self._inline_function(func, node.args)
-            return iter(())
+            self._inline_function(func, node.args)
+            return
         raise NotImplementedError("Only builtin print or defined functions supported")
 
-    def visit_ReturnNode(self, node: ReturnNode):
+    def visit_ReturnNode(self, node: ReturnNode) -> None:
+        return_addr = self._return_addr
+        if return_addr is None:
+            raise SyntaxError("'return' outside function")
         if node.value is not None:
-            yield from self._eval_expr(node.value)
-            self._emit(f"STORE {self._return_addr}")
+            self._eval_expr(node.value)
+            self._emit_store(return_addr)
         self._emit(f"JMP {self._current_end}")
-        return iter(())
 
-    def visit_FunctionNode(self, node: FunctionNode):
+    def visit_FunctionNode(self, node: FunctionNode) -> None:
         # Handled during call via inline expansion
-        return iter(())
+        pass
 
-    def visit_ProgramNode(self, node: ProgramNode):
-        yield from self.generate(node)
-        return iter(())
+    def visit_ProgramNode(self, node: ProgramNode) -> None:
+        self.generate(node)
 
     # ------------------------------------------------------------------
     # Internal expression evaluation
     # ------------------------------------------------------------------
-    def _eval_expr(self, node: Node, discard: bool = False):
+    def _eval_expr(self, node: Node, discard: bool = False) -> None:
         if isinstance(node, LiteralNode) and discard:
-            return iter(())
-        for _ in node.accept(self):
-            pass
-        if discard:
-            self._emit(f"STORE {self._discard_addr}")
-        return iter(())
+            return
+        self._visit(node)
+        if discard and not self._is_print(node):
+            self._emit_store(self._discard_addr)
+
+    @staticmethod
+    def _is_print(node: Node) -> bool:
+        # ``print`` consumes its arguments and leaves nothing to discard
+        return (
+            isinstance(node, CallNode)
+            and isinstance(node.callee, VariableNode)
+            and node.callee.name == "print"
+        )
+
+    @classmethod
+    def _has_call(cls, value: Any) -> bool:
+        """Return whether ``value`` contains a ``CallNode`` anywhere."""
+        if isinstance(value, CallNode):
+            return True
+        if isinstance(value, Node):
+            return any(cls._has_call(getattr(value, name)) for name in value.__dataclass_fields__)
+        if isinstance(value, list):
+            return any(cls._has_call(item) for item in value)
+        return False
 
     # ------------------------------------------------------------------
     # Function inlining helpers
     # ------------------------------------------------------------------
-    def _inline_function(self, fn: FunctionNode, args: List[Node]):
+    def _inline_function(self, fn: FunctionNode, args: List[Node]) -> None:
         self._push_env()
-        old_return = getattr(self, "_return_addr", None)
-        old_end = getattr(self, "_current_end", None)
+        old_return = self._return_addr
+        old_end = self._current_end
 
         # Bind parameters
         for name, arg in zip(fn.params, args):
             addr = self._alloc_var(name)
-            yield from self._eval_expr(arg)
-            self._emit(f"STORE {addr}")
+            self._eval_expr(arg)
+            self._emit_store(addr)
 
-        ret_addr = self._new_address()
+        ret_addr = self._scoped_address()
         end_label = self._new_label(f"func_{fn.name}_end")
         self._return_addr = ret_addr
         self._current_end = end_label
 
-        yield from fn.body.accept(self)
+        self._visit(fn.body)
 
         # Default return value
-        self._emit(f"PUSH 0")
-        self._emit(f"STORE {ret_addr}")
+        self._emit("PUSH 0")
+        self._emit_store(ret_addr)
         self._emit(f"{end_label}:")
-        self._emit(f"LOAD {ret_addr}")
+        self._emit_load(ret_addr)
 
-        if old_return is not None:
-            self._return_addr = old_return
-        if old_end is not None:
-            self._current_end = old_end
+        self._return_addr = old_return
+        self._current_end = old_end
         self._pop_env()
-        return iter(())
-
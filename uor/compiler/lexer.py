@@ -1,7 +1,60 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterator
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+
+# Integer token kinds. The parser compares ``Token.kind`` against these
+# instead of testing the ``(type, value)`` strings on every probe.
+(
+    K_EOF, K_IDENTIFIER, K_NUMBER, K_STRING,
+    K_LPAREN, K_RPAREN, K_LBRACE, K_RBRACE, K_SEMI, K_COMMA, K_ASSIGN,
+    K_PLUS, K_MINUS, K_STAR, K_SLASH,
+    K_EQ, K_NE, K_LT, K_GT, K_LE, K_GE, K_AND, K_OR, K_NOT,
+    K_FUNCTION, K_IF, K_ELSE, K_WHILE, K_FOR, K_RETURN, K_LET, K_CONST, K_PRINT,
+) = range(33)
+
+_TYPE_KINDS: Dict[str, int] = {
+    "EOF": K_EOF,
+    "IDENTIFIER": K_IDENTIFIER,
+    "NUMBER": K_NUMBER,
+    "STRING": K_STRING,
+}
+_PUNCT_KINDS: Dict[str, int] = {
+    "(": K_LPAREN, ")": K_RPAREN,
+    "{": K_LBRACE, "}": K_RBRACE,
+    ";": K_SEMI, ",": K_COMMA,
+    "=": K_ASSIGN,
+}
+_OPERATOR_KINDS: Dict[str, int] = {
+    "+": K_PLUS, "-": K_MINUS, "*": K_STAR, "/": K_SLASH,
+    "==": K_EQ, "!=": K_NE, "<": K_LT, ">": K_GT, "<=": K_LE, ">=": K_GE,
+    "&&": K_AND, "||": K_OR, "!": K_NOT,
+}
+_KEYWORD_KINDS: Dict[str, int] = {
+    "function": K_FUNCTION, "if": K_IF, "else": K_ELSE, "while": K_WHILE,
+    "for": K_FOR, "return": K_RETURN, "let": K_LET, "const": K_CONST,
+    "print": K_PRINT,
+}
+_VALUE_KINDS: Dict[Tuple[str, str], int] = {
+    **{(ch, ch): kind for ch, kind in _PUNCT_KINDS.items()},
+    **{("OPERATOR", op): kind for op, kind in _OPERATOR_KINDS.items()},
+    **{("KEYWORD", kw): kind for kw, kind in _KEYWORD_KINDS.items()},
+}
+
+# Display name of each kind, as used in parser error messages.
+KIND_NAMES: Dict[int, str] = {
+    **{kind: name for name, kind in _TYPE_KINDS.items()},
+    **{kind: text for table in (_PUNCT_KINDS, _OPERATOR_KINDS, _KEYWORD_KINDS) for text, kind in table.items()},
+}
+
+
+def token_kind(type_: str, value: str) -> int:
+    """Return the ``K_*`` kind of a token, or ``-1`` if it has none."""
+    kind = _VALUE_KINDS.get((type_, value))
+    if kind is None:
+        kind = _TYPE_KINDS.get(type_, -1)
+    return kind
 
 
 @dataclass
@@ -12,6 +65,10 @@ class Token:
     value: str
     line: int
     column: int
+    # ``K_*`` kind set by the lexer; see :func:`token_kind` for others.
+    kind: int = field(default=-1, repr=False, compare=False)
+    # Integer value of a NUMBER token, converted once by the lexer.
+    numeric: Optional[int] = field(default=None, repr=False, compare=False)
 
 
 class Lexer:
@@ -129,7 +186,7 @@ class Lexer:
                         f"Unterminated string at line {start_line}, column {start_col}"
                     )
                 self._advance()  # closing quote
-                yield Token("STRING", value, start_line, start_col)
+                yield Token("STRING", value, start_line, start_col, K_STRING)
                 continue
 
             # Number literal
@@ -139,7 +196,7 @@ class Lexer:
                 while self.pos < len(text) and text[self.pos].isdigit():
                     num += text[self.pos]
                     self._advance()
-                yield Token("NUMBER", num, start_line, start_col)
+                yield Token("NUMBER", num, start_line, start_col, K_NUMBER, int(num))
                 continue
 
             # Identifier or keyword
@@ -151,27 +208,29 @@ class Lexer:
                 ):
                     ident += text[self.pos]
                     self._advance()
-                token_type = "KEYWORD" if ident in self.KEYWORDS else "IDENTIFIER"
-                yield Token(token_type, ident, start_line, start_col)
+                if ident in self.KEYWORDS:
+                    yield Token("KEYWORD", ident, start_line, start_col, _KEYWORD_KINDS.get(ident, -1))
+                else:
+                    yield Token("IDENTIFIER", ident, start_line, start_col, K_IDENTIFIER)
                 continue
 
             # Two-character operators
             two = ch + self._peek()
             if two in self.OPERATORS:
                 self._advance(2)
-                yield Token("OPERATOR", two, start_line, start_col)
+                yield Token("OPERATOR", two, start_line, start_col, _OPERATOR_KINDS[two])
                 continue
 
             # Single-character operators
             if ch in self.OPERATORS:
                 self._advance()
-                yield Token("OPERATOR", ch, start_line, start_col)
+                yield Token("OPERATOR", ch, start_line, start_col, _OPERATOR_KINDS[ch])
                 continue
 
             # Punctuation
             if ch in self.SINGLE_CHARS:
                 self._advance()
-                yield Token(ch, ch, start_line, start_col)
+                yield Token(ch, ch, start_line, start_col, _PUNCT_KINDS[ch])
                 continue
 
             raise SyntaxError(
@@ -3,9 +3,18 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Iterator
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from .lexer import Lexer, Token
+from .lexer import (
+    KIND_NAMES,
+    K_AND, K_ASSIGN, K_COMMA, K_CONST, K_ELSE, K_EOF, K_EQ, K_FOR, K_FUNCTION,
+    K_GE, K_GT, K_IDENTIFIER, K_IF, K_LBRACE, K_LE, K_LET, K_LPAREN, K_LT,
+    K_MINUS, K_NE, K_NOT, K_NUMBER, K_OR, K_PLUS, K_PRINT, K_RBRACE,
+    K_RETURN, K_RPAREN, K_SEMI, K_SLASH, K_STAR, K_STRING, K_WHILE,
+    Lexer,
+    Token,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -15,63 +24,71 @@ from .lexer import Lexer, Token
 class Node:
     """Base class for all AST nodes."""
 
-    def accept(self, visitor: "NodeVisitor") -> Iterator:
-        method = getattr(visitor, f"visit_{self.__class__.__name__}", None)
-        if method is None:
-            yield from visitor.generic_visit(self)
-        else:
-            yield from method(self)
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ProgramNode(Node):
     body: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionNode(Node):
     name: str
     params: List[str]
     body: 'BlockNode'
 
 
-@dataclass
+@dataclass(slots=True)
 class VariableNode(Node):
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class LiteralNode(Node):
     value: object
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOpNode(Node):
     left: Node
     operator: str
     right: Node
 
 
-@dataclass
+@dataclass(slots=True)
+class BinaryOpChainNode(Node):
+    """Left-associative run of same-precedence operators.
+
+    ``operands[0] operators[0] operands[1] operators[1] ...`` evaluates as
+    the left-deep ``BinaryOpNode`` tree it replaces, which keeps long chains
+    flat instead of nesting one level per operator.
+    """
+
+    operands: List[Node]
+    operators: List[str]
+
+
+@dataclass(slots=True)
 class UnaryOpNode(Node):
     operator: str
     operand: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class IfNode(Node):
     condition: Node
     then_branch: Node
     else_branch: Optional[Node] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileNode(Node):
     condition: Node
     body: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class ForNode(Node):
     init: Optional[Node]
     condition: Optional[Node]
@@ -79,35 +96,35 @@ class ForNode(Node):
     body: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnNode(Node):
     value: Optional[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class CallNode(Node):
     callee: Node
     args: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentNode(Node):
     target: VariableNode
     value: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class VarDeclNode(Node):
     name: str
     initializer: Optional[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionStatement(Node):
     expression: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class BlockNode(Node):
     statements: List[Node]
 
@@ -116,22 +133,105 @@ class BlockNode(Node):
 # Visitor helper
 # ---------------------------------------------------------------------------
 
+# Fields of each node type that hold child nodes, in source order.
+_CHILDREN: Dict[type, Tuple[str, ...]] = {
+    ProgramNode: ("body",),
+    FunctionNode: ("body",),
+    VariableNode: (),
+    LiteralNode: (),
+    BinaryOpNode: ("left", "right"),
+    BinaryOpChainNode: ("operands",),
+    UnaryOpNode: ("operand",),
+    IfNode: ("condition", "then_branch", "else_branch"),
+    WhileNode: ("condition", "body"),
+    ForNode: ("init", "condition", "increment", "body"),
+    ReturnNode: ("value",),
+    CallNode: ("callee", "args"),
+    AssignmentNode: ("target", "value"),
+    VarDeclNode: ("initializer",),
+    ExpressionStatement: ("expression",),
+    BlockNode: ("statements",),
+}
+
+
+def iter_children(node: Node) -> List[Node]:
+    """Return the direct children of ``node`` in source order."""
+    children: List[Node] = []
+    for name in _CHILDREN.get(type(node), ()):
+        value = getattr(node, name)
+        if isinstance(value, Node):
+            children.append(value)
+        elif isinstance(value, list):
+            children.extend(item for item in value if isinstance(item, Node))
+    return children
+
+
+def walk(root: Node) -> Iterator[Node]:
+    """Yield ``root`` and all nodes below it in pre-order, without recursion."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(iter_children(node)))
+
+
 class NodeVisitor:
-    def generic_visit(self, node: Node) -> Iterator:
-        for field in getattr(node, '__dataclass_fields__', {}):
-            value = getattr(node, field)
-            if isinstance(value, Node):
-                yield from value.accept(self)
-            elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, Node):
-                        yield from item.accept(self)
+    """Dispatch AST nodes to ``visit_<NodeClass>`` methods."""
+
+    def dispatch_table(self) -> Dict[type, Callable[[Any], Any]]:
+        """Map each node type to this visitor's bound ``visit_*`` method.
+
+        Visitors build the table once and index it by ``type(node)``
+        instead of formatting and looking up a method name per node.
+        """
+        table: Dict[type, Callable[[Any], Any]] = {}
+        for node_type in _CHILDREN:
+            method = getattr(self, "visit_" + node_type.__name__, None)
+            if method is not None:
+                table[node_type] = method
+        return table
+
+    def visit(self, node: Node) -> Any:
+        method = self.__dict__.get("_dispatch")
+        if method is None:
+            method = self._dispatch = self.dispatch_table()
+        handler = method.get(type(node))
+        if handler is None:
+            return self.generic_visit(node)
+        return handler(node)
+
+    def generic_visit(self, node: Node) -> None:
+        for child in iter_children(node):
+            self.visit(child)
 
 
 # ---------------------------------------------------------------------------
 # Parser
 # ---------------------------------------------------------------------------
 
+# Binding power of each binary operator kind; higher binds tighter.
+_PREC: Dict[int, int] = {
+    K_OR: 1,
+    K_AND: 2,
+    K_EQ: 3, K_NE: 3,
+    K_LT: 4, K_LE: 4, K_GT: 4, K_GE: 4,
+    K_PLUS: 5, K_MINUS: 5,
+    K_STAR: 6, K_SLASH: 6,
+}
+_DECL_KINDS = (K_LET, K_CONST)
+_UNARY_KINDS = (K_NOT, K_MINUS)
+_EOF = Token("EOF", "", -1, -1, K_EOF)
+
+
+def _binary_node(operands: List[Node], operators: List[str]) -> Node:
+    """Build the node for ``operands`` joined left to right by ``operators``."""
+    if not operators:
+        return operands[0]
+    if len(operators) == 1:
+        return BinaryOpNode(operands[0], operators[0], operands[1])
+    return BinaryOpChainNode(operands, operators)
+
+
 class Parser:
     """Recursive descent parser producing an AST."""
 
@@ -139,17 +239,27 @@ class Parser:
         self.tokens = tokens
         self.pos = 0
         self.scopes: List[Dict[str, object]] = [{}]
+        # Source text when built by ``from_text``; lets ``parse`` reuse the
+        # memoized tree for text it has seen before.
+        self._source: Optional[str] = None
 
     @classmethod
     def from_text(cls, text: str) -> 'Parser':
-        lexer = Lexer(text)
-        tokens = list(lexer.tokenize())
-        return cls(tokens)
+        parser = cls(list(_lex_cached(text)))
+        if cls is Parser:
+            parser._source = text
+        return parser
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop the memoized token lists and trees of ``from_text``."""
+        _lex_cached.cache_clear()
+        _parse_cached.cache_clear()
 
     # ---- basic helpers -------------------------------------------------
     def _peek(self) -> Token:
         if self.pos >= len(self.tokens):
-            return Token("EOF", "", -1, -1)
+            return _EOF
         return self.tokens[self.pos]
 
     def _advance(self) -> Token:
@@ -157,30 +267,30 @@ class Parser:
         self.pos += 1
         return tok
 
-    def _check(self, type_: str, value: Optional[str] = None) -> bool:
-        tok = self._peek()
-        if tok.type != type_:
-            return False
-        if value is not None and tok.value != value:
-            return False
-        return True
-
-    def _match(self, type_: str, value: Optional[str] = None) -> bool:
-        if self._check(type_, value):
-            self._advance()
+    def _check(self, kind: int) -> bool:
+        return self._peek().kind == kind
+
+    def _match(self, kind: int) -> bool:
+        if self.pos < len(self.tokens) and self.tokens[self.pos].kind == kind:
+            self.pos += 1
             return True
         return False
 
-    def _match_keyword(self, kw: str) -> bool:
-        return self._match("KEYWORD", kw)
+    def _match_in(self, kinds: Tuple[int, ...]) -> Optional[Token]:
+        """Consume and return the next token if its kind is in ``kinds``."""
+        if self.pos < len(self.tokens):
+            tok = self.tokens[self.pos]
+            if tok.kind in kinds:
+                self.pos += 1
+                return tok
+        return None
 
-    def _expect(self, type_: str, value: Optional[str] = None) -> Token:
-        if not self._check(type_, value):
-            tok = self._peek()
-            raise SyntaxError(
-                f"Expected {type_}{' ' + value if value else ''} at line {tok.line}"
-            )
-        return self._advance()
+    def _expect(self, kind: int) -> Token:
+        tok = self._peek()
+        if tok.kind != kind:
+            raise SyntaxError(f"Expected {KIND_NAMES[kind]} at line {tok.line}")
+        self.pos += 1
+        return tok
 
     def _at_end(self) -> bool:
         return self.pos >= len(self.tokens)
@@ -193,6 +303,14 @@ class Parser:
 
     # ---- parsing entry points -----------------------------------------
     def parse(self) -> ProgramNode:
+        """Parse the whole token list.
+
+        Parsers from ``from_text`` return a tree shared by every parse of the
+        same text; callers must treat it as immutable.
+        """
+        if self._source is not None and self.pos == 0:
+            self.pos = len(self.tokens)
+            return _parse_cached(self._source)
         return self.parse_program()
 
     def parse_program(self) -> ProgramNode:
@@ -202,23 +320,24 @@ class Parser:
         return ProgramNode(body)
 
     def parse_declaration(self) -> Node:
-        if self._match_keyword("function"):
+        if self._match(K_FUNCTION):
             return self.parse_function()
-        if self._match_keyword("var") or self._match_keyword("let") or self._match_keyword("const"):
-            return self.parse_var_decl(self.tokens[self.pos - 1].value)
+        tok = self._match_in(_DECL_KINDS)
+        if tok is not None:
+            return self.parse_var_decl(tok.value)
         return self.parse_statement()
 
     def parse_function(self) -> FunctionNode:
-        name = self._expect("IDENTIFIER").value
-        self._expect("(")
+        name = self._expect(K_IDENTIFIER).value
+        self._expect(K_LPAREN)
         params: List[str] = []
-        if not self._check(")"):
+        if not self._check(K_RPAREN):
             while True:
-                param = self._expect("IDENTIFIER").value
+                param = self._expect(K_IDENTIFIER).value
                 params.append(param)
-                if not self._match(","):
+                if not self._match(K_COMMA):
                     break
-        self._expect(")")
+        self._expect(K_RPAREN)
         self.scopes[-1][name] = True
         self.push_scope()
         for p in params:
@@ -228,83 +347,83 @@ class Parser:
         return FunctionNode(name, params, body)
 
     def parse_var_decl(self, keyword: str) -> VarDeclNode:
-        name = self._expect("IDENTIFIER").value
+        name = self._expect(K_IDENTIFIER).value
         init: Optional[Node] = None
-        if self._match("="):
+        if self._match(K_ASSIGN):
             init = self.parse_expression()
-        self._expect(";")
+        self._expect(K_SEMI)
         self.scopes[-1][name] = True
         return VarDeclNode(name, init)
 
     # ---- statements ----------------------------------------------------
     def parse_statement(self) -> Node:
-        if self._match_keyword("if"):
+        if self._match(K_IF):
             return self.parse_if()
-        if self._match_keyword("while"):
+        if self._match(K_WHILE):
             return self.parse_while()
-        if self._match_keyword("for"):
+        if self._match(K_FOR):
             return self.parse_for()
-        if self._match_keyword("return"):
+        if self._match(K_RETURN):
             return self.parse_return()
-        if self._match("{"):
+        if self._match(K_LBRACE):
             return self.parse_block()
         return self.parse_expression_statement()
 
     def parse_block(self) -> BlockNode:
         statements: List[Node] = []
-        while not self._check("}"):
+        while not self._check(K_RBRACE):
             statements.append(self.parse_declaration())
-        self._expect("}")
+        self._expect(K_RBRACE)
         return BlockNode(statements)
 
     def parse_if(self) -> IfNode:
-        self._expect("(")
+        self._expect(K_LPAREN)
         cond = self.parse_expression()
-        self._expect(")")
+        self._expect(K_RPAREN)
         then_branch = self.parse_statement()
         else_branch = None
-        if self._match_keyword("else"):
+        if self._match(K_ELSE):
             else_branch = self.parse_statement()
         return IfNode(cond, then_branch, else_branch)
 
     def parse_while(self) -> WhileNode:
-        self._expect("(")
+        self._expect(K_LPAREN)
         cond = self.parse_expression()
-        self._expect(")")
+        self._expect(K_RPAREN)
         body = self.parse_statement()
         return WhileNode(cond, body)
 
     def parse_for(self) -> ForNode:
-        self._expect("(")
+        self._expect(K_LPAREN)
         init: Optional[Node] = None
-        if not self._check(";"):
-            if self._check("KEYWORD", "var") or self._check("KEYWORD", "let") or self._check("KEYWORD", "const"):
+        if not self._check(K_SEMI):
+            if self._peek().kind in _DECL_KINDS:
                 init = self.parse_declaration()
             else:
                 init = self.parse_expression_statement()
         else:
-            self._expect(";")
+            self._expect(K_SEMI)
         cond: Optional[Node] = None
-        if not self._check(";"):
+        if not self._check(K_SEMI):
             cond = self.parse_expression()
-        self._expect(";")
+        self._expect(K_SEMI)
         inc: Optional[Node] = None
-        if not self._check(")"):
+        if not self._check(K_RPAREN):
             inc = self.parse_expression()
-        self._expect(")")
+        self._expect(K_RPAREN)
         body = self.parse_statement()
         return ForNode(init, cond, inc, body)
 
     def parse_return(self) -> ReturnNode:
         value: Optional[Node] = None
-        if not self._check(";"):
+        if not self._check(K_SEMI):
             value = self.parse_expression()
-        self._expect(";")
+        self._expect(K_SEMI)
         return ReturnNode(value)
 
     def parse_expression_statement(self) -> ExpressionStatement:
         expr = self.parse_expression()
-        self._expect(";")
+        self._expect(K_SEMI)
         return ExpressionStatement(expr)
 
     # ---- expressions ---------------------------------------------------
@@ -312,98 +431,89 @@ class Parser:
         return self.parse_assignment()
 
     def parse_assignment(self) -> Node:
-        expr = self.parse_logic_or()
-        if self._match("="):
+        expr = self._parse_binary()
+        if self._match(K_ASSIGN):
             if not isinstance(expr, VariableNode):
                 raise SyntaxError("Invalid assignment target")
             value = self.parse_assignment()
             return AssignmentNode(expr, value)
         return expr
 
-    def parse_logic_or(self) -> Node:
-        expr = self.parse_logic_and()
-        while self._match("OPERATOR", "||"):
-            op = self.tokens[self.pos - 1].value
-            right = self.parse_logic_and()
-            expr = BinaryOpNode(expr, op, right)
-        return expr
-
-    def parse_logic_and(self) -> Node:
-        expr = self.parse_equality()
-        while self._match("OPERATOR", "&&"):
-            op = self.tokens[self.pos - 1].value
-            right = self.parse_equality()
-            expr = BinaryOpNode(expr, op, right)
-        return expr
-
-    def parse_equality(self) -> Node:
-        expr = self.parse_comparison()
-        while self._match("OPERATOR", "==") or self._match("OPERATOR", "!="):
-            op = self.tokens[self.pos - 1].value
-            right = self.parse_comparison()
-            expr = BinaryOpNode(expr, op, right)
-        return expr
-
-    def parse_comparison(self) -> Node:
-        expr = self.parse_term()
-        while self._match("OPERATOR", "<") or self._match("OPERATOR", "<=") or self._match("OPERATOR", ">") or self._match("OPERATOR", ">="):
-            op = self.tokens[self.pos - 1].value
-            right = self.parse_term()
-            expr = BinaryOpNode(expr, op, right)
-        return expr
-
-    def parse_term(self) -> Node:
-        expr = self.parse_factor()
-        while self._match("OPERATOR", "+") or self._match("OPERATOR", "-"):
-            op = self.tokens[self.pos - 1].value
-            right = self.parse_factor()
-            expr = BinaryOpNode(expr, op, right)
-        return expr
-
-    def parse_factor(self) -> Node:
-        expr = self.parse_unary()
-        while self._match("OPERATOR", "*") or self._match("OPERATOR", "/") or self._match("OPERATOR", "%"):
-            op = self.tokens[self.pos - 1].value
-            right = self.parse_unary()
-            expr = BinaryOpNode(expr, op, right)
-        return expr
+    def _parse_binary(self, min_prec: int = 1) -> Node:
+        """Parse binary operators binding at least as tightly as ``min_prec``.
+
+        Precedence climbing over ``_PREC``: an operand costs one call and
+        each operator one loop iteration, rather than a descent through a
+        method per precedence level. All binary operators are left
+        associative; runs of two or more operators at one precedence are
+        collected into a single ``BinaryOpChainNode``.
+        """
+        operands = [self.parse_unary()]
+        operators: List[str] = []
+        chain_prec = 0
+        while True:
+            tok = self._peek()
+            prec = _PREC.get(tok.kind, 0)
+            if prec < min_prec:
+                return _binary_node(operands, operators)
+            self.pos += 1
+            right = self._parse_binary(prec + 1)
+            # ``right`` absorbed every tighter operator, so precedence only
+            # stays level or drops; a drop closes the current chain.
+            if operators and prec != chain_prec:
+                operands = [_binary_node(operands, operators)]
+                operators = []
+            chain_prec = prec
+            operands.append(right)
+            operators.append(tok.value)
 
     def parse_unary(self) -> Node:
-        if self._match("OPERATOR", "!") or self._match("OPERATOR", "-"):
-            op = self.tokens[self.pos - 1].value
-            operand = self.parse_unary()
-            return UnaryOpNode(op, operand)
+        tok = self._match_in(_UNARY_KINDS)
+        if tok is not None:
+            return UnaryOpNode(tok.value, self.parse_unary())
         return self.parse_call()
 
     def parse_call(self) -> Node:
         expr = self.parse_primary()
-        while self._match("("):
+        while self._match(K_LPAREN):
             args: List[Node] = []
-            if not self._check(")"):
+            if not self._check(K_RPAREN):
                 while True:
                     args.append(self.parse_expression())
-                    if not self._match(","):
+                    if not self._match(K_COMMA):
                         break
-            self._expect(")")
+            self._expect(K_RPAREN)
             expr = CallNode(expr, args)
         return expr
 
     def parse_primary(self) -> Node:
         tok = self._peek()
-        if tok.type == "NUMBER":
+        kind = tok.kind
+        if kind == K_NUMBER:
             self._advance()
-            return LiteralNode(int(tok.value))
-        if tok.type == "STRING":
+            value = tok.numeric
+            return LiteralNode(int(tok.value) if value is None else value)
+        if kind == K_STRING:
             self._advance()
             return LiteralNode(tok.value)
-        if tok.type == "IDENTIFIER":
+        if kind == K_IDENTIFIER or kind == K_PRINT:
             self._advance()
             return VariableNode(tok.value)
-        if self._match("("):
+        if self._match(K_LPAREN):
             expr = self.parse_expression()
-            self._expect(")")
+            self._expect(K_RPAREN)
             return expr
         raise SyntaxError(
             f"Unexpected token {tok.type} {tok.value!r} at line {tok.line}"
         )
 
+
+
+@lru_cache(maxsize=1024)
+def _lex_cached(text: str) -> Tuple[Token, ...]:
+    return tuple(Lexer(text).tokenize())
+
+
+@lru_cache(maxsize=1024)
+def _parse_cached(text: str) -> ProgramNode:
+    return Parser(list(_lex_cached(text))).parse_program()
@@ -1,19 +1,16 @@
 """Debugging utilities for the UOR VM."""
 from __future__ import annotations
 
-from typing import Dict, List, Iterator, Optional, Set, Tuple
+from typing import Callable, Dict, List, Iterator, Optional, Set, Tuple
 import time
 
-from vm import VM
+from vm import VM, ntt_roundtrip
 from uor.debugger import CallStackTracker
+from uor import vm_core
 from decoder import DecodedInstruction
 from chunks import (
     OP_LOAD,
     OP_STORE,
-    BLOCK_TAG,
-    NTT_TAG,
-    T_MOD,
-    NTT_ROOT,
 )
 from primes import _PRIME_IDX
 from uor.exceptions import InvalidOpcodeError
@@ -29,10 +26,26 @@ class DebugVM(VM):
         self.watchpoints: Dict[int, str] = {}
         self.tracing: bool = False
         self._step_mode: bool = False
+        # ``(program, code, addrs)`` of the last program encoded for ``vm_core``.
+        self._native: Optional[Tuple[List[DecodedInstruction], object, List[int]]] = None
 
         # override dispatch for load/store to watch memory
         self._dispatch[OP_LOAD] = self._op_load
         self._dispatch[OP_STORE] = self._op_store
+        # Opcodes are small primes, so a list indexed by opcode replaces the
+        # dict lookup in ``execute``; rebuild it if ``_dispatch`` changes.
+        self._dispatch_arr: List[Optional[Callable]] = [None] * (max(self._dispatch) + 1)
+        for op, handler in self._dispatch.items():
+            self._dispatch_arr[op] = handler
+
+    def reset(self) -> None:
+        super().reset()
+        if self.call_stack_tracker is not None:
+            self.call_stack_tracker.clear()
+        self.breakpoints.clear()
+        self.watchpoints.clear()
+        self.tracing = False
+        self._step_mode = False
 
     # ------------------------------------------------------------------
     # Breakpoints / watchpoints setup
@@ -67,7 +80,7 @@ class DebugVM(VM):
         if self.call_stack_tracker is None:
             return ""
         lines = []
-        for idx, frame in enumerate(self.call_stack_tracker.backtrace()):
+        for idx, frame in enumerate(self.call_stack_tracker.iter_backtrace()):
             lines.append(f"#{idx} call@{frame.call_site} -> {frame.return_ip}")
         return "\n".join(lines)
 
@@ -79,10 +92,17 @@ class DebugVM(VM):
     ) -> Iterator[str]:
         if not resume:
             self.ip = 0
-        self._program_len = len(program)
+        self._program = program
+        out = self._out
+        out.clear()
         if self.profiler:
             self.profiler.reset()
+        native = self._native_code(program)
         while self.ip < len(program):
+            if not self._observed():
+                yield from self._execute_fast(program, native)
+                continue
+
             if self.ip in self.breakpoints or self._step_mode:
                 bp = self.ip
                 self._step_mode = False
@@ -103,6 +123,9 @@ class DebugVM(VM):
                     yield from block(self)
                     duration = time.perf_counter() - start_t
                     self.executed_instructions += 1
+                    if out:
+                        yield from out
+                        out.clear()
                     if self.profiler:
                         self.profiler.record_instruction(ip_before, None, duration, cache_hit=True)
                     if self.checkpoint_policy and self.checkpoint_policy.should_checkpoint(self):
@@ -121,11 +144,10 @@ class DebugVM(VM):
                     self._compiled[self.ip] = (block, time.time() + self._jit.ttl)
 
             self.ip += 1
-            data = instr.data
 
-            if any(p == BLOCK_TAG and e == 7 for p, e in data):
+            if instr.is_block:
                 start_t = time.perf_counter()
-                yield from DebugVM().execute(instr.inner or [])
+                yield from self._run_child(instr.inner or [])
                 duration = time.perf_counter() - start_t
                 self.executed_instructions += 1
                 if self.profiler:
@@ -134,36 +156,14 @@ class DebugVM(VM):
                     self.checkpoint()
                 continue
 
-            if any(p == NTT_TAG and e == 4 for p, e in data):
+            if instr.is_ntt:
                 inner = instr.inner or []
                 vec = [next((e2 for _, e2 in i.data if e2 > 0), 0) for i in inner]
                 n = len(vec)
                 if n:
-                    root = pow(NTT_ROOT, (T_MOD - 1) // n, T_MOD)
-
-                    def _ntt(values: List[int]) -> List[int]:
-                        res = []
-                        for i in range(n):
-                            acc = 0
-                            for j, v in enumerate(values):
-                                acc = (acc + v * pow(root, (i * j) % n, T_MOD)) % T_MOD
-                            res.append(acc)
-                        return res
-
-                    def _intt(values: List[int]) -> List[int]:
-                        inv_root = pow(root, T_MOD - 2, T_MOD)
-                        inv_n = pow(n, T_MOD - 2, T_MOD)
-                        res = []
-                        for i in range(n):
-                            acc = 0
-                            for j, v in enumerate(values):
-                                acc = (acc + v * pow(inv_root, (i * j) % n, T_MOD)) % T_MOD
-                            res.append((acc * inv_n) % T_MOD)
-                        return res
-
-                    vec = _intt(_ntt(vec))
+                    vec = ntt_roundtrip(vec)
                 start_t = time.perf_counter()
-                yield from DebugVM().execute(inner)
+                yield from self._run_child(inner)
                 duration = time.perf_counter() - start_t
                 self.executed_instructions += 1
                 if self.profiler:
@@ -172,22 +172,25 @@ class DebugVM(VM):
                     self.checkpoint()
                 continue
 
-            exps = {e for _, e in data}
-            if 4 in exps:
-                op = next(p for p, e in data if e == 4)
-                handler = self._dispatch.get(op)
+            op = instr.op
+            if op is not None:
+                dispatch = self._dispatch_arr
+                handler = dispatch[op] if op < len(dispatch) else None
                 if handler is None:
                     raise InvalidOpcodeError("Unknown opcode", self.ip - 1)
                 start_t = time.perf_counter()
-                yield from handler(data)
+                handler(instr)
                 duration = time.perf_counter() - start_t
                 self.executed_instructions += 1
+                if out:
+                    yield from out
+                    out.clear()
                 if self.profiler:
                     self.profiler.record_instruction(ip_before, op, duration)
                 if self.checkpoint_policy and self.checkpoint_policy.should_checkpoint(self):
                     self.checkpoint()
             else:
-                p_chr = next((p for p, e in data if e in (2, 3)), None)
+                p_chr = instr.print_prime
                 if p_chr is None:
                     raise ValueError("Bad data")
                 start_t = time.perf_counter()
@@ -199,20 +202,102 @@ class DebugVM(VM):
                 if self.checkpoint_policy and self.checkpoint_policy.should_checkpoint(self):
                     self.checkpoint()
 
+    def _observed(self) -> bool:
+        """Return whether any breakpoint, watchpoint, trace or hook is active."""
+        return bool(
+            self.breakpoints
+            or self.watchpoints
+            or self.tracing
+            or self.profiler
+            or self.checkpoint_policy
+            or self._step_mode
+        )
+
+    def _execute_fast(
+        self, program: List[DecodedInstruction], native: Optional[Tuple[object, List[int]]]
+    ) -> Iterator[str]:
+        """Run ``program`` without debugging hooks while nothing observes it.
+
+        Skips timing, profiling, checkpoints and the per-instruction JIT.
+        Debugger state can only change while the caller holds a yielded
+        value, so ``_observed`` is rechecked after each yield and the
+        generator returns to let ``execute`` take over.
+        """
+        out = self._out
+        dispatch = self._dispatch_arr
+        size = len(dispatch)
+        # Rows the compiled loop can start on; ``enter`` would run 0 steps
+        # from any other.
+        runnable = (native[0][:, 0] != vm_core.K_STOP).tolist() if native is not None else None
+        # The stack holds only int64 values right after a native run.
+        stack_checked = False
+        while self.ip < len(program):
+            if runnable is not None and runnable[self.ip]:
+                steps, printed = vm_core.enter(self, *native, stack_checked)
+                if steps:
+                    self.executed_instructions += steps
+                    stack_checked = True
+                    if printed is not None:
+                        yield str(printed)
+                        if self._observed():
+                            return
+                    continue
+            stack_checked = False
+            instr = program[self.ip]
+            self.ip += 1
+            if instr.is_block or instr.is_ntt:
+                inner = instr.inner or []
+                if instr.is_ntt and inner:
+                    ntt_roundtrip([next((e for _, e in i.data if e > 0), 0) for i in inner])
+                yield from self._run_child(inner)
+                self.executed_instructions += 1
+            elif instr.op is not None:
+                op = instr.op
+                handler = dispatch[op] if op < size else None
+                if handler is None:
+                    raise InvalidOpcodeError("Unknown opcode", self.ip - 1)
+                handler(instr)
+                self.executed_instructions += 1
+                if not out:
+                    continue
+                yield from out
+                out.clear()
+            else:
+                p_chr = instr.print_prime
+                if p_chr is None:
+                    raise ValueError("Bad data")
+                yield chr(_PRIME_IDX[p_chr])
+                self.executed_instructions += 1
+            if self._observed():
+                return
+
+    def _native_code(
+        self, program: List[DecodedInstruction]
+    ) -> Optional[Tuple[object, List[int]]]:
+        """Return the ``vm_core`` encoding of ``program`` if Numba is available.
+
+        With nothing to observe, ``execute`` hands runs of integer-only
+        instructions to the compiled loop and keeps the Python loop for the
+        rest.
+        """
+        if not vm_core.NUMBA_AVAILABLE:
+            return None
+        if self._native is None or self._native[0] is not program:
+            self._native = (program, *vm_core.encode(program))
+        return self._native[1:]
+
     # ------------------------------------------------------------------
     # Watchpoint-aware opcode handlers
     # ------------------------------------------------------------------
-    def _op_load(self, data):
-        addr_p = next(p for p, e in data if e == 5)
-        addr = _PRIME_IDX[addr_p]
+    def _op_load(self, instr):
+        addr = self._addr(instr)
         if addr in self.watchpoints and "r" in self.watchpoints[addr]:
-            yield f"WATCH:{addr}:read"
-        yield from super()._op_load(data)
+            self._out.append(f"WATCH:{addr}:read")
+        super()._op_load(instr)
 
-    def _op_store(self, data):
-        addr_p = next(p for p, e in data if e == 5)
-        addr = _PRIME_IDX[addr_p]
+    def _op_store(self, instr):
+        addr = self._addr(instr)
         if addr in self.watchpoints and "w" in self.watchpoints[addr]:
-            yield f"WATCH:{addr}:write"
-        yield from super()._op_store(data)
+            self._out.append(f"WATCH:{addr}:write")
+        super()._op_store(instr)
 
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 
 @dataclass
@@ -12,27 +13,51 @@ class CallFrame:
 
 
 class CallStackTracker:
-    """Track call/return events for backtraces."""
+    """Track call/return events for backtraces.
+
+    Frames are kept as two parallel ``array('q')`` columns rather than one
+    ``CallFrame`` per call; ``CallFrame`` objects are only built when frames
+    are read back.
+    """
 
     def __init__(self) -> None:
-        self.frames: List[CallFrame] = []
+        self.call_sites = array("q")
+        self.return_ips = array("q")
+
+    @property
+    def frames(self) -> List[CallFrame]:
+        """The current frames, oldest first."""
+        return [CallFrame(c, r) for c, r in zip(self.call_sites, self.return_ips)]
 
     def push(self, call_site: int, return_ip: int) -> None:
         """Push a new frame onto the call stack."""
-        self.frames.append(CallFrame(call_site, return_ip))
+        self.call_sites.append(call_site)
+        self.return_ips.append(return_ip)
 
     def pop(self) -> Optional[CallFrame]:
         """Pop the most recent frame, if any."""
-        if not self.frames:
+        if not self.call_sites:
             return None
-        return self.frames.pop()
+        return CallFrame(self.call_sites.pop(), self.return_ips.pop())
+
+    def drop(self) -> None:
+        """Pop the most recent frame, if any, without returning it."""
+        if self.call_sites:
+            self.call_sites.pop()
+            self.return_ips.pop()
+
+    def iter_backtrace(self) -> Iterator[CallFrame]:
+        """Yield the current frames newest first."""
+        for idx in range(len(self.call_sites) - 1, -1, -1):
+            yield CallFrame(self.call_sites[idx], self.return_ips[idx])
 
     def backtrace(self) -> List[CallFrame]:
         """Return the current backtrace (newest frame first)."""
-        return list(reversed(self.frames))
+        return list(self.iter_backtrace())
 
     def clear(self) -> None:
-        self.frames.clear()
+        del self.call_sites[:]
+        del self.return_ips[:]
 
     def __len__(self) -> int:  # pragma: no cover - trivial
-        return len(self.frames)
+        return len(self.call_sites)
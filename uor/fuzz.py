@@ -1,28 +1,45 @@
 from __future__ import annotations
 
 import random
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
 
 import chunks
 
 
+@lru_cache(maxsize=1)
+def _instruction_table() -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Return every chunk the fuzzer emits and its cumulative weights.
+
+    Each of the seven operations is equally likely and operands are then
+    uniform, so with 11 PUSH values and 4 addresses integer weights of 44
+    per operation split evenly across its operands.
+    """
+    entries = [(chunks.chunk_push(v), 4) for v in range(11)]
+    entries += [(chunks.chunk_add(), 44), (chunks.chunk_sub(), 44), (chunks.chunk_mul(), 44)]
+    entries += [(chunks.chunk_load(a), 11) for a in range(4)]
+    entries += [(chunks.chunk_store(a), 11) for a in range(4)]
+    entries.append((chunks.chunk_print(), 44))
+    cum: List[int] = []
+    total = 0
+    for _, weight in entries:
+        total += weight
+        cum.append(total)
+    return tuple(chunk for chunk, _ in entries), tuple(cum)
+
+
 def random_instruction() -> int:
     """Return a random instruction chunk."""
-    ops = [
-        lambda: chunks.chunk_push(random.randint(0, 10)),
-        chunks.chunk_add,
-        chunks.chunk_sub,
-        chunks.chunk_mul,
-        lambda: chunks.chunk_load(random.randint(0, 3)),
-        lambda: chunks.chunk_store(random.randint(0, 3)),
-        chunks.chunk_print,
-    ]
-    op = random.choice(ops)
-    return op() if callable(op) else op()
+    return random_program(1)[0]
 
 
 def random_program(length: int = 5) -> List[int]:
-    """Generate a random program of ``length`` instructions."""
-    return [random_instruction() for _ in range(length)]
+    """Generate a random program of ``length`` instructions.
+
+    All instructions are drawn in one ``random.choices`` call from the
+    precomputed chunk table instead of encoding each one separately.
+    """
+    population, cum_weights = _instruction_table()
+    return random.choices(population, cum_weights=cum_weights, k=length)
 
 __all__ = ["random_program"]
@@ -2,35 +2,76 @@
 from __future__ import annotations
 
 import asyncio
+import threading
+from contextlib import ExitStack
+from typing import Iterable, List
 
 try:
     import ipfshttpclient  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover - optional dependency not installed
     ipfshttpclient = None
 
+# One open client session per thread; ``to_thread`` workers each keep their
+# own, so a client is never shared across threads.
+_local = threading.local()
+
 
 def _require_client() -> None:
     if ipfshttpclient is None:
         raise RuntimeError("ipfshttpclient is not installed")
 
 
+def _client():
+    client = getattr(_local, "client", None)
+    if client is None:
+        # Enter the client once and keep its session open instead of
+        # connecting inside a ``with`` block on every call.
+        stack = ExitStack()
+        client = stack.enter_context(ipfshttpclient.connect())  # type: ignore[attr-defined]
+        _local.client, _local.stack = client, stack
+    return client
+
+
+def _drop_client() -> None:
+    """Close this thread's client after an error so the next call reconnects."""
+    stack = getattr(_local, "stack", None)
+    _local.client = _local.stack = None
+    if stack is not None:
+        try:
+            stack.close()
+        except Exception:
+            pass
+
+
 def add_data(data: bytes) -> str:
     """Add ``data`` to IPFS and return its CID."""
+    return add_many([data])[0]
+
+
+def get_data(cid: str) -> bytes:
+    """Retrieve data from IPFS by ``cid``."""
+    return get_many([cid])[0]
+
+
+def add_many(blobs: Iterable[bytes]) -> List[str]:
+    """Add each blob in ``blobs`` to IPFS over one connection and return the CIDs."""
     _require_client()
     try:
-        with ipfshttpclient.connect() as client:  # type: ignore[attr-defined]
-            return client.add_bytes(data)
+        client = _client()
+        return [client.add_bytes(data) for data in blobs]
     except Exception as exc:  # ipfshttpclient errors are broad
+        _drop_client()
         raise RuntimeError("Failed to add data to IPFS") from exc
 
 
-def get_data(cid: str) -> bytes:
-    """Retrieve data from IPFS by ``cid``."""
+def get_many(cids: Iterable[str]) -> List[bytes]:
+    """Retrieve the data for each of ``cids`` over one connection."""
     _require_client()
     try:
-        with ipfshttpclient.connect() as client:  # type: ignore[attr-defined]
-            return client.cat(cid)
+        client = _client()
+        return [client.cat(cid) for cid in cids]
     except Exception as exc:
+        _drop_client()
         raise RuntimeError("Failed to fetch data from IPFS") from exc
 
 
@@ -42,3 +83,31 @@ async def async_add_data(data: bytes) -> str:
 async def async_get_data(cid: str) -> bytes:
     """Asynchronously retrieve data from IPFS by ``cid``."""
     return await asyncio.to_thread(get_data, cid)
+
+
+async def _gather_bounded(func, items: Iterable, concurrency: int) -> list:
+    """Run ``func`` on each item in worker threads, at most ``concurrency`` at once."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(item):
+        async with sem:
+            return await asyncio.to_thread(func, item)
+
+    return list(await asyncio.gather(*(one(item) for item in items)))
+
+
+async def async_add_many(blobs: Iterable[bytes], concurrency: int = 16) -> List[str]:
+    """Asynchronously add ``blobs`` to IPFS and return their CIDs in order.
+
+    Up to ``concurrency`` uploads run at once, each on a worker thread with
+    its own persistent client, so network latency overlaps across blobs.
+    """
+    return await _gather_bounded(add_data, blobs, concurrency)
+
+
+async def async_get_many(cids: Iterable[str], concurrency: int = 16) -> List[bytes]:
+    """Asynchronously retrieve the data for ``cids`` in order.
+
+    Like :func:`async_add_many`, at most ``concurrency`` fetches are in flight.
+    """
+    return await _gather_bounded(get_data, cids, concurrency)
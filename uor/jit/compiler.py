@@ -1,15 +1,24 @@
 from __future__ import annotations
 
 import ctypes
+import hashlib
+import json
 import os
 import platform
+import shutil
 import subprocess
 import tempfile
 import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import count
+from threading import Lock
 from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from decoder import DecodedInstruction
 from primes import _PRIME_IDX
+from uor.memory import SegmentedMemory
 from chunks import (
     OP_PUSH,
     OP_ADD,
@@ -20,13 +29,393 @@ from chunks import (
     OP_NEG,
 )
 
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except Exception:  # pragma: no cover - optional dependency may be missing
+    np = None  # type: ignore
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):  # type: ignore
+        if args and callable(args[0]):
+            return args[0]
+        def wrapper(func):
+            return func
+        return wrapper
+
+try:
+    from llvmlite import binding as llvm, ir
+except ModuleNotFoundError:  # pragma: no cover - optional
+    llvm = ir = None  # type: ignore
+
+try:
+    import gccjit
+except ModuleNotFoundError:  # pragma: no cover - optional
+    gccjit = None  # type: ignore
+
+
+# Opcodes that only touch the operand stack and can therefore be run as
+# straight-line blocks by the native backends.
+STRAIGHT_LINE_OPS = frozenset({OP_PUSH, OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_MOD, OP_NEG})
+
+# Kernel opcode numbering and ``(pops, pushes)`` stack effects.
+_K_PUSH, _K_ADD, _K_SUB, _K_MUL, _K_DIV, _K_MOD, _K_NEG = range(7)
+_KERNEL_OPS = {
+    OP_PUSH: _K_PUSH,
+    OP_ADD: _K_ADD,
+    OP_SUB: _K_SUB,
+    OP_MUL: _K_MUL,
+    OP_DIV: _K_DIV,
+    OP_MOD: _K_MOD,
+    OP_NEG: _K_NEG,
+}
+_STACK_EFFECT = {
+    _K_PUSH: (0, 1),
+    _K_ADD: (2, 1),
+    _K_SUB: (2, 1),
+    _K_MUL: (2, 1),
+    _K_DIV: (2, 1),
+    _K_MOD: (2, 1),
+    _K_NEG: (1, 1),
+}
+
+# Operand bounds below which ``+``/``-`` and ``*`` cannot overflow int64.
+_ADD_LIMIT = 1 << 62
+_MUL_LIMIT = 1 << 31
+# Range of the ``i64`` slots the LLVM backend works on.
+_I64_MIN = -(1 << 63)
+_I64_MAX = (1 << 63) - 1
+
+# Compiled blocks shared by every ``JITCompiler``: ``_block_key`` digest ->
+# ``(block, compile time)``, evicted least recently used first.
+_JIT_CACHE: "OrderedDict[bytes, Tuple[JITBlock, float]]" = OrderedDict()
+_JIT_CACHE_SIZE = 4096
+_JIT_CACHE_LOCK = Lock()
+
+# Runs the ``gcc`` builds of queued native blocks off the VM's thread. Its
+# single worker is only started by the first build.
+_BUILDER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="uor-jit")
+
+_LLVM_ENGINE = None
+_LLVM_LOCK = Lock()
+_LLVM_IDS = count()
+
+
+def _llvm_engine():
+    """Return the process-wide MCJIT engine, creating it on first use."""
+    global _LLVM_ENGINE
+    if _LLVM_ENGINE is None:
+        try:
+            llvm.initialize()
+        except RuntimeError:  # newer llvmlite initializes itself
+            pass
+        llvm.initialize_native_target()
+        llvm.initialize_native_asmprinter()
+        target = llvm.Target.from_default_triple().create_target_machine(opt=2)
+        _LLVM_ENGINE = llvm.create_mcjit_compiler(llvm.parse_assembly(""), target)
+    return _LLVM_ENGINE
+
+
+@njit(cache=True)
+def _run_straight_line(ops, args, buf, sp):  # pragma: no cover - compiled
+    """Run a straight-line block on ``buf`` and return ``(status, sp)``.
+
+    A non-zero status means the block hit a case that needs Python integer
+    semantics (overflow or a zero divisor); ``buf`` must then be discarded.
+    """
+    for k in range(ops.shape[0]):
+        op = ops[k]
+        if op == _K_PUSH:
+            buf[sp] = args[k]
+            sp += 1
+        elif op == _K_NEG:
+            v = buf[sp - 1]
+            if v <= -_ADD_LIMIT:
+                return 1, sp
+            buf[sp - 1] = -v
+        else:
+            b = buf[sp - 1]
+            a = buf[sp - 2]
+            sp -= 1
+            if op == _K_ADD or op == _K_SUB:
+                if a >= _ADD_LIMIT or a <= -_ADD_LIMIT or b >= _ADD_LIMIT or b <= -_ADD_LIMIT:
+                    return 1, sp
+                buf[sp - 1] = a + b if op == _K_ADD else a - b
+            elif op == _K_MUL:
+                if a >= _MUL_LIMIT or a <= -_MUL_LIMIT or b >= _MUL_LIMIT or b <= -_MUL_LIMIT:
+                    return 1, sp
+                buf[sp - 1] = a * b
+            else:
+                if b == 0:
+                    return 2, sp
+                if a == _I64_MIN and b == -1:
+                    return 1, sp
+                buf[sp - 1] = a // b if op == _K_DIV else a % b
+    return 0, sp
+
+
+def _opcode(instr: DecodedInstruction) -> Optional[int]:
+    return instr.op
+
+
+def _push_value(instr: DecodedInstruction) -> int:
+    value = instr.push_val
+    if value is None:
+        value = _PRIME_IDX[next(p for p, e in instr.data if e == 5)]
+    return value
+
+
+def _fold_constants(ops: List[Tuple[int, int]]) -> List[Tuple[int, Optional[int]]]:
+    """Evaluate the constant parts of a native block's ``ops`` up front.
+
+    Runs of PUSHes and the arithmetic on them collapse into a single PUSH
+    of the result, and an operation whose right operand is a constant keeps
+    it as an immediate, e.g. ``PUSH 3, PUSH 4, MUL, ADD`` becomes ``ADD 12``.
+    Non-PUSH entries in the result carry their immediate or ``None``. Values
+    are only folded while they stay inside int64. A zero divisor is left
+    for the block to bail out on at run time, and -1 never becomes a
+    DIV/MOD immediate so the ``INT64_MIN / -1`` check stays in place.
+    """
+    out: List[Tuple[int, Optional[int]]] = []
+    consts: List[int] = []
+
+    def flush() -> None:
+        out.extend((OP_PUSH, v) for v in consts)
+        consts.clear()
+
+    for op, val in ops:
+        if op == OP_PUSH:
+            if _I64_MIN < val <= _I64_MAX:
+                consts.append(val)
+            else:
+                flush()
+                out.append((op, val))
+            continue
+        if op == OP_NEG:
+            if consts:
+                consts[-1] = -consts[-1]
+            else:
+                out.append((op, None))
+            continue
+        b = consts[-1] if consts else None
+        if b == 0 and op in (OP_DIV, OP_MOD):
+            b = None
+        if b is not None and len(consts) >= 2:
+            a = consts[-2]
+            if op == OP_ADD:
+                r = a + b
+            elif op == OP_SUB:
+                r = a - b
+            elif op == OP_MUL:
+                r = a * b
+            elif op == OP_DIV:
+                r = a // b
+            else:
+                r = a % b
+            if _I64_MIN < r <= _I64_MAX:
+                del consts[-2:]
+                consts.append(r)
+                continue
+        if b == -1 and op in (OP_DIV, OP_MOD):
+            b = None
+        if b is not None:
+            consts.pop()
+            flush()
+            out.append((op, b))
+        else:
+            flush()
+            out.append((op, None))
+    flush()
+    return out
+
+
+def _block_symbol(lib: ctypes.CDLL, name: str) -> Callable:
+    """Return the native block ``name`` exported by ``lib``.
+
+    ``argtypes`` stays unset: the block wrapper always passes a ``c_long``
+    array and a ``byref`` cell, which ctypes hands over as pointers as is,
+    while declared argument types would be converted on every call.
+    """
+    func = lib[name]
+    func.restype = ctypes.c_int
+    return func
+
+
+@lru_cache(maxsize=1)
+def _cpu_id() -> str:
+    """Describe the host CPU, which ``-march=native`` builds are tied to."""
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8", errors="replace") as fh:
+            lines = []
+            for line in fh:
+                if not line.strip():
+                    break
+                if line.startswith(("vendor_id", "model name", "flags", "Features", "CPU implementer", "CPU part")):
+                    lines.append(line.strip())
+    except OSError:
+        lines = []
+    return "\n".join(lines) or platform.processor()
+
+
+def _cc_command(arch: str) -> List[str]:
+    """Return the compiler and flags used to build native blocks.
+
+    The blocks are leaf functions without libc calls, so unwind tables,
+    the stack protector, PLT calls and interposition support are dropped
+    and code is tuned for the host CPU.
+    """
+    cc = "gcc" if shutil.which("gcc") or not shutil.which("clang") else "clang"
+    tune = "-mcpu=native" if arch in ("aarch64", "arm64") else "-march=native"
+    return [
+        cc,
+        "-shared",
+        "-O2",
+        tune,
+        "-fPIC",
+        "-fno-plt",
+        "-fno-semantic-interposition",
+        "-fno-stack-protector",
+        "-fno-asynchronous-unwind-tables",
+        "-fno-unwind-tables",
+        "-pipe",
+    ]
+
+
+def default_cache_dir() -> str:
+    """Return the directory holding compiled native blocks."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "uor", "jit")
+
+
+def _canonical(instr: DecodedInstruction) -> bytes:
+    data = instr.data_key
+    if data is None:
+        data = instr.data_key = repr(tuple(instr.data)).encode()
+    inner = b"[" + b";".join(map(_canonical, instr.inner)) + b"]" if instr.inner else b""
+    return b"%b%r,%r%b" % (data, instr.offset, instr.addr, inner)
+
+
+def _block_key(instructions: List[DecodedInstruction]) -> bytes:
+    """Return a digest identifying ``instructions`` in any program.
+
+    Resolved jump offsets and addresses are part of the key because
+    compiled blocks close over them. They are read on every call since
+    ``link`` may resolve them again; the encoded ``data`` is memoized on the
+    instruction.
+    """
+    text = b";".join(map(_canonical, instructions))
+    return hashlib.blake2b(text, digest_size=16, usedforsecurity=False).digest()
+
+
+def _kernel_program(
+    instructions: List[DecodedInstruction],
+) -> Optional[Tuple[List[int], List[int], int, int, int]]:
+    """Translate a straight-line block to kernel opcodes.
+
+    Returns ``(ops, args, need, peak, depth)``: the kernel opcodes, their
+    PUSH operands, the stack slots consumed below the block's entry, the
+    highest depth reached above it and the net depth change. ``None`` means
+    the block contains an opcode the native backends cannot run.
+    """
+    ops: List[int] = []
+    args: List[int] = []
+    depth = need = peak = 0
+    for instr in instructions:
+        kop = _KERNEL_OPS.get(_opcode(instr))
+        if kop is None or instr.inner:
+            return None
+        ops.append(kop)
+        args.append(_push_value(instr) if kop == _K_PUSH else 0)
+        pops, pushes = _STACK_EFFECT[kop]
+        depth -= pops
+        need = max(need, -depth)
+        depth += pushes
+        peak = max(peak, depth)
+    return ops, args, need, peak, depth
+
+
+def _emit_llvm(name: str, ops: List[int], args: List[int], need: int) -> "ir.Module":
+    """Build ``i32 name(i64* buf)`` evaluating a block entirely in registers.
+
+    Stack depths inside a straight-line block are known statically, so the
+    operand stack becomes a list of SSA values: the ``need`` inputs are
+    loaded from ``buf`` once and the results are stored back at the end.
+    The status codes match ``_run_straight_line``: 1 for int64 overflow,
+    2 for a zero divisor.
+    """
+    i32 = ir.IntType(32)
+    i64 = ir.IntType(64)
+    module = ir.Module(name=name)
+    func = ir.Function(module, ir.FunctionType(i32, [i64.as_pointer()]), name=name)
+    buf = func.args[0]
+    builder = ir.IRBuilder(func.append_basic_block("entry"))
+    bail: Dict[int, "ir.Block"] = {}
+
+    def guard(cond, status: int) -> None:
+        if status not in bail:
+            bail[status] = func.append_basic_block(f"bail{status}")
+            ir.IRBuilder(bail[status]).ret(ir.Constant(i32, status))
+        ok = func.append_basic_block()
+        builder.cbranch(cond, bail[status], ok)
+        builder.position_at_end(ok)
+
+    def checked(result) -> "ir.Value":
+        guard(builder.extract_value(result, 1), 1)
+        return builder.extract_value(result, 0)
+
+    zero = ir.Constant(i64, 0)
+    stack = [builder.load(builder.gep(buf, [ir.Constant(i64, i)])) for i in range(need)]
+    for op, arg in zip(ops, args):
+        if op == _K_PUSH:
+            stack.append(ir.Constant(i64, arg))
+        elif op == _K_NEG:
+            stack.append(checked(builder.ssub_with_overflow(zero, stack.pop())))
+        else:
+            b = stack.pop()
+            a = stack.pop()
+            if op == _K_ADD:
+                stack.append(checked(builder.sadd_with_overflow(a, b)))
+            elif op == _K_SUB:
+                stack.append(checked(builder.ssub_with_overflow(a, b)))
+            elif op == _K_MUL:
+                stack.append(checked(builder.smul_with_overflow(a, b)))
+            else:
+                guard(builder.icmp_signed("==", b, zero), 2)
+                guard(
+                    builder.and_(
+                        builder.icmp_signed("==", a, ir.Constant(i64, _I64_MIN)),
+                        builder.icmp_signed("==", b, ir.Constant(i64, -1)),
+                    ),
+                    1,
+                )
+                # ``sdiv``/``srem`` truncate; shift to Python's floor semantics.
+                rem = builder.srem(a, b)
+                adjust = builder.and_(
+                    builder.icmp_signed("!=", rem, zero),
+                    builder.icmp_signed("<", builder.xor(rem, b), zero),
+                )
+                if op == _K_DIV:
+                    stack.append(builder.sub(builder.sdiv(a, b), builder.zext(adjust, i64)))
+                else:
+                    stack.append(builder.add(rem, builder.select(adjust, b, zero)))
+    for i, value in enumerate(stack):
+        builder.store(value, builder.gep(buf, [ir.Constant(i64, i)]))
+    builder.ret(ir.Constant(i32, 0))
+    return module
+
 
 class JITBlock:
-    """Callable wrapper for compiled blocks."""
+    """Callable wrapper for compiled blocks.
 
-    def __init__(self, func: Callable[["VM"], Iterable[str]], end_ip: int) -> None:
+    Like opcode handlers, blocks write output to ``vm._out``; the returned
+    iterable is kept for compatibility and is normally empty.
+    """
+
+    def __init__(self, func: Callable[["VM"], Iterable[str]], end_ip: int, size: int = 1) -> None:
         self.func = func
         self.end_ip = end_ip
+        self.size = size
 
     def __call__(self, vm: "VM") -> Iterable[str]:
         return self.func(vm)
@@ -35,89 +424,414 @@ class JITBlock:
 class JITCompiler:
     """JIT compiler using a tiny C backend with caching."""
 
-    def __init__(self, ttl: float = 60.0) -> None:
+    def __init__(self, ttl: float = 60.0, cache_dir: Optional[str] = None) -> None:
         self.arch = platform.machine().lower()
         self.available = self.arch in {"x86_64", "amd64", "aarch64", "arm64"}
         self.ttl = ttl
-        self._cache: Dict[Tuple[Tuple[Tuple[int, int], ...], ...], Tuple[JITBlock, float]] = {}
         self.blocks_compiled = 0
         self.cache_hits = 0
         self.cache_misses = 0
+        # Number of ``compile_block`` invocations, hits included.
+        self.compile_calls = 0
         self.trace: Dict[int, int] = {}
+        # Native tier for blocks llvmlite and numba cannot take: libgccjit
+        # compiles in process into child contexts of one shared parent,
+        # otherwise ``gcc`` is run as a subprocess.
+        self._backend = "gcc"
+        self._gccjit_ctxt = None
+        if gccjit is not None:  # pragma: no cover - optional
+            ctxt = gccjit.Context()
+            ctxt.set_int_option(gccjit.IntOption.OPTIMIZATION_LEVEL, 2)
+            self._gccjit_ctxt = ctxt
+            self._backend = "gccjit"
+        # Directory of gcc-built blocks shared between processes, see
+        # ``_load_cached``; ``None`` disables the disk cache.
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        # gcc blocks waiting to be built together: ``(ops, slot, key)`` where
+        # the slot receives the compiled function, or ``False`` if gcc failed.
+        self._pending: List[Tuple[List[Tuple[int, Optional[int]]], List, str]] = []
+        self._flush_deadline = 0.0
+        self._last_build: Optional[Future] = None
+        self.flush_threshold = 8
+        self.cc_command = _cc_command(self.arch)
+        self.flush_delay = 0.05
+        # Shorter blocks run through the handlers: compiling them costs more
+        # than their interpretation ever would.
+        self.min_native_len = 8
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def straight_line(program: List[DecodedInstruction], start: int) -> List[DecodedInstruction]:
+        """Return the run of stack-only instructions beginning at ``start``.
+
+        Always contains at least ``program[start]`` so callers can compile the
+        single hot instruction when it does not start such a run.
+        """
+        run: List[DecodedInstruction] = []
+        idx = start
+        while True:
+            try:
+                instr = program[idx]
+            except IndexError:
+                break
+            if instr.inner or _opcode(instr) not in STRAIGHT_LINE_OPS:
+                break
+            run.append(instr)
+            idx += 1
+        return run or [program[start]]
 
     # ------------------------------------------------------------------
     def compile_block(self, instructions: List[DecodedInstruction]) -> Optional[JITBlock]:
-        """Compile ``instructions`` and return a ``JITBlock``."""
-        key = tuple(tuple(instr.data) for instr in instructions)
-        self._prune()
-        entry = self._cache.get(key)
-        if entry is not None:
-            self.cache_hits += 1
-            return entry[0]
+        """Compile ``instructions`` and return a ``JITBlock``.
+
+        Blocks are cached module-wide, so identical code compiled by another
+        VM or at another hot ip is reused while younger than ``ttl``. Blocks
+        shorter than ``min_native_len`` skip the native tiers.
+        """
+        self.compile_calls += 1
+        key = _block_key(instructions)
+        with _JIT_CACHE_LOCK:
+            entry = _JIT_CACHE.get(key)
+            if entry is not None and entry[1] + self.ttl >= time.time():
+                _JIT_CACHE.move_to_end(key)
+                self.cache_hits += 1
+                return entry[0]
         self.cache_misses += 1
-        block = self._compile_native(instructions) if self.available else None
+        block = None
+        if len(instructions) >= self.min_native_len:
+            block = self._compile_llvm(instructions)
+            if block is None:
+                block = self._compile_numba(instructions)
+            if block is None and self.available:
+                block = self._compile_native(instructions)
         if block is None:
             block = self._compile_py(instructions)
-        self._cache[key] = (block, time.time() + self.ttl)
+        with _JIT_CACHE_LOCK:
+            _JIT_CACHE[key] = (block, time.time())
+            _JIT_CACHE.move_to_end(key)
+            while len(_JIT_CACHE) > _JIT_CACHE_SIZE:
+                _JIT_CACHE.popitem(last=False)
         self.blocks_compiled += 1
         return block
 
     # ------------------------------------------------------------------
-    def _prune(self) -> None:
-        now = time.time()
-        for k, (_, exp) in list(self._cache.items()):
-            if exp < now:
-                self._cache.pop(k, None)
+    def _compile_py(self, instructions: List[DecodedInstruction]) -> JITBlock:
+        """Fallback: execute instructions via regular handlers.
+
+        Opcodes are resolved once here rather than on every call; ``ip`` still
+        advances per instruction so a raising handler leaves it where the
+        interpreter would.
+        """
+        pairs = [(_opcode(instr), instr) for instr in instructions]
+
+        def block(vm: "VM") -> Iterable[str]:
+            dispatch = vm._dispatch
+            for op, instr in pairs:
+                vm.ip += 1
+                dispatch[op](instr)
+            return ()
+
+        return JITBlock(block, end_ip=0, size=len(instructions))
 
     # ------------------------------------------------------------------
-    def _compile_py(self, instructions: List[DecodedInstruction]) -> JITBlock:
-        """Fallback: execute instructions via regular handlers."""
+    def _compile_llvm(self, instructions: List[DecodedInstruction]) -> Optional[JITBlock]:
+        """Compile straight-line arithmetic to native code with llvmlite.
+
+        Each block becomes its own LLVM function with the PUSH operands as
+        constants. Like the Numba path it only sees a copy of the consumed
+        stack slots and replays the block through the handlers on overflow,
+        a zero divisor or operands outside int64.
+        """
+        if llvm is None:
+            return None
+        program = _kernel_program(instructions)
+        if program is None:
+            return None
+        ops, args, need, _, depth = program
+        if any(not _I64_MIN <= a <= _I64_MAX for a in args):
+            return None
+        name = f"jit_block_{next(_LLVM_IDS)}"
+        try:
+            with _LLVM_LOCK:
+                engine = _llvm_engine()
+                mod = llvm.parse_assembly(str(_emit_llvm(name, ops, args, need)))
+                mod.verify()
+                engine.add_module(mod)
+                engine.finalize_object()
+                addr = engine.get_function_address(name)
+        except Exception:  # pragma: no cover - no usable native target
+            return None
+        func = ctypes.CFUNCTYPE(ctypes.c_int32, ctypes.POINTER(ctypes.c_int64))(addr)
+        out = need + depth
+        buf_type = ctypes.c_int64 * max(need, out, 1)
+        size = len(instructions)
+        fallback = self._compile_py(instructions)
 
         def block(vm: "VM") -> Iterable[str]:
-            for instr in instructions:
-                op = next(p for p, e in instr.data if e == 4)
-                handler = vm._dispatch[op]
-                yield from handler(instr.data)
-            vm.ip += len(instructions)
-            return iter(())
+            stack = vm.stack
+            base = len(stack) - need
+            if base < 0 or len(stack) + depth > SegmentedMemory.STACK_SIZE:
+                return fallback(vm)
+            top = stack[base:]
+            for v in top:
+                if type(v) is not int or not _I64_MIN <= v <= _I64_MAX:
+                    return fallback(vm)
+            buf = buf_type(*top)
+            if func(buf):
+                return fallback(vm)
+            stack[base:] = buf[:out]
+            vm.ip += size
+            return ()
+
+        return JITBlock(block, end_ip=0, size=size)
+
+    # ------------------------------------------------------------------
+    def _compile_numba(self, instructions: List[DecodedInstruction]) -> Optional[JITBlock]:
+        """Run straight-line arithmetic through a shared ``@njit`` kernel.
+
+        The kernel works on a copy of the stack slots the block consumes, so
+        whenever it bails out the regular handlers can replay the block and
+        raise exactly what the interpreter would.
+        """
+        if not NUMBA_AVAILABLE:
+            return None
+        program = _kernel_program(instructions)
+        if program is None:
+            return None
+        ops, args, need, peak, depth = program
+        try:
+            ops_arr = np.array(ops, dtype=np.int64)
+            args_arr = np.array(args, dtype=np.int64)
+        except OverflowError:
+            return None
+        capacity = need + peak
+        growth = depth
+        size = len(instructions)
+        fallback = self._compile_py(instructions)
+
+        def block(vm: "VM") -> Iterable[str]:
+            stack = vm.stack
+            base = len(stack) - need
+            if base < 0 or len(stack) + growth > SegmentedMemory.STACK_SIZE:
+                return fallback(vm)
+            top = stack[base:]
+            if any(type(v) is not int for v in top):
+                return fallback(vm)
+            try:
+                buf = np.array(top + [0] * (capacity - need), dtype=np.int64)
+            except OverflowError:
+                return fallback(vm)
+            status, sp = _run_straight_line(ops_arr, args_arr, buf, need)
+            if status:
+                return fallback(vm)
+            stack[base:] = buf[:sp].tolist()
+            vm.ip += size
+            return ()
 
-        return JITBlock(block, end_ip=0)
+        return JITBlock(block, end_ip=0, size=size)
 
     # ------------------------------------------------------------------
     def _compile_native(self, instructions: List[DecodedInstruction]) -> Optional[JITBlock]:
-        supported = {OP_PUSH, OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_MOD, OP_NEG}
-        lines: List[str] = []
+        """Compile a straight-line block to native code.
+
+        With libgccjit the block is built at once. Otherwise it joins a queue
+        that is written as one C file and built by a single background
+        ``gcc`` run once ``flush_threshold`` blocks are waiting or
+        ``flush_delay`` seconds after the first one arrived; until the build
+        finishes the block runs through the regular handlers. Blocks a previous run already built are loaded
+        from ``cache_dir`` instead.
+        """
+        ops: List[Tuple[int, int]] = []
+        depth = need = 0
         for instr in instructions:
-            op = next((p for p, e in instr.data if e == 4), None)
-            if op not in supported:
+            op = _opcode(instr)
+            if op not in STRAIGHT_LINE_OPS:
+                return None
+            ops.append((op, _push_value(instr) if op == OP_PUSH else 0))
+            pops, pushes = _STACK_EFFECT[_KERNEL_OPS[op]]
+            depth -= pops
+            need = max(need, -depth)
+            depth += pushes
+        # Scratch slots: the ``need`` values read from the VM stack plus at
+        # most one push per instruction.
+        cap = need + len(ops)
+        ops = _fold_constants(ops)
+
+        slot: List = [None]
+        if self._backend == "gccjit":  # pragma: no cover - optional
+            slot[0] = self._native_gccjit(ops)
+            if slot[0] is None:
+                return None
+        else:
+            source = "\n".join(self._c_function("block", ops))
+            host = f"{self.arch}\n{_cpu_id()}\n{' '.join(self.cc_command)}"
+            key = hashlib.sha256(f"{host}\n{source}".encode(), usedforsecurity=False).hexdigest()
+            slot[0] = self._load_cached(key, source)
+            if slot[0] is None:
+                if not self._pending:
+                    self._flush_deadline = time.monotonic() + self.flush_delay
+                self._pending.append((ops, slot, key))
+                if len(self._pending) >= self.flush_threshold:
+                    self.flush(wait=False)
+        fallback = self._compile_py(instructions)
+        c_long = ctypes.c_long
+        byref = ctypes.byref
+
+        def block(vm: "VM") -> Iterable[str]:
+            func = slot[0]
+            if func is None:
+                if time.monotonic() >= self._flush_deadline:
+                    self.flush(wait=False)
+                return fallback(vm)
+            if func is False:
+                return fallback(vm)
+            stack = vm.stack
+            base = len(stack) - need
+            if base < 0:
+                return fallback(vm)
+            window = stack[base:]
+            buf = vm._jit_buf
+            if buf is None or len(buf) < cap:
+                buf = vm._jit_buf = (ctypes.c_long * max(64, 2 * cap))()
+            try:
+                # ctypes would silently truncate values beyond int64.
+                if window and (min(window) < _I64_MIN or max(window) > _I64_MAX):
+                    return fallback(vm)
+                buf[:need] = window
+            except TypeError:
+                return fallback(vm)
+            sp = c_long(need - 1)
+            if func(buf, byref(sp)):
+                return fallback(vm)
+            stack[base:] = buf[: sp.value + 1]
+            vm.ip += len(instructions)
+            return iter(())
+
+        return JITBlock(block, end_ip=0, size=len(instructions))
+
+    def flush(self, wait: bool = True) -> None:
+        """Build every queued native block with one ``gcc`` invocation.
+
+        The build runs on a background thread and each block switches to
+        native code on its first call after it finished. ``wait`` blocks
+        until this and every earlier build of the compiler are done.
+        """
+        pending, self._pending = self._pending, []
+        if pending:
+            self._last_build = _BUILDER.submit(self._build, pending)
+        if wait and self._last_build is not None:
+            self._last_build.result()
+
+    def _build(self, pending: List[Tuple[List[Tuple[int, Optional[int]]], List, str]]) -> None:
+        batch = [ops for ops, _, _ in pending]
+        built = self._native_gcc(batch)
+        if built is None:
+            for _, slot, _ in pending:
+                slot[0] = False
+            return
+        so_file, funcs = built
+        for (_, slot, _), func in zip(pending, funcs):
+            slot[0] = func
+        self._store_cached(so_file, [(key, ops) for ops, _, key in pending])
+
+    # ------------------------------------------------------------------
+    def _load_cached(self, key: str, source: str) -> Optional[Callable]:
+        """Return the block stored under ``key`` in ``cache_dir``, if any.
+
+        ``<key>.meta`` names the shared library and symbol holding the block
+        and records its C source, which must match ``source``.
+        """
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.meta"), encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta["source"] != source:
                 return None
+            return _block_symbol(ctypes.CDLL(os.path.join(self.cache_dir, meta["library"])), meta["symbol"])
+        except (OSError, ValueError, KeyError, AttributeError):
+            return None
+
+    def _store_cached(self, so_file: str, entries: List[Tuple[str, List[Tuple[int, Optional[int]]]]]) -> None:
+        """Copy a built batch into ``cache_dir`` and index each of its blocks.
+
+        Files are written under temporary names and renamed into place, so
+        concurrent VMs only ever see complete entries. I/O errors are
+        ignored; the blocks are simply rebuilt next time.
+        """
+        if self.cache_dir is None:
+            return
+        names = "".join(key for key, _ in entries).encode()
+        library = hashlib.sha256(names, usedforsecurity=False).hexdigest() + ".so"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            target = os.path.join(self.cache_dir, library)
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            shutil.copyfile(so_file, tmp_path)
+            os.replace(tmp_path, target)
+            for idx, (key, ops) in enumerate(entries):
+                meta = {
+                    "library": library,
+                    "symbol": f"block_{idx}",
+                    "source": "\n".join(self._c_function("block", ops)),
+                }
+                meta_path = os.path.join(self.cache_dir, f"{key}.meta")
+                tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as fh:
+                    json.dump(meta, fh)
+                os.replace(tmp_path, meta_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _c_function(name: str, ops: List[Tuple[int, Optional[int]]]) -> List[str]:
+        """Return the C source of ``int name(long *stack, long *sp_ptr)``.
+
+        DIV and MOD floor like Python. ADD, SUB, MUL and NEG go through the
+        overflow builtins, since signed overflow is undefined in C. On
+        overflow, a zero divisor or ``INT64_MIN / -1`` the function returns
+        1 without storing ``sp`` so the caller replays the block through the
+        handlers; otherwise it returns 0.
+        """
+        lines: List[str] = []
+        builtins = {OP_ADD: "add", OP_SUB: "sub", OP_MUL: "mul"}
+        for op, val in ops:
             if op == OP_PUSH:
-                vp = next(p for p, e in instr.data if e == 5)
-                val = _PRIME_IDX[vp]
                 lines.append(f"stack[++sp] = {val};")
-            elif op == OP_ADD:
-                lines.append("sp--; stack[sp] = stack[sp] + stack[sp+1];")
-            elif op == OP_SUB:
-                lines.append("sp--; stack[sp] = stack[sp] - stack[sp+1];")
-            elif op == OP_MUL:
-                lines.append("sp--; stack[sp] = stack[sp] * stack[sp+1];")
-            elif op == OP_DIV:
-                lines.append("sp--; if(stack[sp+1]==0) return; stack[sp]=stack[sp]/stack[sp+1];")
-            elif op == OP_MOD:
-                lines.append("sp--; if(stack[sp+1]==0) return; stack[sp]=stack[sp]%stack[sp+1];")
+            elif op in (OP_DIV, OP_MOD):
+                if val is None:
+                    lines.append(
+                        "sp--; if(stack[sp+1]==0 || (stack[sp+1]==-1 && stack[sp]==-9223372036854775807L-1)) return 1;"
+                    )
+                    divisor = "stack[sp+1]"
+                else:
+                    divisor = f"{val}L"
+                result = "q" if op == OP_DIV else "r"
+                lines.append(
+                    f"{{ long d = {divisor}, q = stack[sp] / d, r = stack[sp] % d;"
+                    f" if(r != 0 && (r ^ d) < 0) {{ q--; r += d; }} stack[sp] = {result}; }}"
+                )
             elif op == OP_NEG:
-                lines.append("stack[sp] = -stack[sp];")
-
-        c_src = "\n".join(
-            [
-                "#include <stdint.h>",
-                "void block(long *stack, long *sp_ptr){",
-                "    long sp = *sp_ptr;",
-                *(f"    {ln}" for ln in lines),
-                "    *sp_ptr = sp;",
-                "}",
-            ]
-        )
+                lines.append("if(__builtin_sub_overflow(0L, stack[sp], &stack[sp])) return 1;")
+            elif val is not None:
+                lines.append(f"if(__builtin_{builtins[op]}_overflow(stack[sp], {val}L, &stack[sp])) return 1;")
+            else:
+                lines.append(f"sp--; if(__builtin_{builtins[op]}_overflow(stack[sp], stack[sp+1], &stack[sp])) return 1;")
+        return [
+            f"int {name}(long *stack, long *sp_ptr){{",
+            "    long sp = *sp_ptr;",
+            *(f"    {ln}" for ln in lines),
+            "    *sp_ptr = sp;",
+            "    return 0;",
+            "}",
+        ]
+
+    def _native_gcc(self, batch: List[List[Tuple[int, Optional[int]]]]) -> Optional[Tuple[str, List[Callable]]]:
+        """Build each ops list in ``batch`` as ``block_N`` of one shared library.
+
+        Returns the library path and the functions in ``batch`` order.
+        """
+        c_src = "\n".join(ln for idx, ops in enumerate(batch) for ln in self._c_function(f"block_{idx}", ops))
 
         td = tempfile.mkdtemp()
         c_file = os.path.join(td, "block.c")
@@ -125,31 +839,158 @@ class JITCompiler:
         with open(c_file, "w") as f:
             f.write(c_src)
         try:
-            subprocess.run([
-                "gcc",
-                "-shared",
-                "-O2",
-                "-fPIC",
-                c_file,
-                "-o",
-                so_file,
-            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            subprocess.run(
+                [*self.cc_command, c_file, "-o", so_file],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
         except Exception:
             return None
         lib = ctypes.CDLL(so_file)
-        func = lib.block
-        func.argtypes = [ctypes.POINTER(ctypes.c_long), ctypes.POINTER(ctypes.c_long)]
-        func.restype = None
-
-        def block(vm: "VM") -> Iterable[str]:  # pragma: no cover - runtime
-            size = len(vm.stack) + 32
-            arr_type = ctypes.c_long * size
-            arr = arr_type(*vm.stack, *([0] * (size - len(vm.stack))))
-            sp = ctypes.c_long(len(vm.stack) - 1)
-            func(arr, ctypes.byref(sp))
-            vm.stack = list(arr)[: sp.value + 1]
-            vm.ip += len(instructions)
-            return iter(())
+        return so_file, [_block_symbol(lib, f"block_{idx}") for idx in range(len(batch))]
 
-        return JITBlock(block, end_ip=0)
+    def _native_gccjit(self, ops: List[Tuple[int, Optional[int]]]) -> Optional[Callable]:  # pragma: no cover - optional
+        """Build ``ops`` in process with libgccjit.
 
+        Emits the same function as :meth:`_c_function`, but stack slots are
+        addressed relative to the entry ``sp`` at offsets known while
+        compiling. The bindings lack the type-generic overflow builtins, so
+        ADD/SUB and MUL operands are bounded like in ``_run_straight_line``
+        instead. Leaving those bounds, negating ``INT64_MIN``, a zero divisor
+        or ``INT64_MIN / -1`` returns 1 without storing ``sp``, like the C
+        version.
+        """
+        ctxt = self._gccjit_ctxt.new_child_context()
+        long_t = ctxt.get_type(gccjit.TypeKind.LONG)
+        int_t = ctxt.get_type(gccjit.TypeKind.INT)
+        bool_t = ctxt.get_type(gccjit.TypeKind.BOOL)
+        ptr_t = long_t.get_pointer()
+        stack = ctxt.new_param(ptr_t, b"stack")
+        sp_ptr = ctxt.new_param(ptr_t, b"sp_ptr")
+        fn = ctxt.new_function(gccjit.FunctionKind.EXPORTED, int_t, b"block", [stack, sp_ptr])
+        sp = fn.new_local(long_t, b"sp")
+        block = fn.new_block(b"entry")
+        block.add_assignment(sp, sp_ptr.dereference())
+        bail = fn.new_block(b"bail")
+        bail.end_with_return(ctxt.one(int_t))
+
+        def const(value: int):
+            return ctxt.new_rvalue_from_int(long_t, value)
+
+        def slot(depth: int):
+            index = ctxt.new_binary_op(gccjit.BinaryOp.PLUS, long_t, sp, const(depth))
+            return ctxt.new_array_access(stack, index)
+
+        def both(x, y):
+            return ctxt.new_binary_op(gccjit.BinaryOp.LOGICAL_AND, bool_t, x, y)
+
+        def either(x, y):
+            return ctxt.new_binary_op(gccjit.BinaryOp.LOGICAL_OR, bool_t, x, y)
+
+        def outside(value, low, high):
+            return either(
+                ctxt.new_comparison(gccjit.Comparison.LE, value, low),
+                ctxt.new_comparison(gccjit.Comparison.GE, value, high),
+            )
+
+        guards = 0
+
+        def guard(invalid) -> None:
+            """Continue in a new block unless ``invalid`` holds."""
+            nonlocal block, guards
+            ok = fn.new_block(b"ok%d" % guards)
+            guards += 1
+            block.end_with_conditional(invalid, bail, ok)
+            block = ok
+
+        zero = ctxt.zero(long_t)
+        # INT64_MIN as (-2**31) * (-2**31) * -2; every literal fits in an int.
+        long_min = ctxt.new_binary_op(
+            gccjit.BinaryOp.MULT,
+            long_t,
+            ctxt.new_binary_op(gccjit.BinaryOp.MULT, long_t, const(-(1 << 31)), const(-(1 << 31))),
+            const(-2),
+        )
+        # Operand bounds of ``_ADD_LIMIT`` (2**62) and ``_MUL_LIMIT`` (2**31).
+        add_limit = ctxt.new_binary_op(gccjit.BinaryOp.MULT, long_t, const(-(1 << 31)), const(-(1 << 31)))
+        add_bounds = (ctxt.new_unary_op(gccjit.UnaryOp.MINUS, long_t, add_limit), add_limit)
+        mul_bounds = (const(-(1 << 31)), ctxt.new_unary_op(gccjit.UnaryOp.MINUS, long_t, const(-(1 << 31))))
+        binary = {
+            OP_ADD: gccjit.BinaryOp.PLUS,
+            OP_SUB: gccjit.BinaryOp.MINUS,
+            OP_MUL: gccjit.BinaryOp.MULT,
+        }
+        depth = 0
+        for idx, (op, val) in enumerate(ops):
+            if val is not None and not -(1 << 31) <= val < (1 << 31):
+                return None
+            if op == OP_PUSH:
+                depth += 1
+                block.add_assignment(slot(depth), const(val))
+            elif op == OP_NEG:
+                guard(ctxt.new_comparison(gccjit.Comparison.EQ, slot(depth), long_min))
+                block.add_assignment(slot(depth), ctxt.new_unary_op(gccjit.UnaryOp.MINUS, long_t, slot(depth)))
+            elif op in (OP_DIV, OP_MOD):
+                if val is None:
+                    depth -= 1
+                    divisor = slot(depth + 1)
+                    guard(
+                        either(
+                            ctxt.new_comparison(gccjit.Comparison.EQ, divisor, zero),
+                            both(
+                                ctxt.new_comparison(gccjit.Comparison.EQ, divisor, const(-1)),
+                                ctxt.new_comparison(gccjit.Comparison.EQ, slot(depth), long_min),
+                            ),
+                        )
+                    )
+                else:
+                    divisor = const(val)
+                q = fn.new_local(long_t, b"q%d" % idx)
+                r = fn.new_local(long_t, b"r%d" % idx)
+                block.add_assignment(q, ctxt.new_binary_op(gccjit.BinaryOp.DIVIDE, long_t, slot(depth), divisor))
+                block.add_assignment(r, ctxt.new_binary_op(gccjit.BinaryOp.MODULO, long_t, slot(depth), divisor))
+                # Truncated to floored: step back when the remainder's sign
+                # differs from the divisor's.
+                adjust = fn.new_block(b"adjust%d" % idx)
+                done = fn.new_block(b"done%d" % idx)
+                block.end_with_conditional(
+                    both(
+                        ctxt.new_comparison(gccjit.Comparison.NE, r, zero),
+                        ctxt.new_comparison(
+                            gccjit.Comparison.LT,
+                            ctxt.new_binary_op(gccjit.BinaryOp.BITWISE_XOR, long_t, r, divisor),
+                            zero,
+                        ),
+                    ),
+                    adjust,
+                    done,
+                )
+                adjust.add_assignment_op(q, gccjit.BinaryOp.MINUS, const(1))
+                adjust.add_assignment_op(r, gccjit.BinaryOp.PLUS, divisor)
+                adjust.end_with_jump(done)
+                block = done
+                block.add_assignment(slot(depth), q if op == OP_DIV else r)
+            else:
+                if val is None:
+                    depth -= 1
+                    rhs = slot(depth + 1)
+                else:
+                    rhs = const(val)
+                low, high = mul_bounds if op == OP_MUL else add_bounds
+                guard(either(outside(slot(depth), low, high), outside(rhs, low, high)))
+                block.add_assignment(slot(depth), ctxt.new_binary_op(binary[op], long_t, slot(depth), rhs))
+        block.add_assignment(
+            sp_ptr.dereference(),
+            ctxt.new_binary_op(gccjit.BinaryOp.PLUS, long_t, sp, const(depth)),
+        )
+        block.end_with_return(ctxt.zero(int_t))
+        try:
+            result = ctxt.compile()
+        except Exception:
+            return None
+        proto = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_long), ctypes.POINTER(ctypes.c_long))
+        func = proto(result.get_code(b"block"))
+        # The machine code lives as long as the result object.
+        func._result = result
+        return func
@@ -2,85 +2,128 @@
 from __future__ import annotations
 
 import ast
+import time
+from array import array
 from dataclasses import dataclass, field
-from typing import Dict, Set, List, AsyncGenerator
+from typing import Any, Dict, Set, List, AsyncGenerator, Sequence
 
 from .providers import LLMProvider
 
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - optional
+    np = None  # type: ignore
+
+
+def _int32(values: Sequence[int]) -> Any:
+    if np is not None:
+        return np.array(values, dtype=np.int32)
+    return array("i", values)
+
 
 @dataclass
 class CFG:
-    """Simple control flow graph representation."""
+    """Simple control flow graph representation.
+
+    ``edges`` and ``nodes`` are keyed by line number. :meth:`pack` also
+    lays the edges out in CSR form: node ``i`` is line ``lines[i]`` and its
+    successors are the node indices ``succ_idx[succ_ptr[i]:succ_ptr[i + 1]]``,
+    held in int32 numpy arrays (``array('i')`` without numpy).
+    """
 
     edges: Dict[int, Set[int]] = field(default_factory=dict)
     nodes: Dict[int, ast.stmt] = field(default_factory=dict)
-
-
-class _MetricsVisitor(ast.NodeVisitor):
-    """Collect metrics and variable usage information."""
+    lines: Any = field(default_factory=lambda: _int32(()), repr=False)
+    succ_ptr: Any = field(default_factory=lambda: _int32((0,)), repr=False)
+    succ_idx: Any = field(default_factory=lambda: _int32(()), repr=False)
+
+    def pack(self) -> None:
+        """Rebuild the CSR arrays from ``edges`` and ``nodes``."""
+        lines = sorted(self.nodes)
+        index = {line: i for i, line in enumerate(lines)}
+        ptr = [0]
+        idx: List[int] = []
+        for line in lines:
+            idx.extend(sorted(index[target] for target in self.edges.get(line, ())))
+            ptr.append(len(idx))
+        self.lines = _int32(lines)
+        self.succ_ptr = _int32(ptr)
+        self.succ_idx = _int32(idx)
+
+    def successors(self, i: int) -> Any:
+        """Return the node indices following node ``i``."""
+        return self.succ_idx[self.succ_ptr[i]:self.succ_ptr[i + 1]]
+
+
+class _Walker:
+    """Collect metrics, variable usage and CFG statements in one AST walk.
+
+    Nodes are visited in pre-order with an explicit stack. Statements
+    reached through the ``body`` and ``orelse`` of the module or of other
+    collected statements are recorded for the CFG in that same order.
+    """
 
     def __init__(self) -> None:
         self.variables_defined: Set[str] = set()
         self.variables_used: Set[str] = set()
         self.loops: List[int] = []
         self.complexity: int = 1
-
-    # ---- node handlers -------------------------------------------------
-    def visit_Name(self, node: ast.Name) -> None:  # pragma: no cover - trivial
-        if isinstance(node.ctx, ast.Store):
-            self.variables_defined.add(node.id)
-        else:
-            self.variables_used.add(node.id)
-
-    def visit_For(self, node: ast.For) -> None:
-        self.loops.append(node.lineno)
-        self.complexity += 1
-        self.generic_visit(node)
-
-    def visit_While(self, node: ast.While) -> None:
-        self.loops.append(node.lineno)
-        self.complexity += 1
-        self.generic_visit(node)
-
-    def visit_If(self, node: ast.If) -> None:
-        self.complexity += 1
-        self.generic_visit(node)
-
-    def visit_BoolOp(self, node: ast.BoolOp) -> None:  # pragma: no cover - simple
-        self.complexity += len(node.values) - 1
-        self.generic_visit(node)
+        self.statements: List[ast.stmt] = []
+
+    def walk(self, tree: ast.AST) -> None:
+        stack: List[tuple[ast.AST, bool]] = [(tree, True)]
+        while stack:
+            node, in_cfg = stack.pop()
+            kind = type(node)
+            if kind is ast.Name:
+                if isinstance(node.ctx, ast.Store):
+                    self.variables_defined.add(node.id)
+                else:
+                    self.variables_used.add(node.id)
+                continue
+            if kind is ast.For or kind is ast.While:
+                self.loops.append(node.lineno)
+                self.complexity += 1
+            elif kind is ast.If:
+                self.complexity += 1
+            elif kind is ast.BoolOp:
+                self.complexity += len(node.values) - 1
+            if in_cfg and isinstance(node, ast.stmt):
+                self.statements.append(node)
+            children: List[tuple[ast.AST, bool]] = []
+            for name, value in ast.iter_fields(node):
+                if isinstance(value, list):
+                    nested = in_cfg and name in ("body", "orelse")
+                    for item in value:
+                        if isinstance(item, ast.AST):
+                            children.append((item, nested))
+                elif isinstance(value, ast.AST):
+                    children.append((value, False))
+            stack.extend(reversed(children))
 
 
 class CodeAnalyzer:
     """Analyze Python code to build a CFG and compute metrics."""
 
+    # Batching limits of ``stream_qa``: characters and seconds per batch.
+    STREAM_BATCH_SIZE = 65536
+    STREAM_BATCH_DELAY = 0.1
+
     def __init__(self, code: str) -> None:
         self.code = code
         self.tree = ast.parse(code)
-        self.cfg = self._build_cfg()
-        visitor = _MetricsVisitor()
-        visitor.visit(self.tree)
-        self.variables_defined = visitor.variables_defined
-        self.variables_used = visitor.variables_used
-        self.loops = visitor.loops
-        self.complexity = visitor.complexity
+        walker = _Walker()
+        walker.walk(self.tree)
+        self.cfg = self._build_cfg(walker.statements)
+        self.variables_defined = walker.variables_defined
+        self.variables_used = walker.variables_used
+        self.loops = walker.loops
+        self.complexity = walker.complexity
 
     # ---- analysis helpers ---------------------------------------------
-    def _build_cfg(self) -> CFG:
+    @staticmethod
+    def _build_cfg(statements: List[ast.stmt]) -> CFG:
         cfg = CFG()
-        statements: List[ast.stmt] = []
-
-        def _flatten(stmts: List[ast.stmt]) -> None:
-            for stmt in stmts:
-                statements.append(stmt)
-                body = getattr(stmt, "body", None)
-                if isinstance(body, list):
-                    _flatten(body)
-                orelse = getattr(stmt, "orelse", None)
-                if isinstance(orelse, list):
-                    _flatten(orelse)
-        _flatten(self.tree.body)
-
         for i, stmt in enumerate(statements):
             line = stmt.lineno
             cfg.nodes[line] = stmt
@@ -90,6 +133,7 @@ class CodeAnalyzer:
             if isinstance(stmt, (ast.For, ast.While)) and stmt.body:
                 last = stmt.body[-1].lineno
                 cfg.edges.setdefault(last, set()).add(line)
+        cfg.pack()
         return cfg
 
     # ---- LLM helpers --------------------------------------------------
@@ -112,7 +156,24 @@ class CodeAnalyzer:
         return await provider._call(prompt, purpose="qa")
 
     async def stream_qa(self, question: str, provider: LLMProvider) -> AsyncGenerator[str, None]:
-        """Stream an answer from ``provider`` for ``question`` about the code."""
+        """Stream an answer from ``provider`` for ``question`` about the code.
+
+        Chunks are joined and passed on once ``STREAM_BATCH_SIZE`` characters
+        are buffered or ``STREAM_BATCH_DELAY`` seconds have passed since the
+        last batch, checked as each chunk arrives, so token-sized fragments
+        don't cost the consumer one step each.
+        """
         prompt = f"{question}\nCode:\n{self.code}"
+        buf: List[str] = []
+        size = 0
+        last = time.monotonic()
         async for chunk in provider.stream(prompt):
-            yield chunk
+            buf.append(chunk)
+            size += len(chunk)
+            if size >= self.STREAM_BATCH_SIZE or time.monotonic() - last >= self.STREAM_BATCH_DELAY:
+                yield "".join(buf)
+                buf.clear()
+                size = 0
+                last = time.monotonic()
+        if buf:
+            yield "".join(buf)
@@ -6,35 +6,114 @@ import asyncio
 import os
 import json
 import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
 from typing import AsyncGenerator, Any
 
-try:
-    import openai  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - optional
-    openai = None  # type: ignore
+from ..llm_client import _import_sdk
 
 try:
-    import anthropic  # type: ignore
+    import blake3  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover - optional
-    anthropic = None  # type: ignore
+    blake3 = None  # type: ignore
 
-try:
-    import google.generativeai as generativeai  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - optional
-    generativeai = None  # type: ignore
 
-try:
-    import ollama  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - optional
-    ollama = None  # type: ignore
+class _ResponseCache:
+    """Thread-safe LRU of responses, optionally expiring after ``ttl`` seconds."""
 
-try:
-    import huggingface_hub  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - optional
-    huggingface_hub = None  # type: ignore
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return None
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_ttl = os.getenv("UOR_LLM_CACHE_TTL")
+_cache = _ResponseCache(
+    int(os.getenv("UOR_LLM_CACHE_MAX", "4096")),
+    float(_ttl) if _ttl else None,
+)
+del _ttl
+
+
+class _Broadcast:
+    """Chunks of one in-flight stream, replayed to every subscriber."""
+
+    def __init__(self) -> None:
+        self.chunks: list[str] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._wake()
+
+    def close(self, error: BaseException | None = None) -> None:
+        self.done = True
+        self.error = error
+        self._wake()
+
+    def _wake(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def replay(self) -> AsyncGenerator[str, None]:
+        idx = 0
+        while True:
+            while idx < len(self.chunks):
+                yield self.chunks[idx]
+                idx += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+# Requests currently being sent, by cache key, so concurrent duplicates
+# wait for the first one instead of paying for another API call.
+_inflight: dict[str, asyncio.Future] = {}
+_inflight_streams: dict[str, _Broadcast] = {}
 
 
-_cache: dict[str, str] = {}
+def _digest(data: bytes) -> str:
+    """Digest ``data`` for use as a cache key.
+
+    Uses BLAKE3 when installed; otherwise SHA-256, which OpenSSL runs with
+    the CPU's SHA extensions and is faster here than BLAKE2b.
+    """
+    if blake3 is not None:
+        return blake3.blake3(data).hexdigest()
+    return hashlib.sha256(data, usedforsecurity=False).hexdigest()
 
 
 def _approx_tokens(text: str) -> int:
@@ -75,49 +154,78 @@ class LLMProvider(abc.ABC):
     # --- internal helpers ----------------------------------------------
     async def _call(self, prompt: str, *, purpose: str) -> str:
         key = self._cache_key(prompt, purpose)
-        if key in _cache:
-            return _cache[key]
-
-        for attempt in range(self.max_retries):
-            try:
-                resp = await self._send_request(prompt)
-                _cache[key] = resp
-                self._update_cost(prompt, resp)
-                return resp
-            except Exception:
-                if attempt >= self.max_retries - 1:
-                    raise
-                await asyncio.sleep(2 ** attempt)
-        raise RuntimeError("unreachable")
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+        pending = _inflight.get(key)
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            return await asyncio.shield(pending)
+
+        fut = asyncio.get_running_loop().create_future()
+        _inflight[key] = fut
+        try:
+            for attempt in range(self.max_retries):
+                try:
+                    resp = await self._send_request(prompt)
+                    _cache.put(key, resp)
+                    self._update_cost(prompt, resp)
+                    fut.set_result(resp)
+                    return resp
+                except Exception as exc:
+                    if attempt >= self.max_retries - 1:
+                        fut.set_exception(exc)
+                        # Waiters re-raise it; don't warn when there are none.
+                        fut.exception()
+                        raise
+                    await asyncio.sleep(2 ** attempt)
+            raise RuntimeError("unreachable")
+        finally:
+            if not fut.done():
+                fut.cancel()
+            if _inflight.get(key) is fut:
+                del _inflight[key]
 
     async def _stream_call(self, prompt: str) -> AsyncGenerator[str, None]:
         key = self._cache_key(prompt, "stream")
-        if key in _cache:
-            yield _cache[key]
+        cached = _cache.get(key)
+        if cached is not None:
+            yield cached
             return
-        acc = []
-        for attempt in range(self.max_retries):
-            try:
-                async for chunk in self._send_request_stream(prompt):
-                    acc.append(chunk)
-                    yield chunk
-                resp = "".join(acc)
-                _cache[key] = resp
-                self._update_cost(prompt, resp)
-                return
-            except Exception:
-                if attempt >= self.max_retries - 1:
-                    raise
-                await asyncio.sleep(2 ** attempt)
-        raise RuntimeError("unreachable")
+        pending = _inflight_streams.get(key)
+        if pending is not None:
+            async for chunk in pending.replay():
+                yield chunk
+            return
+
+        broadcast = _Broadcast()
+        _inflight_streams[key] = broadcast
+        error: BaseException | None = RuntimeError("stream was interrupted")
+        try:
+            acc = []
+            for attempt in range(self.max_retries):
+                try:
+                    async for chunk in self._send_request_stream(prompt):
+                        acc.append(chunk)
+                        broadcast.publish(chunk)
+                        yield chunk
+                    resp = "".join(acc)
+                    _cache.put(key, resp)
+                    self._update_cost(prompt, resp)
+                    error = None
+                    return
+                except Exception as exc:
+                    if attempt >= self.max_retries - 1:
+                        error = exc
+                        raise
+                    await asyncio.sleep(2 ** attempt)
+            raise RuntimeError("unreachable")
+        finally:
+            broadcast.close(error)
+            if _inflight_streams.get(key) is broadcast:
+                del _inflight_streams[key]
 
     def _cache_key(self, prompt: str, purpose: str) -> str:
-        m = hashlib.sha256()
-        m.update(self.__class__.__name__.encode())
-        m.update(purpose.encode())
-        m.update(self.model.encode())
-        m.update(prompt.encode())
-        return m.hexdigest()
+        return _digest("\0".join((self.__class__.__name__, purpose, self.model, prompt)).encode())
 
     def _update_cost(self, prompt: str, resp: str) -> None:
         tokens = _approx_tokens(prompt) + _approx_tokens(resp)
@@ -143,8 +251,7 @@ class OpenAIProvider(LLMProvider):
     price_per_1k_tokens = 0.001
 
     async def _send_request(self, prompt: str) -> str:
-        if openai is None:  # pragma: no cover - optional dependency
-            raise RuntimeError("openai library is not installed")
+        openai = _import_sdk("openai", "openai")
         openai.api_key = os.getenv("OPENAI_API_KEY", "")
         if not openai.api_key:
             raise RuntimeError("OPENAI_API_KEY is required")
@@ -155,8 +262,7 @@ class OpenAIProvider(LLMProvider):
         return resp.choices[0].message.content
 
     async def _send_request_stream(self, prompt: str) -> AsyncGenerator[str, None]:
-        if openai is None:  # pragma: no cover - optional
-            raise RuntimeError("openai library is not installed")
+        openai = _import_sdk("openai", "openai")
         openai.api_key = os.getenv("OPENAI_API_KEY", "")
         if not openai.api_key:
             raise RuntimeError("OPENAI_API_KEY is required")
@@ -176,8 +282,7 @@ class AnthropicProvider(LLMProvider):
     price_per_1k_tokens = 0.002
 
     async def _send_request(self, prompt: str) -> str:
-        if anthropic is None:  # pragma: no cover - optional
-            raise RuntimeError("anthropic library is not installed")
+        anthropic = _import_sdk("anthropic", "anthropic")
         client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY", ""))
         resp = await client.messages.create(
             model=self.model,
@@ -186,8 +291,7 @@ class AnthropicProvider(LLMProvider):
         return getattr(resp, "content", getattr(resp, "completion"))
 
     async def _send_request_stream(self, prompt: str) -> AsyncGenerator[str, None]:
-        if anthropic is None:  # pragma: no cover - optional
-            raise RuntimeError("anthropic library is not installed")
+        anthropic = _import_sdk("anthropic", "anthropic")
         client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY", ""))
         stream = await client.messages.create(
             model=self.model,
@@ -205,16 +309,14 @@ class GeminiProvider(LLMProvider):
     price_per_1k_tokens = 0.001
 
     async def _send_request(self, prompt: str) -> str:
-        if generativeai is None:  # pragma: no cover - optional
-            raise RuntimeError("google-generativeai library is not installed")
+        generativeai = _import_sdk("google.generativeai", "google-generativeai")
         generativeai.configure(api_key=os.getenv("GOOGLE_API_KEY", ""))
         model = generativeai.GenerativeModel(self.model)
         resp = await asyncio.to_thread(model.generate_content, prompt)
         return resp.text
 
     async def _send_request_stream(self, prompt: str) -> AsyncGenerator[str, None]:
-        if generativeai is None:  # pragma: no cover - optional
-            raise RuntimeError("google-generativeai library is not installed")
+        generativeai = _import_sdk("google.generativeai", "google-generativeai")
         generativeai.configure(api_key=os.getenv("GOOGLE_API_KEY", ""))
         model = generativeai.GenerativeModel(self.model)
         stream = model.generate_content(prompt, stream=True)
@@ -227,14 +329,12 @@ class OllamaProvider(LLMProvider):
     price_per_1k_tokens = 0.0
 
     async def _send_request(self, prompt: str) -> str:
-        if ollama is None:  # pragma: no cover - optional
-            raise RuntimeError("ollama library is not installed")
+        ollama = _import_sdk("ollama", "ollama")
         resp = await ollama.acomplete(model=self.model, prompt=prompt)
         return resp["choices"][0]["message"]["content"]
 
     async def _send_request_stream(self, prompt: str) -> AsyncGenerator[str, None]:
-        if ollama is None:  # pragma: no cover - optional
-            raise RuntimeError("ollama library is not installed")
+        ollama = _import_sdk("ollama", "ollama")
         async for chunk in ollama.astream(model=self.model, prompt=prompt):
             text = chunk.get("message", {}).get("content")
             if text:
@@ -250,15 +350,13 @@ class HuggingFaceProvider(LLMProvider):
         self.token = token or os.getenv("HF_API_TOKEN", "")
 
     async def _send_request(self, prompt: str) -> str:
-        if huggingface_hub is None:  # pragma: no cover - optional
-            raise RuntimeError("huggingface-hub library is not installed")
+        huggingface_hub = _import_sdk("huggingface_hub", "huggingface-hub")
         client = huggingface_hub.InferenceClient(token=self.token)
         resp = await client.text_generation(prompt, model=self.model)
         return resp
 
     async def _send_request_stream(self, prompt: str) -> AsyncGenerator[str, None]:
-        if huggingface_hub is None:  # pragma: no cover - optional
-            raise RuntimeError("huggingface-hub library is not installed")
+        huggingface_hub = _import_sdk("huggingface_hub", "huggingface-hub")
         client = huggingface_hub.InferenceClient(token=self.token)
         async for chunk in client.text_generation(prompt, model=self.model, stream=True):
             yield chunk
@@ -3,46 +3,99 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
+from string import Formatter
 from typing import Any
 import json
 
 
 @dataclass
 class PromptTemplate:
-    """Simple prompt template with optional examples."""
+    """Simple prompt template with optional examples.
+
+    ``text`` is parsed once into literal/field pairs and the examples block
+    is built once, so repeated renders only substitute parameters. Fields
+    with a conversion, format spec or attribute/index access fall back to
+    ``str.format``.
+    """
 
     text: str
     examples: list[dict[str, str]] = field(default_factory=list)
+    _source: str | None = field(default=None, init=False, repr=False, compare=False)
+    _parts: list[tuple[str, str | None]] | None = field(default=None, init=False, repr=False, compare=False)
+    _examples_block: tuple[int, str] | None = field(default=None, init=False, repr=False, compare=False)
 
     def add_example(self, input: str, output: str) -> None:
         """Add an input/output example to the template."""
         self.examples.append({"input": input, "output": output})
+        self._examples_block = None
+
+    def _compiled(self) -> list[tuple[str, str | None]] | None:
+        if self._source is not self.text:
+            parsed = list(Formatter().parse(self.text))
+            simple = all(
+                conv is None and not spec and (name is None or name.isidentifier())
+                for _, name, spec, conv in parsed
+            )
+            self._parts = [(literal, name) for literal, name, _, _ in parsed] if simple else None
+            self._source = self.text
+        return self._parts
+
+    def _examples(self) -> str:
+        cached = self._examples_block
+        if cached is None or cached[0] != len(self.examples):
+            lines = ["", "\nExamples:"]
+            lines += [f"Input: {ex['input']}\nOutput: {ex['output']}" for ex in self.examples]
+            cached = self._examples_block = (len(self.examples), "\n".join(lines) if self.examples else "")
+        return cached[1]
 
     def render(self, **params: Any) -> str:
         """Render the template with ``params`` and included examples."""
-        prompt = self.text.format(**params)
-        if self.examples:
-            parts = [prompt, "\nExamples:"]
-            for ex in self.examples:
-                parts.append(f"Input: {ex['input']}\nOutput: {ex['output']}")
-            prompt = "\n".join(parts)
-        return prompt
+        parts = self._compiled()
+        if parts is None:
+            prompt = self.text.format(**params)
+        else:
+            out = []
+            for literal, name in parts:
+                out.append(literal)
+                if name is not None:
+                    out.append(format(params[name]))
+            prompt = "".join(out)
+        return prompt + self._examples()
 
 
 _TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+_TEMPLATE_EXTS = (".yaml", ".yml", ".json")
+# Template name and file name -> path, listed once on first lookup.
+_TEMPLATE_INDEX: dict[str, Path] | None = None
+
+
+def _template_index() -> dict[str, Path]:
+    global _TEMPLATE_INDEX
+    if _TEMPLATE_INDEX is None:
+        index: dict[str, Path] = {}
+        try:
+            paths = sorted(_TEMPLATES_DIR.iterdir())
+        except OSError:
+            paths = []
+        for ext in _TEMPLATE_EXTS:
+            for path in paths:
+                if path.suffix == ext:
+                    index.setdefault(path.stem, path)
+                    index[path.name] = path
+        _TEMPLATE_INDEX = index
+    return _TEMPLATE_INDEX
 
 
 def _load_raw(path: Path) -> dict[str, Any]:
+    raw = path.read_bytes()
     if path.suffix in {".yaml", ".yml"}:
         try:
             import yaml  # type: ignore
         except ModuleNotFoundError:  # pragma: no cover - optional
-            with path.open("r", encoding="utf-8") as f:
-                return json.load(f)
-        with path.open("r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+            return json.loads(raw)
+        # libyaml's loader when PyYAML was built with it.
+        return yaml.load(raw, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    return json.loads(raw)
 
 
 def _validate_template(data: dict[str, Any]) -> None:
@@ -58,22 +111,29 @@ def _validate_template(data: dict[str, Any]) -> None:
             raise ValueError("each example must have 'input' and 'output'")
 
 
-def load_template(name: str) -> PromptTemplate:
-    """Load a prompt template by ``name`` from the templates directory."""
+def _find_template(name: str) -> Path:
     path = Path(name)
     if not path.suffix:
-        for ext in (".yaml", ".yml", ".json"):
+        for ext in _TEMPLATE_EXTS:
             cand = _TEMPLATES_DIR / f"{name}{ext}"
             if cand.exists():
-                path = cand
-                break
-        else:
-            raise FileNotFoundError(f"Template {name!r} not found")
-    else:
-        path = _TEMPLATES_DIR / name
-        if not path.exists():
-            raise FileNotFoundError(f"Template {name!r} not found")
+                return cand
+        raise FileNotFoundError(f"Template {name!r} not found")
+    path = _TEMPLATES_DIR / name
+    if not path.exists():
+        raise FileNotFoundError(f"Template {name!r} not found")
+    return path
+
+
+def load_template(name: str) -> PromptTemplate:
+    """Load a prompt template by ``name`` from the templates directory.
 
+    Names are looked up in an index of the directory built on first use;
+    files added later are still found by probing each extension.
+    """
+    path = _template_index().get(name)
+    if path is None:
+        path = _find_template(name)
     data = _load_raw(path)
     _validate_template(data)
     tmpl = PromptTemplate(data["prompt"], data.get("examples", []))
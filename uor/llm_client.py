@@ -1,31 +1,27 @@
 """Unified client helpers for calling LLM providers."""
 from __future__ import annotations
 
+import asyncio
+import importlib
 import os
-
-try:
-    import openai  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - optional
-    openai = None  # type: ignore
-
-try:
-    import anthropic  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - optional
-    anthropic = None  # type: ignore
-
-try:
-    import google.generativeai as generativeai  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - optional
-    generativeai = None  # type: ignore
+from types import ModuleType
+from typing import Any
 
 
 class MissingDependencyError(RuntimeError):
     """Raised when a required client library is missing."""
 
 
-def _require(module: object | None, name: str) -> None:
-    if module is None:
-        raise MissingDependencyError(f"{name} library is not installed")
+def _import_sdk(module: str, name: str) -> ModuleType:
+    """Import a provider SDK on first use.
+
+    SDKs are not imported with this module so that loading it stays cheap;
+    once imported, later calls are a ``sys.modules`` lookup.
+    """
+    try:
+        return importlib.import_module(module)
+    except ModuleNotFoundError as exc:
+        raise MissingDependencyError(f"{name} library is not installed") from exc
 
 
 def _get_env(key: str) -> str:
@@ -35,42 +31,45 @@ def _get_env(key: str) -> str:
     return value
 
 
+# provider name -> (``LLMProvider`` class name, SDK module, package name,
+# API key variable, display name)
+_PROVIDERS = {
+    "openai": ("OpenAIProvider", "openai", "openai", "OPENAI_API_KEY", "OpenAI"),
+    "anthropic": ("AnthropicProvider", "anthropic", "anthropic", "ANTHROPIC_API_KEY", "Anthropic"),
+    "gemini": ("GeminiProvider", "google.generativeai", "google-generativeai", "GOOGLE_API_KEY", "Gemini"),
+    "google": ("GeminiProvider", "google.generativeai", "google-generativeai", "GOOGLE_API_KEY", "Gemini"),
+}
+_instances: dict[str, Any] = {}
+
+
+def _get_provider(provider: str) -> Any:
+    """Return the shared ``LLMProvider`` instance for ``provider``."""
+    from .llm import providers
+
+    cls_name = _PROVIDERS[provider][0]
+    instance = _instances.get(cls_name)
+    if instance is None:
+        instance = _instances[cls_name] = getattr(providers, cls_name)()
+    return instance
+
+
 def call_model(provider: str, prompt: str) -> str:
-    """Send ``prompt`` to the given ``provider`` and return the response text."""
-    provider = provider.lower()
-    if provider == "openai":
-        _require(openai, "openai")
-        openai.api_key = _get_env("OPENAI_API_KEY")
-        try:
-            resp = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-            )
-            return resp.choices[0].message.content
-        except Exception as exc:  # pragma: no cover - network errors
-            raise RuntimeError("Failed to call OpenAI") from exc
-
-    if provider == "anthropic":
-        _require(anthropic, "anthropic")
-        try:
-            client = anthropic.Anthropic(api_key=_get_env("ANTHROPIC_API_KEY"))
-            resp = client.messages.create(
-                model="claude-3-opus-20240229",
-                messages=[{"role": "user", "content": prompt}],
-            )
-            return getattr(resp, "content", getattr(resp, "completion"))
-        except Exception as exc:  # pragma: no cover - network errors
-            raise RuntimeError("Failed to call Anthropic") from exc
-
-    if provider in {"gemini", "google"}:
-        _require(generativeai, "google-generativeai")
-        try:
-            generativeai.configure(api_key=_get_env("GOOGLE_API_KEY"))
-            model = generativeai.GenerativeModel("gemini-pro")
-            resp = model.generate_content(prompt)
-            return resp.text
-        except Exception as exc:  # pragma: no cover - network errors
-            raise RuntimeError("Failed to call Gemini") from exc
-
-    raise ValueError(f"Unknown provider: {provider}")
+    """Send ``prompt`` to the given ``provider`` and return the response text.
 
+    A synchronous wrapper over :class:`uor.llm.providers.LLMProvider`, so
+    repeated prompts are answered from its response cache. Must not be
+    called from a running event loop; await the provider directly there.
+    """
+    provider = provider.lower()
+    if provider not in _PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}")
+    _, module, package, env_key, display = _PROVIDERS[provider]
+    # Fail fast instead of through the provider's retry loop.
+    _import_sdk(module, package)
+    _get_env(env_key)
+    try:
+        return asyncio.run(_get_provider(provider).generate_code(prompt))
+    except MissingDependencyError:
+        raise
+    except Exception as exc:  # pragma: no cover - network errors
+        raise RuntimeError(f"Failed to call {display}") from exc
@@ -2,9 +2,16 @@
 from __future__ import annotations
 
 import math
-from typing import Dict, List, Optional
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional
 from enum import Enum, auto
 
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - optional
+    np = None  # type: ignore
+
 
 class MemorySegment(Enum):
     """Logical memory segments."""
@@ -17,8 +24,54 @@ class MemorySegment(Enum):
     MMIO_OUT = auto()
 
 
+class _SegmentView(MutableMapping):
+    """Dict view of the cells ``[start, end)`` that hold a value.
+
+    Cells are zero until written, so only non-zero int64 values and boxed
+    values show up as keys.
+    """
+
+    def __init__(self, mem: "SegmentedMemory", start: int, end: int) -> None:
+        self.mem = mem
+        self.start = start
+        self.end = end
+
+    def __getitem__(self, addr: int) -> Any:
+        if self.start <= addr < self.end:
+            value = self.mem.load(addr)
+            if value != 0 or addr in self.mem._boxed:
+                return value
+        raise KeyError(addr)
+
+    def __setitem__(self, addr: int, value: Any) -> None:
+        if not self.start <= addr < self.end:
+            raise KeyError(addr)
+        self.mem.store(addr, value)
+
+    def __delitem__(self, addr: int) -> None:
+        self[addr]
+        self.mem._zero(addr, addr + 1)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.mem._used(self.start, self.end))
+
+    def __len__(self) -> int:
+        return len(self.mem._used(self.start, self.end))
+
+    def clear(self) -> None:
+        self.mem._zero(self.start, self.end)
+
+
 class SegmentedMemory:
-    """Simple segmented memory with heap allocation and GC."""
+    """Simple segmented memory with heap allocation and GC.
+
+    DATA, HEAP and STACK are laid out back to back from address 0 and backed
+    by a single ``array('q')`` of int64 cells indexed by the address itself,
+    so a RAM access is one range check and zeroing a range is one slice
+    assignment. Values that do not fit an
+    int64 cell (big ints, non-int objects) are boxed in a side dict. With
+    NumPy installed the cells are also exposed as an ndarray for scans.
+    """
 
     # default segment sizes
     CODE_SIZE = 0x1000
@@ -26,7 +79,8 @@ class SegmentedMemory:
     HEAP_SIZE = 0x1000
     STACK_SIZE = 0x1000
 
-    PAGE_SIZE = 256
+    PAGE_SHIFT = 8
+    PAGE_SIZE = 1 << PAGE_SHIFT
 
     # default starts (data begins at 0 for backward compat)
     CODE_START = -CODE_SIZE
@@ -61,10 +115,13 @@ class SegmentedMemory:
         self.MMIO_IN = self.STACK_START + self.STACK_SIZE
         self.MMIO_OUT = self.MMIO_IN + 1
 
-        self.segments: Dict[MemorySegment, Dict[int, int]] = {
-            MemorySegment.DATA: {},
-            MemorySegment.HEAP: {},
-            MemorySegment.STACK: {},
+        self._cells = array("q", bytes(8 * self.MMIO_IN))
+        self._view = np.frombuffer(self._cells, dtype=np.int64) if np is not None else None
+        self._boxed: Dict[int, Any] = {}
+        self.segments: Dict[MemorySegment, _SegmentView] = {
+            MemorySegment.DATA: _SegmentView(self, self.DATA_START, self.HEAP_START),
+            MemorySegment.HEAP: _SegmentView(self, self.HEAP_START, self.STACK_START),
+            MemorySegment.STACK: _SegmentView(self, self.STACK_START, self.MMIO_IN),
         }
         self.permissions = {
             MemorySegment.CODE: {"read": True, "write": False, "execute": True},
@@ -78,13 +135,35 @@ class SegmentedMemory:
         self.heap_pointer = self.HEAP_START
         self.stack_pointer = self.STACK_START
 
-        self._free_pages = set(range(self.HEAP_SIZE // self.PAGE_SIZE))
+        # One byte per heap page, 1 while the page is free, so a run of
+        # free pages is found with a single ``bytearray.find``.
+        self._free_map = bytearray(b"\x01") * (self.HEAP_SIZE // self.PAGE_SIZE)
         self._allocations: Dict[int, Dict[str, object]] = {}
+        # Start address of the allocation owning each heap page, or -1.
+        self._page_owner = array("q", [-1]) * (self.HEAP_SIZE // self.PAGE_SIZE)
+        # 1 on the first page of each allocation the last ``collect`` found
+        # unreachable; allocation reclaims these lazily.
+        self._dead = bytearray(self.HEAP_SIZE // self.PAGE_SIZE)
+        # One byte per page of HEAP and STACK, counted from ``HEAP_START``,
+        # 1 while every cell of the page is known to be zero. Stores there
+        # clear it and ``_zero`` skips ranges made only of such pages.
+        self._zeroed = bytearray(b"\x01") * -(-(self.MMIO_IN - self.HEAP_START) >> self.PAGE_SHIFT)
 
         self.code: List[int] = []
         if code:
             self.load_code(code)
 
+    def reset(self) -> None:
+        """Clear all segments and allocations, keeping the configured layout."""
+        self._zero(self.DATA_START, self.MMIO_IN)
+        self.heap_pointer = self.HEAP_START
+        self.stack_pointer = self.STACK_START
+        self._free_map = bytearray(b"\x01") * len(self._free_map)
+        self._allocations.clear()
+        self._page_owner = array("q", [-1]) * len(self._page_owner)
+        self._dead = bytearray(len(self._dead))
+        self.code = []
+
     def load_code(self, code: List[int]) -> None:
         """Load prime-encoded instructions into the code segment."""
         if len(code) > self.CODE_SIZE:
@@ -108,38 +187,100 @@ class SegmentedMemory:
     # Helpers
     # ------------------------------------------------------------------
     def _segment(self, addr: int) -> MemorySegment:
-        if self.CODE_START <= addr < self.CODE_START + self.CODE_SIZE:
-            return MemorySegment.CODE
-        if self.DATA_START <= addr < self.HEAP_START:
+        # Segments are laid out contiguously from CODE up to MMIO_OUT, so a
+        # single upper-bound compare per segment classifies ``addr``.
+        if addr < self.DATA_START:
+            if addr >= self.CODE_START:
+                return MemorySegment.CODE
+        elif addr < self.HEAP_START:
             return MemorySegment.DATA
-        if self.HEAP_START <= addr < self.STACK_START:
+        elif addr < self.STACK_START:
             return MemorySegment.HEAP
-        if self.STACK_START <= addr < self.STACK_START + self.STACK_SIZE:
+        elif addr < self.MMIO_IN:
             return MemorySegment.STACK
-        if addr == self.MMIO_IN:
+        elif addr == self.MMIO_IN:
             return MemorySegment.MMIO_IN
-        if addr == self.MMIO_OUT:
+        elif addr == self.MMIO_OUT:
             return MemorySegment.MMIO_OUT
         raise MemoryError("Address out of range")
 
+    def _zero(self, lo: int, hi: int) -> None:
+        """Clear ``[lo, hi)``, skipping HEAP/STACK pages known to be zero."""
+        base = self.HEAP_START
+        if lo < base:
+            self._clear(lo, min(hi, base))
+            lo = base
+        if hi <= lo:
+            return
+        shift = self.PAGE_SHIFT
+        zeroed = self._zeroed
+        if zeroed.find(0, (lo - base) >> shift, ((hi - 1 - base) >> shift) + 1) < 0:
+            return
+        # Only pages lying wholly inside the range become known-zero.
+        first, last = -(-(lo - base) >> shift), (hi - base) >> shift
+        if first < last:
+            zeroed[first:last] = b"\x01" * (last - first)
+        self._clear(lo, hi)
+
+    def _clear(self, lo: int, hi: int) -> None:
+        """Clear the cells of addresses ``[lo, hi)``."""
+        if self._view is not None:
+            self._view[lo:hi] = 0
+        else:
+            self._cells[lo:hi] = array("q", bytes(8 * (hi - lo)))
+        boxed = self._boxed
+        if boxed:
+            for addr in [a for a in boxed if lo <= a < hi]:
+                del boxed[addr]
+
+    def _used(self, lo: int, hi: int) -> List[int]:
+        """Return the addresses in ``[lo, hi)`` holding a value, in order."""
+        if self._view is not None:
+            addrs = (np.flatnonzero(self._view[lo:hi] != 0) + lo).tolist()
+        else:
+            cells = self._cells
+            addrs = [a for a in range(lo, hi) if cells[a]]
+        boxed = [a for a in self._boxed if lo <= a < hi]
+        if boxed:
+            addrs = sorted(addrs + boxed)
+        return addrs
+
+    def _heap_refs(self, lo: int, hi: int) -> List[int]:
+        """Return the values in cells ``[lo, hi)`` that point into the heap."""
+        if self._view is not None:
+            vals = self._view[lo:hi]
+            return vals[(vals >= self.HEAP_START) & (vals < self.STACK_START)].tolist()
+        return [v for v in self._cells[lo:hi] if self.HEAP_START <= v < self.STACK_START]
+
     def _page_for(self, addr: int) -> int:
-        return (addr - self.HEAP_START) // self.PAGE_SIZE
+        return (addr - self.HEAP_START) >> self.PAGE_SHIFT
 
     def _alloc_for_addr(self, addr: int) -> Optional[int]:
-        for start, info in self._allocations.items():
-            pages = info["pages"]  # type: ignore
-            size = info["size"]  # type: ignore
-            start_page = self._page_for(start)
-            if start <= addr < start + size:
-                return start
-            if any(start_page + i == self._page_for(addr) for i in pages):
+        """Return the start of the allocation whose pages contain ``addr``."""
+        page = (addr - self.HEAP_START) >> self.PAGE_SHIFT
+        if 0 <= page < len(self._page_owner):
+            start = self._page_owner[page]
+            if start >= 0:
                 return start
         return None
 
+    def _owners(self, ptrs: List[int]) -> set:
+        """Return the start addresses of the allocations containing ``ptrs``."""
+        if np is None or not ptrs:
+            return {s for s in map(self._alloc_for_addr, ptrs) if s is not None}
+        owner = np.frombuffer(self._page_owner, np.int64)
+        pages = (np.array(ptrs, np.int64) - self.HEAP_START) >> self.PAGE_SHIFT
+        starts = owner[pages[(pages >= 0) & (pages < len(owner))]]
+        return set(np.unique(starts[starts >= 0]).tolist())
+
     # ------------------------------------------------------------------
     # Basic load/store with MMIO
     # ------------------------------------------------------------------
     def load(self, addr: int) -> int:
+        if 0 <= addr < self.MMIO_IN:
+            if self._boxed and addr in self._boxed:
+                return self._boxed[addr]
+            return self._cells[addr]
         seg = self._segment(addr)
         if not self.permissions[seg]["read"]:
             if seg == MemorySegment.MMIO_OUT:
@@ -157,9 +298,27 @@ class SegmentedMemory:
                 return self.vm.io_in.pop(0)
             return 0
 
-        return self.segments[seg].get(addr, 0)
+        raise MemoryError("Address out of range")
 
     def store(self, addr: int, value: int) -> None:
+        # DATA stores skip the known-zero page bookkeeping entirely.
+        if not 0 <= addr < self.HEAP_START:
+            if not self.HEAP_START <= addr < self.MMIO_IN:
+                self._store_special(addr, value)
+                return
+            self._zeroed[(addr - self.HEAP_START) >> self.PAGE_SHIFT] = 0
+        if type(value) is int:
+            try:
+                self._cells[addr] = value
+                if self._boxed:
+                    self._boxed.pop(addr, None)
+                return
+            except OverflowError:
+                pass
+        self._cells[addr] = 0
+        self._boxed[addr] = value
+
+    def _store_special(self, addr: int, value: int) -> None:
         seg = self._segment(addr)
         if not self.permissions[seg]["write"]:
             if seg == MemorySegment.CODE:
@@ -171,9 +330,6 @@ class SegmentedMemory:
         if seg == MemorySegment.MMIO_OUT:
             if self.vm is not None:
                 self.vm.io_out.append(value)
-            return
-
-        self.segments[seg][addr] = value
 
     # ------------------------------------------------------------------
     # Allocation helpers
@@ -191,8 +347,7 @@ class SegmentedMemory:
         if self.heap_pointer + size > self.STACK_START:
             raise MemoryError("Out of heap memory")
         addr = self.heap_pointer
-        for o in range(size):
-            self.segments[MemorySegment.HEAP][addr + o] = 0
+        self._zero(addr, addr + size)
         self.heap_pointer += size
         return addr
 
@@ -200,71 +355,83 @@ class SegmentedMemory:
         if self.stack_pointer + size > self.STACK_START + self.STACK_SIZE:
             raise MemoryError("Out of stack memory")
         addr = self.stack_pointer
-        for o in range(size):
-            self.segments[MemorySegment.STACK][addr + o] = 0
+        self._zero(addr, addr + size)
         self.stack_pointer += size
         return addr
 
     def _try_allocate(self, size: int) -> Optional[int]:
-        pages_needed = math.ceil(size / self.PAGE_SIZE)
-        pages = sorted(self._free_pages)
-        for i in range(len(pages) - pages_needed + 1):
-            run = pages[i : i + pages_needed]
-            if run == list(range(pages[i], pages[i] + pages_needed)):
-                for p in run:
-                    self._free_pages.remove(p)
-                start = self.HEAP_START + run[0] * self.PAGE_SIZE
-                self._allocations[start] = {"pages": run, "size": size, "marked": False}
-                for o in range(size):
-                    self.segments[MemorySegment.HEAP][start + o] = 0
-                return start
-        return None
+        pages_needed = max(1, math.ceil(size / self.PAGE_SIZE))
+        # Lazy sweep: each allocation reclaims one dead allocation first,
+        # and more only while no run of free pages is long enough.
+        dead = self._dead.find(1)
+        if dead >= 0:
+            self.free(self.HEAP_START + dead * self.PAGE_SIZE)
+        run_of_free = b"\x01" * pages_needed
+        first = self._free_map.find(run_of_free)
+        while first < 0 and self._reclaim_dead():
+            first = self._free_map.find(run_of_free)
+        if first < 0:
+            return None
+        run = list(range(first, first + pages_needed))
+        start = self.HEAP_START + first * self.PAGE_SIZE
+        self._free_map[first : first + pages_needed] = bytes(pages_needed)
+        for p in run:
+            self._page_owner[p] = start
+        self._allocations[start] = {"pages": run, "size": size, "marked": False}
+        self._zero(start, start + size)
+        return start
 
     def free(self, addr: int) -> None:
         info = self._allocations.pop(addr, None)
         if not info:
             return
-        for p in info["pages"]:  # type: ignore
-            self._free_pages.add(p)
-            base = self.HEAP_START + p * self.PAGE_SIZE
-            for o in range(self.PAGE_SIZE):
-                self.segments[MemorySegment.HEAP].pop(base + o, None)
+        pages = info["pages"]
+        self._dead[pages[0]] = 0  # type: ignore
+        for p in pages:  # type: ignore
+            self._free_map[p] = 1
+            self._page_owner[p] = -1
+        self._zero(addr, addr + len(pages) * self.PAGE_SIZE)  # type: ignore
 
     # ------------------------------------------------------------------
     # Mark and sweep GC
     # ------------------------------------------------------------------
+    def _reclaim_dead(self) -> bool:
+        """Free the lowest dead allocation; return False if there is none."""
+        page = self._dead.find(1)
+        if page < 0:
+            return False
+        self.free(self.HEAP_START + page * self.PAGE_SIZE)
+        return True
+
+    def sweep(self) -> None:
+        """Reclaim every allocation the last ``collect`` found unreachable."""
+        while self._reclaim_dead():
+            pass
+
     def collect(self, vm=None) -> None:
+        """Mark reachable allocations and flag the rest as dead.
+
+        Dead allocations keep their pages until an allocation reclaims them
+        or :meth:`sweep` runs, so the pause only covers marking.
+        """
+        # Cells of allocations left dead by the previous cycle would
+        # otherwise be scanned as roots.
+        self.sweep()
         roots: List[int] = []
         if vm is not None:
             roots.extend(v for v in getattr(vm, "stack", []) if isinstance(v, int))
             roots.extend(v for v in getattr(vm, "call_stack", []) if isinstance(v, int))
-        all_vals = []
-        for store in self.segments.values():
-            all_vals.extend(store.values())
-        roots.extend(v for v in all_vals if isinstance(v, int))
-        work = [r for r in roots if self.HEAP_START <= r < self.STACK_START]
-        marked = set()
-        while work:
-            ptr = work.pop()
-            start = self._alloc_for_addr(ptr)
-            if start is None or start in marked:
-                continue
-            marked.add(start)
-            info = self._allocations.get(start)
-            if not info:
-                continue
-            size = info["size"]  # type: ignore
-            for o in range(size):
-                val = self.segments[MemorySegment.HEAP].get(start + o)
-                if (
-                    isinstance(val, int)
-                    and self.HEAP_START <= val < self.STACK_START
-                    and self._alloc_for_addr(val) not in marked
-                ):
-                    work.append(val)
-        for start, info in list(self._allocations.items()):
+        roots.extend(v for v in self._boxed.values() if isinstance(v, int))
+        ptrs = [r for r in roots if self.HEAP_START <= r < self.STACK_START]
+        ptrs.extend(self._heap_refs(self.DATA_START, self.MMIO_IN))
+        # Every RAM cell is scanned as a root, so the pointers held inside
+        # live allocations are already in ``ptrs`` and marking needs no
+        # tracing pass: it is just the owner lookup of each pointer.
+        marked = self._owners(ptrs)
+        dead = self._dead
+        for start, info in self._allocations.items():
             if start not in marked:
-                self.free(start)
+                dead[info["pages"][0]] = 1  # type: ignore
             else:
                 info["marked"] = False
 
@@ -272,20 +439,17 @@ class SegmentedMemory:
     # Helpers for checkpointing
     # ------------------------------------------------------------------
     def dump(self) -> Dict[int, int]:
-        data: Dict[int, int] = {}
-        for store in self.segments.values():
-            data.update(store)
-        return data
+        """Return ``{addr: value}`` for every DATA/HEAP/STACK cell holding a value."""
+        return {addr: self.load(addr) for addr in self._used(self.DATA_START, self.MMIO_IN)}
 
     def load_dump(self, data: Dict[int, int]) -> None:
-        for seg in self.segments.values():
-            seg.clear()
+        self._zero(self.DATA_START, self.MMIO_IN)
         for addr, val in data.items():
             seg = self._segment(addr)
             if seg in (MemorySegment.MMIO_IN, MemorySegment.MMIO_OUT, MemorySegment.CODE):
                 continue
-            self.segments[seg][addr] = val
+            self.store(addr, val)
 
     def __len__(self) -> int:
-        return sum(len(seg) for seg in self.segments.values())
+        return len(self._used(self.DATA_START, self.MMIO_IN))
 
@@ -1,19 +1,21 @@
 """Parallelized UniversalNumber helpers."""
 from __future__ import annotations
 
-from typing import Dict, List
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping
 
 import numpy as np
 
 try:
-    from numba import njit, cuda, int64
-    from numba.typed import List as NumbaList
-    from numba.types import UniTuple
+    from numba import njit, cuda, prange
     NUMBA_AVAILABLE = True
     CUDA_AVAILABLE = cuda.is_available()
 except Exception:  # pragma: no cover - optional dependency may be missing
     NUMBA_AVAILABLE = False
     CUDA_AVAILABLE = False
+    prange = range
 
     def njit(*args, **kwargs):  # type: ignore
         if args and callable(args[0]):
@@ -28,40 +30,80 @@ except Exception:  # pragma: no cover - optional dependency may be missing
         def __getattr__(self, name):
             raise RuntimeError("CUDA not available")
     cuda = DummyCuda()  # type: ignore
-    int64 = None  # type: ignore
-    def NumbaList(*args, **kwargs):  # type: ignore
-        raise RuntimeError("Numba not available")
-    def UniTuple(*args, **kwargs):  # type: ignore
-        raise RuntimeError("Numba not available")
+
+
+# Gaps between successive integers coprime to 30, starting from 7.
+_WHEEL = (4, 2, 4, 2, 4, 6, 2, 6)
+# An int64 has at most 15 distinct prime factors.
+MAX_FACTORS = 16
 
 
 @njit
-def _factor_list(n: int):
-    res = NumbaList.empty_list(UniTuple(int64, 2)) if NUMBA_AVAILABLE else []
-    i = 2
+def _factor_into(n, pe):
+    """Write the ``(prime, exp)`` pairs of ``n`` into ``pe``; return the count."""
+    k = 0
+    if n < 2:
+        return k
+    for p in (2, 3, 5):
+        cnt = 0
+        while n % p == 0:
+            n //= p
+            cnt += 1
+        if cnt:
+            pe[k, 0] = p
+            pe[k, 1] = cnt
+            k += 1
+    # Trial divide only by numbers coprime to 2, 3 and 5.
+    i = 7
+    w = 0
     while i * i <= n:
         cnt = 0
         while n % i == 0:
             n //= i
             cnt += 1
         if cnt:
-            if NUMBA_AVAILABLE:
-                res.append((i, cnt))
-            else:
-                res.append((i, cnt))
-        i += 1
+            pe[k, 0] = i
+            pe[k, 1] = cnt
+            k += 1
+        i += _WHEEL[w]
+        w = (w + 1) & 7
     if n > 1:
-        if NUMBA_AVAILABLE:
-            res.append((n, 1))
-        else:
-            res.append((n, 1))
-    return res
+        pe[k, 0] = n
+        pe[k, 1] = 1
+        k += 1
+    return k
+
+
+@njit
+def _factor_list(n: int):
+    pe = np.empty((MAX_FACTORS, 2), dtype=np.int64)
+    k = _factor_into(n, pe)
+    return [(pe[j, 0], pe[j, 1]) for j in range(k)]
+
+
+@njit(parallel=True)
+def _factor_batch(values, out_pe, out_len):
+    for k in prange(values.shape[0]):
+        out_len[k] = _factor_into(values[k], out_pe[k])
+
 
+@lru_cache(maxsize=8192)
+def fast_prime_factorization(value: int) -> Mapping[int, int]:
+    """Return prime factorization of ``value`` using Numba if available.
 
-def fast_prime_factorization(value: int) -> Dict[int, int]:
-    """Return prime factorization of ``value`` using Numba if available."""
+    Results are memoized, so the mapping is returned read-only.
+    """
     pairs = _factor_list(value)
-    return {int(p): int(e) for p, e in pairs}
+    return MappingProxyType({int(p): int(e) for p, e in pairs})
+
+
+def fast_prime_factorization_batch(values: np.ndarray) -> List[Dict[int, int]]:
+    """Factor every value of ``values`` at once, in parallel under Numba."""
+    values = np.ascontiguousarray(values, dtype=np.int64)
+    out_pe = np.zeros((values.shape[0], MAX_FACTORS, 2), dtype=np.int64)
+    out_len = np.zeros(values.shape[0], dtype=np.int64)
+    _factor_batch(values, out_pe, out_len)
+    return [dict(pe[:k].tolist()) for pe, k in zip(out_pe, out_len.tolist())]
 
 
 @njit
@@ -75,6 +117,18 @@ def _haar_cpu(arr: np.ndarray) -> np.ndarray:
         out[n + i] = 0.5 * (a - b)
     return out
 
+
+def _haar_np(arr: np.ndarray) -> np.ndarray:
+    """``_haar_cpu`` as whole-array NumPy operations on strided slices."""
+    n = arr.shape[0] // 2
+    out = np.empty_like(arr)
+    a = arr[0 : 2 * n : 2]
+    b = arr[1 : 2 * n : 2]
+    np.add(a, b, out=out[:n])
+    np.subtract(a, b, out=out[n : 2 * n])
+    out[: 2 * n] *= 0.5
+    return out
+
 if CUDA_AVAILABLE:
     @cuda.jit
     def _haar_kernel(data, out):
@@ -90,18 +144,56 @@ else:  # pragma: no cover - CUDA not available
         raise RuntimeError("CUDA not available")
 
 
+# Per-thread CUDA stream plus pinned host and device buffers for the last
+# few signal lengths, so repeated transforms skip allocation and copy
+# asynchronously.
+_cuda_state = threading.local()
+_CUDA_BUFFER_SLOTS = 4
+
+
+def _haar_cuda(signal: List[float]) -> List[float]:
+    state = _cuda_state
+    if not hasattr(state, "stream"):
+        state.stream = cuda.stream()
+        state.buffers = {}
+    stream = state.stream
+    n = len(signal)
+    bufs = state.buffers.get(n)
+    if bufs is None:
+        if len(state.buffers) >= _CUDA_BUFFER_SLOTS:
+            del state.buffers[next(iter(state.buffers))]
+        bufs = (
+            cuda.pinned_array(n, dtype=np.float64),
+            cuda.pinned_array(n, dtype=np.float64),
+            cuda.device_array(n, dtype=np.float64, stream=stream),
+            cuda.device_array(n, dtype=np.float64, stream=stream),
+        )
+        state.buffers[n] = bufs
+    h_in, h_out, d_in, d_out = bufs
+    h_in[:] = signal
+    d_in.copy_to_device(h_in, stream=stream)
+    threads = 32
+    blocks = (n // 2 + threads - 1) // threads
+    _haar_kernel[blocks, threads, stream](d_in, d_out)
+    d_out.copy_to_host(h_out, stream=stream)
+    stream.synchronize()
+    return h_out.tolist()
+
+
 def discrete_wavelet_transform(signal: List[float]) -> List[float]:
     """Perform a single-level Haar DWT on ``signal``. Uses CUDA if available."""
-    arr = np.asarray(signal, dtype=np.float64)
     if CUDA_AVAILABLE:
-        d_in = cuda.to_device(arr)
-        d_out = cuda.device_array_like(arr)
-        threads = 32
-        blocks = (arr.shape[0] // 2 + threads - 1) // threads
-        _haar_kernel[blocks, threads](d_in, d_out)
-        return d_out.copy_to_host().tolist()
-    else:
+        return _haar_cuda(signal)
+    arr = np.asarray(signal, dtype=np.float64)
+    if NUMBA_AVAILABLE:
         return _haar_cpu(arr).tolist()
+    else:
+        return _haar_np(arr).tolist()
 
 
-__all__ = ["fast_prime_factorization", "discrete_wavelet_transform", "CUDA_AVAILABLE"]
+__all__ = [
+    "fast_prime_factorization",
+    "fast_prime_factorization_batch",
+    "discrete_wavelet_transform",
+    "CUDA_AVAILABLE",
+]
@@ -15,6 +15,8 @@ from .lexer import Lexer, Token
 class Node:
     """Base class for all AST nodes."""
 
+    __slots__ = ()
+
     def accept(self, visitor: "NodeVisitor") -> Iterator:
         method = getattr(visitor, f"visit_{self.__class__.__name__}", None)
         if method is None:
@@ -23,23 +25,23 @@ class Node:
             yield from method(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class ProgramNode(Node):
     body: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class TypeNode(Node):
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ParamNode(Node):
     name: str
     type: TypeNode
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionNode(Node):
     name: str
     params: List[ParamNode]
@@ -47,43 +49,43 @@ class FunctionNode(Node):
     body: "BlockNode"
 
 
-@dataclass
+@dataclass(slots=True)
 class VariableNode(Node):
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class LiteralNode(Node):
     value: object
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOpNode(Node):
     left: Node
     operator: str
     right: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOpNode(Node):
     operator: str
     operand: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class IfNode(Node):
     condition: Node
     then_branch: Node
     else_branch: Optional[Node] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileNode(Node):
     condition: Node
     body: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class ForNode(Node):
     init: Optional[Node]
     condition: Optional[Node]
@@ -91,53 +93,53 @@ class ForNode(Node):
     body: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnNode(Node):
     value: Optional[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class CallNode(Node):
     callee: Node
     args: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentNode(Node):
     target: VariableNode
     value: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class VarDeclNode(Node):
     name: str
     initializer: Optional[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class FieldNode(Node):
     name: str
     type: TypeNode
 
 
-@dataclass
+@dataclass(slots=True)
 class MethodNode(FunctionNode):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class ObjectNode(Node):
     name: str
     coherent: bool
     members: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionStatement(Node):
     expression: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class BlockNode(Node):
     statements: List[Node]
 
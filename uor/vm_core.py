@@ -0,0 +1,286 @@
+"""Native interpreter loop for the integer core of the VM.
+
+Programs are encoded once into an ``(N, 2)`` ``int64`` array of
+``(opcode, argument)`` rows that :func:`run` executes under Numba. Only
+instructions whose effect can be reproduced exactly on ``int64`` values are
+encoded; everything else becomes ``K_STOP`` and is left to the Python
+interpreter. The kernel also stops *before* any instruction that would
+underflow, overflow the stack, overflow ``int64`` or divide by zero, so the
+caller can run that instruction through its regular handler and raise the
+same errors.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from chunks import (
+    NEG_FLAG,
+    OP_ADD,
+    OP_DIV,
+    OP_DROP,
+    OP_DUP,
+    OP_EQ,
+    OP_GT,
+    OP_GTE,
+    OP_JMP,
+    OP_JNZ,
+    OP_JZ,
+    OP_LOAD,
+    OP_LT,
+    OP_LTE,
+    OP_MOD,
+    OP_MUL,
+    OP_NEG,
+    OP_NEQ,
+    OP_OVER,
+    OP_PRINT,
+    OP_PUSH,
+    OP_STORE,
+    OP_SUB,
+    OP_SWAP,
+)
+from decoder import DecodedInstruction
+from primes import _PRIME_IDX
+from uor.memory import SegmentedMemory
+
+try:
+    import numpy as np
+    from numba import njit
+except ModuleNotFoundError:  # pragma: no cover - optional
+    np = None  # type: ignore
+    njit = None  # type: ignore
+
+NUMBA_AVAILABLE = njit is not None
+
+(
+    K_STOP,
+    K_PUSH,
+    K_ADD,
+    K_SUB,
+    K_MUL,
+    K_DIV,
+    K_MOD,
+    K_NEG,
+    K_LOAD,
+    K_STORE,
+    K_JMP,
+    K_JZ,
+    K_JNZ,
+    K_PRINT,
+    K_DUP,
+    K_DROP,
+    K_SWAP,
+    K_OVER,
+    K_GT,
+    K_LT,
+    K_EQ,
+    K_NEQ,
+    K_GTE,
+    K_LTE,
+) = range(24)
+
+_SIMPLE = {
+    OP_ADD: K_ADD,
+    OP_SUB: K_SUB,
+    OP_MUL: K_MUL,
+    OP_DIV: K_DIV,
+    OP_MOD: K_MOD,
+    OP_NEG: K_NEG,
+    OP_PRINT: K_PRINT,
+    OP_DUP: K_DUP,
+    OP_DROP: K_DROP,
+    OP_SWAP: K_SWAP,
+    OP_OVER: K_OVER,
+    OP_GT: K_GT,
+    OP_LT: K_LT,
+    OP_EQ: K_EQ,
+    OP_NEQ: K_NEQ,
+    OP_GTE: K_GTE,
+    OP_LTE: K_LTE,
+}
+_JUMPS = {OP_JMP: K_JMP, OP_JZ: K_JZ, OP_JNZ: K_JNZ}
+
+# Operand bounds below which ``+``/``-`` and ``*`` cannot overflow int64.
+_ADD_LIMIT = 1 << 62
+_MUL_LIMIT = 1 << 31
+_I64_MIN = -(1 << 63)
+_I64_MAX = (1 << 63) - 1
+
+
+def _operand(instr: DecodedInstruction) -> int:
+    return _PRIME_IDX[next(p for p, e in instr.data if e == 5 and p != NEG_FLAG)]
+
+
+def encode(program: List[DecodedInstruction]) -> Tuple["np.ndarray", List[int]]:
+    """Return ``(code, addrs)`` for ``program``.
+
+    LOAD/STORE arguments index ``addrs``, the DATA-segment addresses the
+    program touches; accesses to any other segment are left to Python.
+    """
+    code = np.zeros((len(program), 2), dtype=np.int64)
+    slots: dict = {}
+    for idx, instr in enumerate(program):
+        if instr.inner:
+            continue
+        op = instr.op
+        kop = _SIMPLE.get(op)
+        if kop is not None:
+            code[idx, 0] = kop
+        elif op == OP_PUSH:
+            value = instr.push_val
+            if value is not None and value <= _I64_MAX:
+                code[idx] = (K_PUSH, value)
+        elif op in (OP_LOAD, OP_STORE):
+            addr = instr.addr if instr.addr is not None else _operand(instr)
+            if SegmentedMemory.DATA_START <= addr < SegmentedMemory.HEAP_START:
+                code[idx] = (K_LOAD if op == OP_LOAD else K_STORE, slots.setdefault(addr, len(slots)))
+        elif op in _JUMPS:
+            offset = instr.offset
+            if offset is None:
+                sign = -1 if any(p == NEG_FLAG and e == 5 for p, e in instr.data) else 1
+                offset = sign * _operand(instr)
+            target = idx + 1 + offset
+            # A negative ip would index the program from the end in Python.
+            if target >= 0:
+                code[idx] = (_JUMPS[op], target)
+    return code, list(slots)
+
+
+def _run(code, stack, sp, mem, written, ip):  # pragma: no cover - compiled
+    """Execute from ``ip`` and return ``(ip, sp, steps, printed)``.
+
+    Stops at the end of ``code``, at a ``K_STOP`` row, before an instruction
+    the kernel cannot complete exactly, or right after a PRINT so output is
+    yielded in step with execution. ``printed`` holds the PRINT value when the
+    last step was a PRINT and ``steps`` is then negated.
+    """
+    n = code.shape[0]
+    cap = stack.shape[0]
+    steps = 0
+    while ip < n:
+        op = code[ip, 0]
+        arg = code[ip, 1]
+        if op == K_PUSH or op == K_LOAD or op == K_DUP or op == K_OVER:
+            if sp >= cap:
+                break
+            if op == K_PUSH:
+                stack[sp] = arg
+            elif op == K_LOAD:
+                stack[sp] = mem[arg]
+            elif op == K_DUP:
+                if sp < 1:
+                    break
+                stack[sp] = stack[sp - 1]
+            else:
+                if sp < 2:
+                    break
+                stack[sp] = stack[sp - 2]
+            sp += 1
+        elif op == K_STORE or op == K_PRINT or op == K_DROP:
+            if sp < 1:
+                break
+            sp -= 1
+            if op == K_PRINT:
+                return ip + 1, sp, -(steps + 1), stack[sp]
+            if op == K_STORE:
+                mem[arg] = stack[sp]
+                written[arg] = 1
+        elif op == K_NEG:
+            if sp < 1 or stack[sp - 1] <= -_ADD_LIMIT:
+                break
+            stack[sp - 1] = -stack[sp - 1]
+        elif op == K_JMP:
+            ip = arg
+            steps += 1
+            continue
+        elif op == K_JZ or op == K_JNZ:
+            if sp < 1:
+                break
+            sp -= 1
+            if (stack[sp] == 0) == (op == K_JZ):
+                ip = arg
+                steps += 1
+                continue
+        elif op == K_STOP:
+            break
+        elif op == K_SWAP:
+            if sp < 2:
+                break
+            a = stack[sp - 2]
+            stack[sp - 2] = stack[sp - 1]
+            stack[sp - 1] = a
+        else:
+            if sp < 2:
+                break
+            a = stack[sp - 2]
+            b = stack[sp - 1]
+            if op >= K_GT:
+                if op == K_GT:
+                    r = a > b
+                elif op == K_LT:
+                    r = a < b
+                elif op == K_EQ:
+                    r = a == b
+                elif op == K_NEQ:
+                    r = a != b
+                elif op == K_GTE:
+                    r = a >= b
+                else:
+                    r = a <= b
+                stack[sp - 2] = 1 if r else 0
+            elif op == K_ADD or op == K_SUB:
+                if a >= _ADD_LIMIT or a <= -_ADD_LIMIT or b >= _ADD_LIMIT or b <= -_ADD_LIMIT:
+                    break
+                stack[sp - 2] = a + b if op == K_ADD else a - b
+            elif op == K_MUL:
+                if a >= _MUL_LIMIT or a <= -_MUL_LIMIT or b >= _MUL_LIMIT or b <= -_MUL_LIMIT:
+                    break
+                stack[sp - 2] = a * b
+            else:
+                if b == 0 or (a == _I64_MIN and b == -1):
+                    break
+                stack[sp - 2] = a // b if op == K_DIV else a % b
+            sp -= 1
+        ip += 1
+        steps += 1
+    return ip, sp, steps, 0
+
+
+run = njit(cache=True)(_run) if NUMBA_AVAILABLE else None
+
+
+def enter(
+    vm, code: "np.ndarray", addrs: List[int], stack_checked: bool = False
+) -> Tuple[int, Optional[int]]:
+    """Run ``vm`` natively from ``vm.ip`` and copy the state back.
+
+    Returns ``(steps, printed)``: the number of instructions executed and the
+    value printed by the last one, if it was a PRINT. ``steps`` is 0 when the
+    current state cannot be represented in ``int64``. Callers that know the
+    stack only holds ``int64`` values, e.g. because it was just written back
+    by ``enter``, pass ``stack_checked`` to skip rescanning it.
+    """
+    stack = vm.stack
+    if not stack_checked:
+        for v in stack:
+            if type(v) is not int or not _I64_MIN <= v <= _I64_MAX:
+                return 0, None
+    values = [vm.mem.load(a) for a in addrs]
+    for v in values:
+        if type(v) is not int or not _I64_MIN <= v <= _I64_MAX:
+            return 0, None
+    buf = np.empty(SegmentedMemory.STACK_SIZE, dtype=np.int64)
+    buf[: len(stack)] = stack
+    mem = np.array(values, dtype=np.int64)
+    written = np.zeros(len(addrs), dtype=np.int8)
+    ip, sp, steps, printed = run(code, buf, len(stack), mem, written, vm.ip)
+    vm.ip = ip
+    stack[:] = buf[:sp].tolist()
+    for slot in np.flatnonzero(written).tolist():
+        vm.mem.store(addrs[slot], int(mem[slot]))
+    if steps < 0:
+        return -steps, int(printed)
+    return steps, None
+
+
+__all__ = ["NUMBA_AVAILABLE", "encode", "enter", "run"]
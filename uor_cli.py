@@ -49,12 +49,12 @@ def cmd_run(args: argparse.Namespace) -> int:
         text = sys.stdin.read()
         chunks_list = assembler.assemble(text)
     elif args.source.endswith('.uor'):
-        with open(args.source, 'r', encoding='utf-8') as fh:
-            chunks_list = [int(x) for x in fh.read().split() if x]
+        with open(args.source, 'rb') as fh:
+            chunks_list = assembler.parse_uor_bytes(fh.read())
     else:
-        chunks_list = assembler.assemble_file(args.source)
+        chunks_list = assembler.assemble_file_cached(args.source)
     vm = VM()
-    output = ''.join(vm.execute(decode(chunks_list)))
+    output = ''.join(vm.execute_raw(chunks_list))
     print(output)
     return 0
 
@@ -65,10 +65,10 @@ def cmd_debug(args: argparse.Namespace) -> int:
         text = sys.stdin.read()
         chunks_list = assembler.assemble(text)
     elif args.source.endswith('.uor'):
-        with open(args.source, 'r', encoding='utf-8') as fh:
-            chunks_list = [int(x) for x in fh.read().split() if x]
+        with open(args.source, 'rb') as fh:
+            chunks_list = assembler.parse_uor_bytes(fh.read())
     else:
-        chunks_list = assembler.assemble_file(args.source)
+        chunks_list = assembler.assemble_file_cached(args.source)
 
     vm = DebugVM()
     for bp in args.breakpoints:
@@ -86,14 +86,14 @@ def cmd_ipfs_add(args: argparse.Namespace) -> int:
     """Assemble ``source`` and store the encoded program via IPFS."""
     if args.source:
         if args.source.endswith('.uor'):
-            with open(args.source, 'r', encoding='utf-8') as fh:
-                chunks_list = [int(x) for x in fh.read().split() if x]
+            with open(args.source, 'rb') as fh:
+                chunks_list = assembler.parse_uor_bytes(fh.read())
         else:
-            chunks_list = assembler.assemble_file(args.source)
+            chunks_list = assembler.assemble_file_cached(args.source)
     else:
         text = sys.stdin.read()
         chunks_list = assembler.assemble(text)
-    data = '\n'.join(str(x) for x in chunks_list).encode('utf-8')
+    data = assembler.pack_chunks(chunks_list)
     cid = ipfs_storage.add_data(data)
     print(cid)
     return 0
@@ -102,9 +102,9 @@ def cmd_ipfs_add(args: argparse.Namespace) -> int:
 def cmd_ipfs_run(args: argparse.Namespace) -> int:
     """Fetch a program by CID from IPFS and execute it."""
     raw = ipfs_storage.get_data(args.cid)
-    chunks_list = [int(x) for x in raw.decode('utf-8').split() if x]
+    chunks_list = assembler.unpack_chunks(raw)
     vm = VM()
-    output = ''.join(vm.execute(decode(chunks_list)))
+    output = ''.join(vm.execute_raw(chunks_list))
     print(output)
     return 0
 
@@ -113,7 +113,7 @@ def cmd_generate(args: argparse.Namespace) -> int:
     """Generate a program via an LLM and store it in IPFS."""
     asm = llm_client.call_model(args.provider, args.prompt)
     chunks_list = assembler.assemble(asm)
-    data = '\n'.join(str(x) for x in chunks_list).encode('utf-8')
+    data = assembler.pack_chunks(chunks_list)
     cid = ipfs_storage.add_data(data)
     print(cid)
     return 0
@@ -187,8 +187,8 @@ def _load_chunks(source: str | None) -> list[int]:
         text = sys.stdin.read()
         return assembler.assemble(text)
     if source.endswith('.uor'):
-        with open(source, 'r', encoding='utf-8') as fh:
-            return [int(x) for x in fh.read().split() if x]
+        with open(source, 'rb') as fh:
+            return assembler.parse_uor_bytes(fh.read())
     return assembler.assemble_file(source)
 
 
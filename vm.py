@@ -1,9 +1,15 @@
 """Virtual machine implementation."""
 from __future__ import annotations
 
-from typing import List, Iterator, Tuple, Optional, Dict
+from functools import lru_cache, partial
+from typing import Callable, List, Iterator, Tuple, Optional, Dict
 import time
 
+try:
+    import numpy as np  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional
+    np = None  # type: ignore
+
 from uor.jit import JITCompiler, JITBlock
 from uor.profiler import VMProfiler
 from uor.memory import SegmentedMemory
@@ -18,7 +24,7 @@ from uor.exceptions import (
     InvalidOpcodeError,
 )
 
-from decoder import DecodedInstruction
+from decoder import DecodedInstruction, LazyProgram
 
 from primes import _PRIME_IDX
 from chunks import (
@@ -38,13 +44,217 @@ from chunks import (
     OP_HASH, OP_SIGN, OP_VERIFY, OP_RNG, OP_BRK, OP_TRACE, OP_DEBUG, OP_ATOMIC,
     OP_NOT, OP_GT, OP_LT, OP_EQ, OP_NEQ, OP_GTE, OP_LTE,
     OP_DUP, OP_SWAP, OP_ROT, OP_DROP, OP_OVER, OP_PICK,
+    OP_PRINTN,
     NEG_FLAG,
-    BLOCK_TAG, NTT_TAG, T_MOD,
+    T_MOD,
     NTT_ROOT,
 )
 
 
+# ──────────────────────────────────────────────────────────────────────
+# Number theoretic transform
+# ──────────────────────────────────────────────────────────────────────
+
+def _twiddles(root: int, n: int) -> List[int]:
+    """Return ``[root**k % T_MOD for k in range(n)]`` by repeated multiplication."""
+    table = [1] * n
+    for k in range(1, n):
+        table[k] = table[k - 1] * root % T_MOD
+    return table
+
+
+# Lengths from which the NumPy matrix product beats the Python double loop.
+_NUMPY_NTT_MIN = 8
+# Largest length whose gathered NumPy twiddle matrices are kept.
+_NTT_MATRIX_MAX = 64
+
+# n -> (forward twiddles, inverse twiddles, n^-1 mod T_MOD). The tables only
+# depend on ``n`` and constants, so the usual sizes are filled at import.
+_TWIDDLE_CACHE: Dict[int, Tuple[List[int], List[int], int]] = {}
+# n -> forward and inverse ``(n, n)`` int64 matrices for the NumPy path.
+_NTT_MATRICES: Dict[int, Tuple["np.ndarray", "np.ndarray"]] = {}
+
+
+def _ntt_tables(n: int) -> Tuple[List[int], List[int], int]:
+    tables = _TWIDDLE_CACHE.get(n)
+    if tables is None:
+        root = pow(NTT_ROOT, (T_MOD - 1) // n, T_MOD)
+        tables = (
+            _twiddles(root, n),
+            _twiddles(pow(root, T_MOD - 2, T_MOD), n),
+            pow(n, T_MOD - 2, T_MOD),
+        )
+        _TWIDDLE_CACHE[n] = tables
+    return tables
+
+
+def _ntt_matrices(n: int, fwd_w: List[int], inv_w: List[int]) -> Tuple["np.ndarray", "np.ndarray"]:
+    matrices = _NTT_MATRICES.get(n)
+    if matrices is None:
+        idx = np.arange(n)
+        powers = np.outer(idx, idx) % n
+        matrices = (np.asarray(fwd_w, dtype=np.int64)[powers], np.asarray(inv_w, dtype=np.int64)[powers])
+        if n <= _NTT_MATRIX_MAX:
+            _NTT_MATRICES[n] = matrices
+    return matrices
+
+
+for _n in (2, 4, 8, 16, 32, 64):
+    _ntt_tables(_n)
+del _n
+
+
+def ntt_roundtrip(vec: List[int]) -> List[int]:
+    """Apply the forward and then the inverse NTT to ``vec`` modulo ``T_MOD``.
+
+    Each term indexes a twiddle table, cached per length in
+    ``_TWIDDLE_CACHE``, instead of evaluating ``pow(root, i * j % n, T_MOD)``.
+    With NumPy installed, longer vectors are transformed as ``int64``
+    matrix-vector products; inputs are reduced modulo ``T_MOD`` first so the
+    sums cannot overflow.
+    """
+    n = len(vec)
+    fwd_w, inv_w, inv_n = _ntt_tables(n)
+    if np is not None and n >= _NUMPY_NTT_MIN:
+        fwd_m, inv_m = _ntt_matrices(n, fwd_w, inv_w)
+        values = np.asarray([v % T_MOD for v in vec], dtype=np.int64)
+        fwd = fwd_m @ values % T_MOD
+        inv = inv_m @ fwd % T_MOD
+        return (inv * inv_n % T_MOD).tolist()
+    fwd = [sum(v * fwd_w[i * j % n] for j, v in enumerate(vec)) % T_MOD for i in range(n)]
+    return [
+        sum(v * inv_w[i * j % n] for j, v in enumerate(fwd)) % T_MOD * inv_n % T_MOD
+        for i in range(n)
+    ]
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Per-program specialization
+# ──────────────────────────────────────────────────────────────────────
+
+_INLINE_BINARY = {OP_ADD: "+", OP_SUB: "-", OP_MUL: "*"}
+# Control flow the generated straight-line code cannot express.
+_NOT_SPECIALIZABLE = frozenset({OP_JMP, OP_JZ, OP_JNZ, OP_CALL, OP_RET})
+
+
+def _program_key(program: List[DecodedInstruction]) -> Optional[Tuple]:
+    key = []
+    for instr in program:
+        if instr.inner is not None:
+            return None
+        key.append(tuple(instr.data))
+    return tuple(key)
+
+
+@lru_cache(maxsize=128)
+def _specialized(key: Tuple) -> Optional[Callable]:
+    """Compile the straight-line runner for the program described by ``key``."""
+    # ``done`` counts the instructions completed before any that may raise,
+    # so ``executed_instructions`` matches the interpreter after an error.
+    body = [
+        "stack = vm.stack",
+        "out = vm._out",
+        "out.clear()",
+        "dispatch = vm._dispatch",
+    ]
+    n = len(key)
+
+    def need(count: int, idx: int) -> None:
+        body.append(f"if len(stack) < {count}:")
+        body.append(f"    done = {idx}")
+        body.append(f"    vm.ip = {idx + 1}")
+        body.append(f"    raise StackUnderflowError('Stack underflow', {idx})")
+
+    for idx, data in enumerate(key):
+        op = next((p for p, e in data if e == 4), None)
+        if op is None:
+            p_chr = next((p for p, e in data if e in (2, 3)), None)
+            if p_chr is None:
+                return None
+            body.append(f"out.append({chr(_PRIME_IDX[p_chr])!r})")
+        elif op in _NOT_SPECIALIZABLE:
+            return None
+        elif op == OP_PUSH:
+            val = _PRIME_IDX[next(p for p, e in data if e == 5)]
+            body.append(f"stack.append({val})")
+            body.append(f"if len(stack) > {SegmentedMemory.STACK_SIZE}:")
+            body.append(f"    done = {idx}")
+            body.append(f"    vm.ip = {idx + 1}")
+            body.append(f"    raise StackOverflowError('Stack overflow', {idx})")
+        elif op in _INLINE_BINARY:
+            need(2, idx)
+            body.append("b = stack.pop()")
+            body.append(f"stack.append(stack.pop() {_INLINE_BINARY[op]} b)")
+        elif op == OP_PRINT:
+            need(1, idx)
+            body.append("out.append(str(stack.pop()))")
+        elif op == OP_PRINTN:
+            count = _PRIME_IDX[next(p for p, e in data if e == 5)]
+            need(count, idx)
+            if count:
+                body.append(f"out.extend(map(str, stack[-{count}:]))")
+                body.append(f"del stack[-{count}:]")
+        elif op == OP_HALT:
+            n = idx + 1
+            break
+        else:
+            body.append(f"done = {idx}")
+            body.append(f"vm.ip = {idx + 1}")
+            body.append(f"handler = dispatch.get({op})")
+            body.append("if handler is None:")
+            body.append(f"    raise InvalidOpcodeError('Unknown opcode', {idx})")
+            body.append(f"handler(program[{idx}])")
+    body.append("vm.ip = len(program)" if n < len(key) else f"vm.ip = {n}")
+    body.append(f"done = {n}")
+    body.append("result = ''.join(out)")
+    body.append("out.clear()")
+    body.append("return result")
+    src = (
+        "def run(vm, program):\n"
+        "    if vm.profiler or vm.checkpoint_policy or vm.coherence_validator:\n"
+        "        return vm.run(program)\n"
+        "    done = 0\n"
+        "    try:\n"
+        + "".join(f"        {line}\n" for line in body)
+        + "    finally:\n"
+        "        vm.executed_instructions += done\n"
+    )
+    namespace = {
+        "StackUnderflowError": StackUnderflowError,
+        "StackOverflowError": StackOverflowError,
+        "InvalidOpcodeError": InvalidOpcodeError,
+    }
+    exec(compile(src, "<uor-specialized>", "exec"), namespace)
+    return namespace["run"]
+
+
+def specialize(program: List[DecodedInstruction]) -> Callable[["VM"], str]:
+    """Return ``f(vm) -> str`` running ``program`` as generated Python code.
+
+    Loop-free programs are unrolled into straight-line source with common
+    opcodes inlined and no dispatch loop, compiled once per distinct
+    program and cached. Programs with branches, calls or nested blocks get
+    a plain ``vm.run`` wrapper, as do VMs with a profiler, checkpoint
+    policy or coherence validator attached. The JIT is bypassed.
+    """
+    key = _program_key(program)
+    func = _specialized(key) if key is not None else None
+    if func is None:
+        return lambda vm: vm.run(program)
+    return partial(func, program=program)
+
+
 class VM:
+    # Idle VMs recycled for BLOCK/NTT bodies instead of constructing a fresh
+    # instance (memory model, dispatch table, ...) for every nested program.
+    # Every subclass gets its own pool so children keep the parent's class.
+    _pool: List["VM"] = []
+    _POOL_MAX = 8
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._pool = []
+
     def __init__(self, profiler: Optional[VMProfiler] = None, coherence_validator: CoherenceValidator | None = None) -> None:
         self.stack: List[int] = []
         self.mem = SegmentedMemory(self)
@@ -64,13 +274,17 @@ class VM:
         self._compiled: Dict[int, Tuple[JITBlock, float]] = {}
         self.jit_threshold: int = 1000
         self._jit = JITCompiler()
+        # ``ctypes`` scratch stack reused by native JIT blocks.
+        self._jit_buf = None
         self.profiler = profiler
         self.executed_instructions: int = 0
         self.checkpoint_backend = None
         self.checkpoint_policy = None
         self.last_checkpoint_id: str | None = None
         self.coherence_validator = coherence_validator
-        self._program_len: int = 0
+        # Output produced by opcode handlers, drained by ``execute``.
+        self._out: List[str] = []
+        self._program: List[DecodedInstruction] = []
         self._dispatch = {
             OP_PUSH: self._op_push,
             OP_ADD: self._op_add,
@@ -130,8 +344,50 @@ class VM:
             OP_DROP: self._op_drop,
             OP_OVER: self._op_over,
             OP_PICK: self._op_pick,
+            OP_PRINTN: self._op_printn,
         }
 
+    def reset(self) -> None:
+        """Return the VM to the state of a freshly constructed instance."""
+        self.stack.clear()
+        self.call_stack.clear()
+        self.mem.reset()
+        self.hp = self.mem.heap_pointer
+        self.sp = self.mem.stack_pointer
+        self.ip = 0
+        self.io_in.clear()
+        self.io_out.clear()
+        self.atomic = False
+        self._counter.clear()
+        self._compiled.clear()
+        self.executed_instructions = 0
+        self.last_checkpoint_id = None
+        self._out.clear()
+        self._program = []
+
+    @classmethod
+    def _acquire(cls) -> "VM":
+        """Take an idle VM from the pool or construct a new one."""
+        try:
+            vm = cls._pool.pop()
+        except IndexError:
+            return cls()
+        vm.reset()
+        return vm
+
+    @classmethod
+    def _release(cls, vm: "VM") -> None:
+        if len(cls._pool) < cls._POOL_MAX:
+            cls._pool.append(vm)
+
+    def _run_child(self, program: List[DecodedInstruction]) -> Iterator[str]:
+        """Execute ``program`` on a pooled child of the same VM class."""
+        child = self._acquire()
+        try:
+            yield from child.execute(program)
+        finally:
+            self._release(child)
+
     def _pop(self) -> int:
         """Pop a single value from the stack with underflow check."""
         if not self.stack:
@@ -157,19 +413,35 @@ class VM:
         if self.coherence_validator:
             self.coherence_validator.check(self)
 
+    def execute_raw(self, chunks: List[int], resume: bool = False) -> Iterator[str]:
+        """Execute encoded ``chunks``, decoding instructions as they are reached."""
+        return self.execute(LazyProgram(chunks), resume=resume)
+
+    def run(self, program: List[DecodedInstruction], resume: bool = False) -> str:
+        """Execute ``program`` and return its complete output."""
+        return "".join(self.execute(program, resume=resume))
+
     def execute(self, program: List[DecodedInstruction], resume: bool = False) -> Iterator[str]:
         if not resume:
             self.ip = 0
-        self._program_len = len(program)
+        self._program = program
+        out = self._out
+        out.clear()
         if self.coherence_validator:
             self.coherence_validator.start(self)
         if self.profiler:
             self.profiler.reset()
         while True:
-            if self.ip == len(program):
-                break
-            if self.ip < 0 or self.ip > len(program):
+            # Bounds are checked through indexing rather than ``len`` so that
+            # lazily decoded programs are only decoded as far as execution goes.
+            if self.ip < 0:
                 raise SegmentationFaultError("Instruction pointer out of range", self.ip)
+            try:
+                instr = program[self.ip]
+            except IndexError:
+                if self.ip == len(program):
+                    break
+                raise SegmentationFaultError("Instruction pointer out of range", self.ip) from None
             ip_before = self.ip
             if self._jit.available and self.ip in self._compiled:
                 block, exp = self._compiled[self.ip]
@@ -179,7 +451,10 @@ class VM:
                     start_t = time.perf_counter()
                     yield from block(self)
                     duration = time.perf_counter() - start_t
-                    self.executed_instructions += 1
+                    self.executed_instructions += block.size
+                    if out:
+                        yield from out
+                        out.clear()
                     if self.profiler:
                         self.profiler.record_instruction(ip_before, None, duration, cache_hit=True)
                     if self.checkpoint_policy and self.checkpoint_policy.should_checkpoint(self):
@@ -187,23 +462,21 @@ class VM:
                     self._check_coherence()
                     continue
 
-            instr = program[self.ip]
             self._counter[self.ip] = self._counter.get(self.ip, 0) + 1
             if (
                 self._jit.available
                 and self._counter[self.ip] >= self.jit_threshold
                 and self.ip not in self._compiled
             ):
-                block = self._jit.compile_block([instr])
+                block = self._jit.compile_block(self._jit.straight_line(program, self.ip))
                 if block is not None:
                     self._compiled[self.ip] = (block, time.time() + self._jit.ttl)
 
             self.ip += 1
-            data = instr.data
 
-            if any(p == BLOCK_TAG and e == 7 for p, e in data):
+            if instr.is_block:
                 start_t = time.perf_counter()
-                yield from VM().execute(instr.inner or [])
+                yield from self._run_child(instr.inner or [])
                 duration = time.perf_counter() - start_t
                 self.executed_instructions += 1
                 if self.profiler:
@@ -213,36 +486,14 @@ class VM:
                 self._check_coherence()
                 continue
 
-            if any(p == NTT_TAG and e == 4 for p, e in data):
+            if instr.is_ntt:
                 inner = instr.inner or []
                 vec = [next((e2 for _, e2 in i.data if e2 > 0), 0) for i in inner]
                 n = len(vec)
                 if n:
-                    root = pow(NTT_ROOT, (T_MOD - 1) // n, T_MOD)
-
-                    def _ntt(values: List[int]) -> List[int]:
-                        res = []
-                        for i in range(n):
-                            acc = 0
-                            for j, v in enumerate(values):
-                                acc = (acc + v * pow(root, (i * j) % n, T_MOD)) % T_MOD
-                            res.append(acc)
-                        return res
-
-                    def _intt(values: List[int]) -> List[int]:
-                        inv_root = pow(root, T_MOD - 2, T_MOD)
-                        inv_n = pow(n, T_MOD - 2, T_MOD)
-                        res = []
-                        for i in range(n):
-                            acc = 0
-                            for j, v in enumerate(values):
-                                acc = (acc + v * pow(inv_root, (i * j) % n, T_MOD)) % T_MOD
-                            res.append((acc * inv_n) % T_MOD)
-                        return res
-
-                    vec = _intt(_ntt(vec))
+                    vec = ntt_roundtrip(vec)
                 start_t = time.perf_counter()
-                yield from VM().execute(inner)
+                yield from self._run_child(inner)
                 duration = time.perf_counter() - start_t
                 self.executed_instructions += 1
                 if self.profiler:
@@ -252,23 +503,44 @@ class VM:
                 self._check_coherence()
                 continue
 
-            exps = {e for _, e in data}
-            if 4 in exps:
-                op = next(p for p, e in data if e == 4)
+            op = instr.op
+            if op is not None:
                 handler = self._dispatch.get(op)
                 if handler is None:
                     raise InvalidOpcodeError("Unknown opcode", self.ip - 1)
                 start_t = time.perf_counter()
-                yield from handler(data)
+                handler(instr)
                 duration = time.perf_counter() - start_t
                 self.executed_instructions += 1
+                fused = instr.fused is not None and not (
+                    self.profiler or self.checkpoint_policy or self.coherence_validator
+                )
+                if fused:
+                    # Superinstruction: run the paired instruction without
+                    # another trip through the dispatch loop, provided it is
+                    # still the next instruction of this program (decoded
+                    # lists may have been sliced or spliced since).
+                    op2, nxt = instr.fused
+                    try:
+                        fused = program[self.ip] is nxt
+                    except IndexError:
+                        fused = False
+                if fused:
+                    self.ip += 1
+                    self._dispatch[op2](nxt)
+                    self.executed_instructions += 1
+                if out:
+                    yield from out
+                    out.clear()
+                if fused:
+                    continue
                 if self.profiler:
                     self.profiler.record_instruction(ip_before, op, duration)
                 if self.checkpoint_policy and self.checkpoint_policy.should_checkpoint(self):
                     self.checkpoint()
                 self._check_coherence()
             else:
-                p_chr = next((p for p, e in data if e in (2, 3)), None)
+                p_chr = instr.print_prime
                 if p_chr is None:
                     raise ValueError("Bad data")
                 start_t = time.perf_counter()
@@ -285,43 +557,54 @@ class VM:
     # Opcode handlers
     # ──────────────────────────────────────────────────────────────────
 
-    def _op_push(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        v = next(p for p, e in data if e == 5)
-        self.stack.append(_PRIME_IDX[v])
+    def _branch_target(self, instr: DecodedInstruction) -> int:
+        """Absolute target of a JMP/JZ/JNZ/CALL executing at ``self.ip - 1``."""
+        if instr.offset is not None:
+            return self.ip + instr.offset
+        data = instr.data
+        sign = -1 if any(p == NEG_FLAG and e == 5 for p, e in data) else 1
+        off = next(p for p, e in data if e == 5 and p != NEG_FLAG)
+        return self.ip + sign * _PRIME_IDX[off]
+
+    def _op_push(self, instr: DecodedInstruction) -> None:
+        v = instr.push_val
+        if v is None:
+            v = _PRIME_IDX[next(p for p, e in instr.data if e == 5)]
+        self.stack.append(v)
         if len(self.stack) > SegmentedMemory.STACK_SIZE:
             raise StackOverflowError("Stack overflow", self.ip - 1)
-        return iter(())
 
     def _binary_op(self, func) -> None:
         a, b = self._pop_two()
         self.stack.append(func(a, b))
 
-    def _op_add(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_add(self, instr: DecodedInstruction) -> None:
         self._binary_op(lambda a, b: a + b)
-        return iter(())
 
-    def _op_sub(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_sub(self, instr: DecodedInstruction) -> None:
         self._binary_op(lambda a, b: a - b)
-        return iter(())
 
-    def _op_mul(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_mul(self, instr: DecodedInstruction) -> None:
         self._binary_op(lambda a, b: a * b)
-        return iter(())
 
-    def _op_load(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        addr_p = next(p for p, e in data if e == 5)
-        addr = _PRIME_IDX[addr_p]
+    @staticmethod
+    def _addr(instr: DecodedInstruction) -> int:
+        addr = instr.addr
+        if addr is None:
+            addr = _PRIME_IDX[next(p for p, e in instr.data if e == 5)]
+        return addr
+
+    def _op_load(self, instr: DecodedInstruction) -> None:
+        addr = self._addr(instr)
         try:
             self.stack.append(self.mem.load(addr))
         except MemoryError as exc:
             raise MemoryAccessError(str(exc), self.ip - 1) from None
         if self.profiler:
             self.profiler.record_memory_access(addr, "read")
-        return iter(())
 
-    def _op_store(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        addr_p = next(p for p, e in data if e == 5)
-        addr = _PRIME_IDX[addr_p]
+    def _op_store(self, instr: DecodedInstruction) -> None:
+        addr = self._addr(instr)
         val = self._pop()
         try:
             self.mem.store(addr, val)
@@ -329,294 +612,250 @@ class VM:
             raise MemoryAccessError(str(exc), self.ip - 1) from None
         if self.profiler:
             self.profiler.record_memory_access(addr, "write")
-        return iter(())
 
-    def _op_jmp(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        sign = -1 if any(p == NEG_FLAG and e == 5 for p, e in data) else 1
-        off = next(p for p, e in data if e == 5 and p != NEG_FLAG)
-        self.ip += sign * _PRIME_IDX[off]
-        return iter(())
+    def _op_jmp(self, instr: DecodedInstruction) -> None:
+        self.ip = self._branch_target(instr)
 
-    def _op_jz(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        sign = -1 if any(p == NEG_FLAG and e == 5 for p, e in data) else 1
-        off = next(p for p, e in data if e == 5 and p != NEG_FLAG)
+    def _op_jz(self, instr: DecodedInstruction) -> None:
         val = self._pop()
         if val == 0:
-            self.ip += sign * _PRIME_IDX[off]
-        return iter(())
+            self.ip = self._branch_target(instr)
 
-    def _op_jnz(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        sign = -1 if any(p == NEG_FLAG and e == 5 for p, e in data) else 1
-        off = next(p for p, e in data if e == 5 and p != NEG_FLAG)
+    def _op_jnz(self, instr: DecodedInstruction) -> None:
         val = self._pop()
         if val != 0:
-            self.ip += sign * _PRIME_IDX[off]
-        return iter(())
+            self.ip = self._branch_target(instr)
 
-    def _op_print(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        yield str(self._pop())
+    def _op_print(self, instr: DecodedInstruction) -> None:
+        self._out.append(str(self._pop()))
+
+    def _op_printn(self, instr: DecodedInstruction) -> None:
+        """Print the top ``n`` values, deepest first, as ``n`` PRINTs would."""
+        n = _PRIME_IDX[next(p for p, e in instr.data if e == 5)]
+        if n > len(self.stack):
+            raise StackUnderflowError("Stack underflow", self.ip - 1)
+        if n:
+            self._out.extend(map(str, self.stack[-n:]))
+            del self.stack[-n:]
 
     # ------------------------------------------------------------------
     # Extended opcode handlers
     # ------------------------------------------------------------------
 
-    def _op_call(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        sign = -1 if any(p == NEG_FLAG and e == 5 for p, e in data) else 1
-        off = next(p for p, e in data if e == 5 and p != NEG_FLAG)
+    def _op_call(self, instr: DecodedInstruction) -> None:
         self.call_stack.append(self.ip)
         if self.call_stack_tracker is not None:
             self.call_stack_tracker.push(self.ip - 1, self.ip)
-        self.ip += sign * _PRIME_IDX[off]
-        return iter(())
+        self.ip = self._branch_target(instr)
 
-    def _op_ret(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_ret(self, instr: DecodedInstruction) -> None:
         if self.call_stack:
             self.ip = self.call_stack.pop()
             if self.call_stack_tracker is not None:
-                self.call_stack_tracker.pop()
-        return iter(())
+                self.call_stack_tracker.drop()
 
-    def _op_alloc(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        size_p = next(p for p, e in data if e == 5)
+    def _op_alloc(self, instr: DecodedInstruction) -> None:
+        size_p = next(p for p, e in instr.data if e == 5)
         size = _PRIME_IDX[size_p]
         try:
             addr = self.mem.allocate(size)
         except MemoryError as exc:
             raise MemoryAccessError(str(exc), self.ip - 1) from None
         self.stack.append(addr)
-        return iter(())
 
-    def _op_free(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        addr_p = next(p for p, e in data if e == 5)
+    def _op_free(self, instr: DecodedInstruction) -> None:
+        addr_p = next(p for p, e in instr.data if e == 5)
         addr = _PRIME_IDX[addr_p]
         self.mem.free(addr)
-        return iter(())
 
-    def _op_input(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_input(self, instr: DecodedInstruction) -> None:
         val = self.io_in.pop(0) if self.io_in else 0
         self.stack.append(val)
         if self.profiler:
             self.profiler.record_io()
-        return iter(())
 
-    def _op_output(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_output(self, instr: DecodedInstruction) -> None:
         if self.profiler:
             self.profiler.record_io()
         val = self._pop()
         self.io_out.append(val)
-        yield str(val)
+        self._out.append(str(val))
 
-    def _op_net_send(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_net_send(self, instr: DecodedInstruction) -> None:
         start = time.time()
         # network operation would occur here
         if self.profiler:
             self.profiler.record_network_latency(time.time() - start)
-        return iter(())
 
-    def _op_net_recv(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_net_recv(self, instr: DecodedInstruction) -> None:
         start = time.time()
         self.stack.append(0)
         if self.profiler:
             self.profiler.record_network_latency(time.time() - start)
-        return iter(())
 
-    def _op_thread_start(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        return iter(())
+    def _op_thread_start(self, instr: DecodedInstruction) -> None:
+        pass
 
-    def _op_thread_join(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        return iter(())
+    def _op_thread_join(self, instr: DecodedInstruction) -> None:
+        pass
 
-    def _op_checkpoint(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_checkpoint(self, instr: DecodedInstruction) -> None:
         self.checkpoint()
-        return iter(())
 
     # ------------------------------------------------------------------
     # New opcode handlers
     # ------------------------------------------------------------------
 
-    def _op_div(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_div(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         if b == 0:
             raise DivisionByZeroError("Division by zero", self.ip - 1)
         self.stack.append(a // b)
-        return iter(())
 
-    def _op_mod(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_mod(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         if b == 0:
             raise DivisionByZeroError("Modulo by zero", self.ip - 1)
         self.stack.append(a % b)
-        return iter(())
 
-    def _op_and(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_and(self, instr: DecodedInstruction) -> None:
         self._binary_op(lambda a, b: a & b)
-        return iter(())
 
-    def _op_or(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_or(self, instr: DecodedInstruction) -> None:
         self._binary_op(lambda a, b: a | b)
-        return iter(())
 
-    def _op_xor(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_xor(self, instr: DecodedInstruction) -> None:
         self._binary_op(lambda a, b: a ^ b)
-        return iter(())
 
-    def _op_shl(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_shl(self, instr: DecodedInstruction) -> None:
         self._binary_op(lambda a, b: a << b)
-        return iter(())
 
-    def _op_shr(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_shr(self, instr: DecodedInstruction) -> None:
         self._binary_op(lambda a, b: a >> b)
-        return iter(())
 
-    def _op_neg(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_neg(self, instr: DecodedInstruction) -> None:
         v = self._pop()
         self.stack.append(-v)
-        return iter(())
 
-    def _op_fmul(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_fmul(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         a = float(a)
         b = float(b)
         self.stack.append(a * b)
-        return iter(())
 
-    def _op_fdiv(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_fdiv(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         a = float(a)
         b = float(b)
         if b == 0:
             raise DivisionByZeroError("Float division by zero", self.ip - 1)
         self.stack.append(a / b)
-        return iter(())
 
-    def _op_f2i(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_f2i(self, instr: DecodedInstruction) -> None:
         self.stack.append(int(self._pop()))
-        return iter(())
 
-    def _op_i2f(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_i2f(self, instr: DecodedInstruction) -> None:
         self.stack.append(float(self._pop()))
-        return iter(())
 
-    def _op_syscall(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_syscall(self, instr: DecodedInstruction) -> None:
         self.stack.append(0)
-        return iter(())
 
-    def _op_int(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_int(self, instr: DecodedInstruction) -> None:
         self.stack.append(0)
-        return iter(())
 
-    def _op_halt(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        self.ip = self._program_len
-        return iter(())
+    def _op_halt(self, instr: DecodedInstruction) -> None:
+        self.ip = len(self._program)
 
-    def _op_nop(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        return iter(())
+    def _op_nop(self, instr: DecodedInstruction) -> None:
+        pass
 
-    def _op_hash(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_hash(self, instr: DecodedInstruction) -> None:
         import hashlib
 
         v = self._pop()
         h = hashlib.sha256(str(v).encode()).digest()
         self.stack.append(int.from_bytes(h[:4], "big"))
-        return iter(())
 
-    def _op_sign(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_sign(self, instr: DecodedInstruction) -> None:
         v = self._pop()
         self.stack.append(v + 1)
-        return iter(())
 
-    def _op_verify(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_verify(self, instr: DecodedInstruction) -> None:
         v = self._pop()
         sig = self._pop()
         self.stack.append(1 if sig == v + 1 else 0)
-        return iter(())
 
-    def _op_rng(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_rng(self, instr: DecodedInstruction) -> None:
         self.stack.append(4)
-        return iter(())
 
-    def _op_brk(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        yield "BRK"
+    def _op_brk(self, instr: DecodedInstruction) -> None:
+        self._out.append("BRK")
 
-    def _op_trace(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        yield str(self.stack[-1] if self.stack else 0)
+    def _op_trace(self, instr: DecodedInstruction) -> None:
+        self._out.append(str(self.stack[-1] if self.stack else 0))
 
-    def _op_debug(self, data: List[Tuple[int, int]]) -> Iterator[str]:
-        yield "DEBUG"
+    def _op_debug(self, instr: DecodedInstruction) -> None:
+        self._out.append("DEBUG")
 
-    def _op_atomic(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_atomic(self, instr: DecodedInstruction) -> None:
         self.atomic = not self.atomic
-        return iter(())
 
-    def _op_not(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_not(self, instr: DecodedInstruction) -> None:
         v = self._pop()
         self.stack.append(~v)
-        return iter(())
 
-    def _op_gt(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_gt(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         self.stack.append(1 if a > b else 0)
-        return iter(())
 
-    def _op_lt(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_lt(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         self.stack.append(1 if a < b else 0)
-        return iter(())
 
-    def _op_eq(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_eq(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         self.stack.append(1 if a == b else 0)
-        return iter(())
 
-    def _op_neq(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_neq(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         self.stack.append(1 if a != b else 0)
-        return iter(())
 
-    def _op_gte(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_gte(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         self.stack.append(1 if a >= b else 0)
-        return iter(())
 
-    def _op_lte(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_lte(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         self.stack.append(1 if a <= b else 0)
-        return iter(())
 
-    def _op_dup(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_dup(self, instr: DecodedInstruction) -> None:
         if not self.stack:
             raise StackUnderflowError("Stack underflow", self.ip - 1)
         self.stack.append(self.stack[-1])
-        return iter(())
 
-    def _op_swap(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_swap(self, instr: DecodedInstruction) -> None:
         a, b = self._pop_two()
         self.stack.extend([b, a])
-        return iter(())
 
-    def _op_rot(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_rot(self, instr: DecodedInstruction) -> None:
         if len(self.stack) < 3:
             raise StackUnderflowError("Stack underflow", self.ip - 1)
         c = self.stack.pop()
         b = self.stack.pop()
         a = self.stack.pop()
         self.stack.extend([b, c, a])
-        return iter(())
 
-    def _op_drop(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_drop(self, instr: DecodedInstruction) -> None:
         self._pop()
-        return iter(())
 
-    def _op_over(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_over(self, instr: DecodedInstruction) -> None:
         if len(self.stack) < 2:
             raise StackUnderflowError("Stack underflow", self.ip - 1)
         self.stack.append(self.stack[-2])
-        return iter(())
 
-    def _op_pick(self, data: List[Tuple[int, int]]) -> Iterator[str]:
+    def _op_pick(self, instr: DecodedInstruction) -> None:
         idx = self._pop()
         if idx < 0 or idx >= len(self.stack):
             raise StackUnderflowError("Stack underflow", self.ip - 1)
         self.stack.append(self.stack[-idx - 1])
-        return iter(())
 